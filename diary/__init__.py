@@ -17,3 +17,5 @@ Records objective daily thoughts and experiences to enhance memory.
 ## Imports
 ##########################################################################
 
+# Use the app config that connects the signal handlers
+default_app_config = "diary.apps.DiaryConfig"
@@ -19,7 +19,8 @@ Register models for admin management.
 
 from django.contrib import admin
 from reading.models import ArticleCounts
-from diary.models import Memo, Location, GeoEntity, Tabs
+from diary.models import Memo, Location, GeoEntity, Tabs, DailySummary
+from diary.models import OverviewSnapshot
 
 
 ##########################################################################
@@ -42,10 +43,24 @@ class MemoAdmin(admin.ModelAdmin):
     ]
 
 
+class DailySummaryAdmin(admin.ModelAdmin):
+
+    list_display = ("date", "author", "feeling", "words", "articles")
+    readonly_fields = ("memo", "author", "date", "feeling", "words", "articles")
+
+
+class OverviewSnapshotAdmin(admin.ModelAdmin):
+
+    list_display = ("author", "modified")
+    readonly_fields = ("author", "data")
+
+
 ##########################################################################
 ## Register Admin Models
 ##########################################################################
 
 admin.site.register(Memo, MemoAdmin)
 admin.site.register(Location)
-admin.site.register(GeoEntity)
\ No newline at end of file
+admin.site.register(GeoEntity)
+admin.site.register(DailySummary, DailySummaryAdmin)
+admin.site.register(OverviewSnapshot, OverviewSnapshotAdmin)
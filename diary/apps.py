@@ -25,3 +25,7 @@ from django.apps import AppConfig
 
 class DiaryConfig(AppConfig):
     name = 'diary'
+
+    def ready(self):
+        # Connect the signal handlers
+        import diary.signals  # noqa
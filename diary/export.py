@@ -0,0 +1,220 @@
+# diary.export
+# Streaming export of the memos of a user with their related records
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 23:52:16 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: export.py [] benjamin@bengfort.com $
+
+"""
+Streaming export of the memos of a user with their location, tabs, article counts and
+the articles associated with them, as JSON Lines or CSV and optionally compressed.
+
+The memos and the articles are each read with a single query through an iterator
+(a server-side cursor on PostgreSQL), both ordered by date, and merged as they are
+read so that only a chunk of rows is held in memory no matter the size of the diary.
+zstd compression requires the optional zstandard package.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import io
+import csv
+import json
+import zlib
+
+from diary.models import Memo
+from reading.models import Article
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Export formats and their content types
+FORMATS = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Compression algorithms and their file extensions
+COMPRESSION = {
+    "gzip": "gz",
+    "zstd": "zst",
+}
+
+# Fields of each memo, including the fields of the related records by prefix
+MEMO_FIELDS = (
+    "date", "memo", "entry", "private", "feeling", "created", "modified",
+)
+RELATED_FIELDS = {
+    "location": (
+        "name", "latitude", "longitude", "address", "city", "region__name",
+        "country__name", "postal_code",
+    ),
+    "tabs": ("desktop_windows", "desktop_tabs", "mobile_tabs", "tablet_tabs"),
+    "article_counts": ("read", "unread", "archived", "starred"),
+}
+ARTICLE_FIELDS = (
+    "bookmark_id", "url", "title", "description", "progress", "progress_timestamp",
+    "private_source", "time", "starred", "folder", "deleted",
+)
+
+# Rows are buffered into chunks of about this many bytes before they are yielded
+CHUNK_SIZE = 64 * 1024
+
+
+##########################################################################
+## Records
+##########################################################################
+
+def export_records(user, chunk_size=500):
+    """
+    Yields a dict for each of the user's memos in date order, with the related location,
+    tabs and article counts (or None if there are none) and the list of the articles
+    associated with the memo. Executes two queries, one for the memos and one for the
+    articles, that are iterated over chunk_size rows at a time.
+    """
+    related = [
+        f"{prefix}__{field}"
+        for prefix, fields in RELATED_FIELDS.items()
+        for field in ("id",) + fields
+    ]
+    memos = Memo.objects.filter(author=user).order_by("date").values(
+        "id", *MEMO_FIELDS, *related
+    )
+    articles = Article.objects.filter(memo__author=user).order_by(
+        "memo__date", "id"
+    ).values("memo_id", "memo__date", *ARTICLE_FIELDS)
+
+    articles = articles.iterator(chunk_size=chunk_size)
+    article = next(articles, None)
+
+    for memo in memos.iterator(chunk_size=chunk_size):
+        record = {field: memo[field] for field in MEMO_FIELDS}
+        for prefix, fields in RELATED_FIELDS.items():
+            record[prefix] = {
+                field.replace("__name", ""): memo[f"{prefix}__{field}"]
+                for field in fields
+            } if memo[f"{prefix}__id"] is not None else None
+
+        # Merge the articles of the memo, which are ordered by the memo dates
+        record["articles"] = []
+        while article is not None and article["memo__date"] <= memo["date"]:
+            if article["memo_id"] == memo["id"]:
+                record["articles"].append(
+                    {field: article[field] for field in ARTICLE_FIELDS}
+                )
+            article = next(articles, None)
+
+        yield record
+
+
+def csv_header():
+    """
+    Returns the columns of the CSV export, where the fields of the related records are
+    prefixed by the name of the record and the articles are a JSON list.
+    """
+    return list(MEMO_FIELDS) + [
+        f"{prefix}_{field.replace('__name', '')}"
+        for prefix, fields in RELATED_FIELDS.items()
+        for field in fields
+    ] + ["articles"]
+
+
+def csv_row(record):
+    row = [record[field] for field in MEMO_FIELDS]
+    for prefix, fields in RELATED_FIELDS.items():
+        values = record[prefix] or {}
+        row.extend(values.get(field.replace("__name", "")) for field in fields)
+    row.append(json.dumps(record["articles"], cls=DjangoJSONEncoder))
+    return row
+
+
+##########################################################################
+## Streaming
+##########################################################################
+
+def export(user, format="jsonl", compression=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields the export of the user's memos as chunks of bytes in the format (jsonl or
+    csv), compressed with gzip or zstd if compression is specified.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"unknown export format '{format}'")
+
+    if compression is not None and compression not in COMPRESSION:
+        raise ValueError(f"unknown compression '{compression}'")
+
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
+
+    chunks = encode(export_records(user), format, chunk_size)
+    if compression is not None:
+        chunks = compress(chunks, compression)
+    return chunks
+
+
+def encode(records, format, chunk_size=CHUNK_SIZE):
+    """
+    Yields the records encoded in the format as UTF-8 bytes, buffering rows until
+    there are at least chunk_size bytes to yield.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if format == "csv" else None
+    if writer is not None:
+        writer.writerow(csv_header())
+
+    for record in records:
+        if writer is not None:
+            writer.writerow(csv_row(record))
+        else:
+            buffer.write(json.dumps(record, cls=DjangoJSONEncoder))
+            buffer.write("\n")
+
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def compress(chunks, compression="gzip"):
+    """
+    Yields the chunks of bytes compressed as a gzip or zstd stream.
+    """
+    if compression == "gzip":
+        # A window of 16 + 15 bits writes a gzip header and trailer
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        compressor = zstandard.ZstdCompressor().compressobj()
+    else:
+        raise ValueError(f"unknown compression '{compression}'")
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+def filename(user, format="jsonl", compression=None):
+    """
+    Returns the filename of the export of the user's memos.
+    """
+    name = f"memoro-{user.username}.{format}"
+    if compression is not None:
+        name += f".{COMPRESSION[compression]}"
+    return name
@@ -0,0 +1,76 @@
+# diary.management.commands.export
+# Exports the memos of a user as JSON Lines or CSV
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Mon Oct 19 00:10:32 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: export.py [] benjamin@bengfort.com $
+
+"""
+Exports the memos of a user as JSON Lines or CSV
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import sys
+
+from diary.export import export, FORMATS, COMPRESSION
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+
+##########################################################################
+## Command
+##########################################################################
+
+class Command(BaseCommand):
+
+    help = (
+        "export the memos of a user with their location, tabs, article counts and "
+        "articles as JSON Lines or CSV"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-U", "--user", metavar="USER", required=True,
+            help="the memoro user whose memos to export",
+        )
+        parser.add_argument(
+            "-f", "--format", choices=sorted(FORMATS), default="jsonl",
+            help="the format of the export",
+        )
+        parser.add_argument(
+            "-z", "--compression", choices=sorted(COMPRESSION), default=None,
+            help="compress the export (zstd requires the zstandard package)",
+        )
+        parser.add_argument(
+            "-o", "--output", metavar="PATH", default=None,
+            help="write the export to the path instead of stdout",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"{options['user']} is not a valid memoro user")
+
+        try:
+            chunks = export(user, options["format"], options["compression"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options["output"]:
+            with open(options["output"], "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            return
+
+        # The export is bytes (e.g. when compressed) so it is written to stdout directly
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
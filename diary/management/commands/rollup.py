@@ -0,0 +1,70 @@
+# diary.management.commands.rollup
+# Refreshes the daily summary rollups and overview snapshots of the diary
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 20:41:55 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: rollup.py [] benjamin@bengfort.com $
+
+"""
+Refreshes the daily summary rollups and overview snapshots of the diary
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from datetime import date, timedelta
+
+from diary.models import Memo, DailySummary, OverviewSnapshot
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+
+##########################################################################
+## Command
+##########################################################################
+
+class Command(BaseCommand):
+
+    help = (
+        "refresh the daily summaries of memos and the overview snapshots of their "
+        "authors (run nightly, e.g. with the scheduler)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-U", "--user", metavar="USER", default=None,
+            help="only refresh the summaries of the specified memoro user",
+        )
+        parser.add_argument(
+            "-d", "--days", type=int, default=None, metavar="N",
+            help="only refresh the memos of the previous N days (default all memos)",
+        )
+
+    def handle(self, *args, **options):
+        memos = Memo.objects.all()
+        users = User.objects.filter(memos__isnull=False).distinct()
+
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"{options['user']} is not a valid memoro user")
+            memos = memos.filter(author=user)
+            users = [user]
+
+        if options["days"] is not None:
+            since = date.today() - timedelta(days=options["days"])
+            memos = memos.filter(date__gte=since)
+
+        count = DailySummary.objects.refresh(memos)
+        self.stdout.write(f"refreshed {count} daily summaries")
+
+        # Overview snapshots are computed from the entire history of the summaries
+        for user in users:
+            OverviewSnapshot.objects.refresh(user)
+        self.stdout.write(f"refreshed {len(users)} overview snapshots")
@@ -0,0 +1,211 @@
+# diary.managers
+# Model managers for the diary app
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 20:04:16 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: managers.py [] benjamin@bengfort.com $
+
+"""
+Model managers for the diary app
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from datetime import date, timedelta
+
+from django.utils import timezone
+from django.db import models, transaction
+from django.db.models import Count
+
+
+# Fields of the daily summary that are computed from the memo and its articles
+SUMMARY_FIELDS = ("author", "date", "feeling", "words", "articles", "modified")
+
+
+##########################################################################
+## Daily Summary Manager
+##########################################################################
+
+class DailySummaryManager(models.Manager):
+
+    # Available to the historical models so that migrations can backfill summaries
+    use_in_migrations = True
+
+    def refresh(self, memos, batch_size=500):
+        """
+        Computes the daily summaries of the memos in the queryset, creating or updating
+        the rollup rows in a fixed number of queries: one to fetch the memos, one to
+        count the articles read on each day, one to fetch the existing summaries, and a
+        bulk insert and bulk update. Returns the number of summaries refreshed.
+        """
+        # Use the app registry of the model, which is the historical one in migrations
+        Article = self.model._meta.apps.get_model("reading", "Article")
+        memos = list(
+            memos.order_by().values("id", "author_id", "date", "feeling", "entry")
+        )
+        if not memos:
+            return 0
+
+        ids = [memo["id"] for memo in memos]
+        articles = dict(
+            Article.objects.filter(memo_id__in=ids)
+            .order_by().values_list("memo_id").annotate(count=Count("id"))
+        )
+        existing = {
+            summary.memo_id: summary
+            for summary in self.filter(memo_id__in=ids).order_by()
+        }
+
+        creates, updates = [], []
+        for memo in memos:
+            summary = existing.get(memo["id"], None)
+            if summary is None:
+                summary = self.model(memo_id=memo["id"])
+                creates.append(summary)
+            else:
+                updates.append(summary)
+
+            summary.author_id = memo["author_id"]
+            summary.date = memo["date"]
+            summary.feeling = memo["feeling"]
+            summary.words = len((memo["entry"] or "").split())
+            summary.articles = articles.get(memo["id"], 0)
+
+        # bulk_update does not set the modified timestamp of the summaries
+        now = timezone.now()
+        for summary in updates:
+            summary.modified = now
+
+        with transaction.atomic(using=self.db):
+            if creates:
+                self.bulk_create(creates, batch_size=batch_size)
+            if updates:
+                self.bulk_update(updates, SUMMARY_FIELDS, batch_size=batch_size)
+        return len(memos)
+
+    def year(self, author, year):
+        """
+        Returns a list of the days of the year for the author, where each day is a dict
+        with the date, whether there is an entry, the feeling, the number of words in
+        the entry and the number of articles read that day, using a single query.
+        """
+        start, end = date(year, 1, 1), date(year + 1, 1, 1)
+        summaries = {
+            summary["date"]: summary
+            for summary in self.filter(
+                author=author, date__gte=start, date__lt=end
+            ).values("date", "feeling", "words", "articles")
+        }
+
+        days = []
+        for offset in range((end - start).days):
+            day = start + timedelta(days=offset)
+            summary = summaries.get(day, None)
+            days.append({
+                "date": day,
+                "entry": summary is not None,
+                "feeling": summary["feeling"] if summary else None,
+                "words": summary["words"] if summary else 0,
+                "articles": summary["articles"] if summary else 0,
+            })
+        return days
+
+
+##########################################################################
+## Overview Snapshot Manager
+##########################################################################
+
+class OverviewSnapshotManager(models.Manager):
+
+    def refresh(self, author, rolling=30, gaps=5):
+        """
+        Computes the long-range trends of the author's diary from the daily summaries,
+        tabs and article counts (a query each) and stores them as the author's overview
+        snapshot, so that the overview is rendered from a single row no matter how many
+        years of memos there are. The feeling of each week is the mean feeling of the
+        entries in the rolling number of days up to the end of the week.
+        """
+        # The analytics module imports the diary models
+        from memoro.analytics import DailyMetrics, records, tolist
+
+        metrics = DailyMetrics.load(author)
+        present = metrics.present
+
+        data = {
+            "start": None, "end": None, "rolling": rolling,
+            "totals": {"entries": 0, "words": 0, "articles": 0, "feeling": None},
+            "weeks": [], "months": [], "weekdays": {}, "correlations": {}, "gaps": [],
+        }
+
+        if present.any():
+            data["start"] = metrics.start.isoformat()
+            data["end"] = metrics.end.isoformat()
+            data["totals"] = {
+                "entries": int(present.sum()),
+                "words": int(np.nansum(metrics["words"])),
+                "articles": int(np.nansum(metrics["articles"])),
+                "feeling": round(float(np.nanmean(metrics["feeling"])), 3),
+            }
+
+            months, entries = metrics.by_month("feeling", "count")
+            data["months"] = [
+                {"month": month, "entries": int(count), **values}
+                for month, count, values in zip(
+                    tolist(months), entries, records(
+                        articles=metrics.by_month("articles", "sum")[1],
+                        read=metrics.by_month("read", "sum")[1],
+                    )
+                )
+            ]
+
+            # Weeks are complete so that the feeling at the end of each week is known
+            weeks = metrics.reindex(
+                week_start(metrics.start), week_start(metrics.end) + timedelta(days=6)
+            )
+            starts, entries = weeks.by_week("feeling", "count")
+            data["weeks"] = [
+                {"week": week, "entries": int(count), **values}
+                for week, count, values in zip(
+                    tolist(starts), entries, records(
+                        words=weeks.by_week("words", "sum")[1].astype(int),
+                        feeling=weeks.rolling_mean("feeling", rolling)[6::7],
+                        tabs=weeks.by_week("tabs", "mean")[1],
+                    )
+                )
+            ]
+
+            data["weekdays"] = {
+                name: tolist(metrics.by_weekday(name))
+                for name in ("feeling", "words", "articles", "tabs")
+            }
+            data["correlations"] = {
+                "articles_feeling": metrics.correlation("articles", "feeling"),
+                "articles_feeling_next_day": metrics.correlation(
+                    "articles", "feeling", lag=1
+                ),
+                "tabs_feeling": metrics.correlation("tabs", "feeling"),
+                "words_feeling": metrics.correlation("words", "feeling"),
+            }
+            data["gaps"] = [
+                {"start": start.isoformat(), "days": days}
+                for start, days in metrics.gaps(min_days=2)[:gaps]
+            ]
+
+        snapshot, _ = self.update_or_create(author=author, defaults={"data": data})
+        return snapshot
+
+
+def week_start(day):
+    """
+    Returns the Sunday that starts the week of the day.
+    """
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
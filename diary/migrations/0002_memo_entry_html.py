@@ -0,0 +1,23 @@
+# Generated by Django 3.1.3 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memo',
+            name='entry_html',
+            field=models.TextField(blank=True, default=None, editable=False, help_text='The entry rendered as sanitized HTML, cached from the Markdown', null=True),
+        ),
+        migrations.AddField(
+            model_name='memo',
+            name='entry_rendered',
+            field=models.DateTimeField(blank=True, default=None, editable=False, help_text='The modified timestamp of the memo when the entry was rendered', null=True),
+        ),
+    ]
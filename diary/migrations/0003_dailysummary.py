@@ -0,0 +1,59 @@
+# Generated by Django 3.1.3 on 2026-10-18 18:21
+
+from django.conf import settings
+from django.db import migrations, models
+import diary.managers
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+
+
+def backfill_summaries(apps, schema_editor):
+    """
+    Creates the daily summaries of the memos written before the rollup was added.
+    """
+    db = schema_editor.connection.alias
+    Memo = apps.get_model("diary", "Memo")
+    DailySummary = apps.get_model("diary", "DailySummary")
+    DailySummary.objects.db_manager(db).refresh(Memo.objects.using(db).all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('diary', '0002_memo_entry_html'),
+        ('reading', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('date', models.DateField(help_text='The date of the memo (denormalized for range queries)')),
+                ('feeling', models.SmallIntegerField(blank=True, choices=[(-2, 'terrible'), (-1, 'poor'), (0, 'fair'), (1, 'good'), (2, 'excellent')], default=0, help_text='The feeling of the memo')),
+                ('words', models.PositiveIntegerField(default=0, help_text='The number of words in the diary entry')),
+                ('articles', models.PositiveIntegerField(default=0, help_text='The number of articles read that day')),
+                ('author', models.ForeignKey(help_text='The author of the memo (denormalized for range queries)', on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to=settings.AUTH_USER_MODEL)),
+                ('memo', models.OneToOneField(help_text='The memo summarized by the rollup', on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='diary.memo')),
+            ],
+            options={
+                'verbose_name': 'Daily Summary',
+                'verbose_name_plural': 'Daily Summaries',
+                'db_table': 'daily_summaries',
+                'ordering': ('date',),
+                'get_latest_by': 'date',
+            },
+            managers=[
+                ('objects', diary.managers.DailySummaryManager()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dailysummary',
+            index=models.Index(fields=['author', 'date'], name='daily_summaries_date_idx'),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
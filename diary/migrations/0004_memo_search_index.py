@@ -0,0 +1,24 @@
+# Creates the full-text search index of the memos (see diary.search)
+
+from django.db import migrations
+
+
+def install_index(apps, schema_editor):
+    from diary.search import install_index
+    install_index(schema_editor.connection, "memos")
+
+
+def drop_index(apps, schema_editor):
+    from diary.search import drop_index
+    drop_index(schema_editor.connection, "memos")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0003_dailysummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_index, drop_index),
+    ]
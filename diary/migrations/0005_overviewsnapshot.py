@@ -0,0 +1,35 @@
+# Generated by Django 3.1.3 on 2026-10-18 18:27
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('diary', '0004_memo_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverviewSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('data', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='The totals and weekly and monthly trends of the diary')),
+                ('author', models.OneToOneField(help_text='The author of the diary the snapshot summarizes', on_delete=django.db.models.deletion.CASCADE, related_name='overview_snapshot', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Overview Snapshot',
+                'verbose_name_plural': 'Overview Snapshots',
+                'db_table': 'overview_snapshots',
+                'get_latest_by': 'modified',
+            },
+        ),
+    ]
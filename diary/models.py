@@ -26,8 +26,12 @@ from django.urls import reverse_lazy as reverse
 from django.utils.translation import gettext as _
 
 from datetime import date
-from model_utils import Choices
+from model_utils import Choices, FieldTracker
 from model_utils.models import TimeStampedModel
+from django.core.serializers.json import DjangoJSONEncoder
+from diary.managers import DailySummaryManager, OverviewSnapshotManager
+from django.utils.safestring import mark_safe
+from markdownify.templatetags.markdownify import markdownify
 
 
 _RE_WHITESPACE = re.compile(r"\s+")
@@ -93,6 +97,19 @@ class Memo(TimeStampedModel):
         help_text="The location where the diary entry was written",
     )
 
+    entry_html = models.TextField(
+        null=True, blank=True, default=None, editable=False,
+        help_text="The entry rendered as sanitized HTML, cached from the Markdown"
+    )
+
+    entry_rendered = models.DateTimeField(
+        null=True, blank=True, default=None, editable=False,
+        help_text="The modified timestamp of the memo when the entry was rendered"
+    )
+
+    # Tracks date changes so that the previous month's summary can be invalidated
+    tracker = FieldTracker(fields=["date"])
+
     class Meta:
         db_table = "memos"
         ordering = ("-date",)
@@ -110,6 +127,26 @@ class Memo(TimeStampedModel):
             2: "😀"
         }[self.feeling]
 
+    def rendered_entry(self):
+        """
+        Returns the entry rendered as HTML by markdownify. The HTML is stored with the
+        memo along with the modified timestamp it was rendered from, so it is only
+        rendered again once the memo has been saved since.
+        """
+        if not self.entry:
+            return ""
+
+        if self.entry_html is None or self.entry_rendered != self.modified:
+            self.entry_html = str(markdownify(self.entry))
+            self.entry_rendered = self.modified
+
+            # Do not modify the memo, and do not overwrite a concurrent save
+            Memo.objects.filter(pk=self.pk, modified=self.modified).update(
+                entry_html=self.entry_html, entry_rendered=self.entry_rendered
+            )
+
+        return mark_safe(self.entry_html)
+
     def get_absolute_url(self):
         date = self.date.strftime("%Y %m %d").split()
         kwargs = dict(zip(('year', 'month', 'day'), date))
@@ -309,3 +346,88 @@ class Tabs(TimeStampedModel):
         if total > 0:
             return f"{total} tabs open on {self.memo.date}"
         return f"no tabs on {self.memo.date}"
+
+
+class DailySummary(TimeStampedModel):
+    """
+    A precomputed rollup of a memo and the articles read that day, so that long periods
+    of the diary (e.g. a year) can be summarized with a single cheap query. Summaries
+    are refreshed when a memo is saved, after Instapaper synchronization, and nightly
+    by the rollup command.
+    """
+
+    memo = models.OneToOneField(
+        "diary.Memo", models.CASCADE,
+        null=False, blank=False, related_name="summary",
+        help_text="The memo summarized by the rollup",
+    )
+
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, models.CASCADE,
+        null=False, blank=False, related_name="daily_summaries",
+        help_text="The author of the memo (denormalized for range queries)"
+    )
+
+    date = models.DateField(
+        null=False, blank=False,
+        help_text="The date of the memo (denormalized for range queries)"
+    )
+
+    feeling = models.SmallIntegerField(
+        null=False, blank=True, default=FEELINGS.fair, choices=FEELINGS,
+        help_text="The feeling of the memo",
+    )
+
+    words = models.PositiveIntegerField(
+        default=0, help_text="The number of words in the diary entry"
+    )
+
+    articles = models.PositiveIntegerField(
+        default=0, help_text="The number of articles read that day"
+    )
+
+    class Meta:
+        db_table = "daily_summaries"
+        ordering = ("date",)
+        get_latest_by = "date"
+        verbose_name = "Daily Summary"
+        verbose_name_plural = "Daily Summaries"
+        indexes = [
+            models.Index(fields=["author", "date"], name="daily_summaries_date_idx"),
+        ]
+
+    objects = DailySummaryManager()
+
+    def __str__(self):
+        return f"{self.date}: {self.words} words, {self.articles} articles read"
+
+
+class OverviewSnapshot(TimeStampedModel):
+    """
+    The long-range trends of a user's diary (e.g. writing volume and feeling by week and
+    articles read by month) precomputed from the daily summaries, tabs and article
+    counts. Snapshots are refreshed nightly by the rollup command so that the overview
+    is rendered from a single row.
+    """
+
+    author = models.OneToOneField(
+        settings.AUTH_USER_MODEL, models.CASCADE,
+        null=False, blank=False, related_name="overview_snapshot",
+        help_text="The author of the diary the snapshot summarizes"
+    )
+
+    data = models.JSONField(
+        default=dict, blank=True, encoder=DjangoJSONEncoder,
+        help_text="The totals and weekly and monthly trends of the diary"
+    )
+
+    class Meta:
+        db_table = "overview_snapshots"
+        get_latest_by = "modified"
+        verbose_name = "Overview Snapshot"
+        verbose_name_plural = "Overview Snapshots"
+
+    objects = OverviewSnapshotManager()
+
+    def __str__(self):
+        return f"overview of {self.author} as of {self.modified:%Y-%m-%d %H:%M}"
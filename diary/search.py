@@ -0,0 +1,358 @@
+# diary.search
+# Full-text search over the memos and articles of a user
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 21:02:37 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: search.py [] benjamin@bengfort.com $
+
+"""
+Full-text search over the memos and articles of a user.
+
+The search index is maintained by the database rather than by Django so that it is
+updated incrementally on every write, including the bulk creates and updates of the
+Instapaper synchronization that do not send signals. On PostgreSQL (production) each
+indexed table has a generated, weighted tsvector column with a GIN index, which
+requires PostgreSQL 12 or later. On SQLite (development) each indexed table has an
+external content FTS5 table kept up to date by triggers. Other databases fall back to
+unindexed (and unranked) case-insensitive containment queries.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import re
+
+from datetime import date
+from diary.models import Memo
+from reading.models import Article
+
+from django.db import connections
+from django.db.models import F, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.text import Truncator
+from django.utils.safestring import mark_safe
+
+
+# The indexed tables and their (column, weight) pairs in order of importance
+INDEXES = {
+    "memos": (("memo", "A"), ("entry", "B")),
+    "web_articles": (("title", "A"), ("description", "B")),
+}
+
+# The PostgreSQL text search configuration used to index and query
+CONFIG = "english"
+
+# BM25 column weights on SQLite, matching the default PostgreSQL A and B weights
+FTS5_WEIGHTS = {"A": 1.0, "B": 0.4}
+
+# Highlighted terms in snippets are marked with (latin-1) control characters so that
+# the snippet can be escaped before the marks are replaced with HTML
+START_SEL, STOP_SEL = "\x02", "\x03"
+
+# Quoted phrases or words of a query for the SQLite FTS5 query syntax
+_RE_TERMS = re.compile(r'"([^"]*)"|(\w+)')
+
+
+##########################################################################
+## Search
+##########################################################################
+
+def search(user, query, limit=20):
+    """
+    Searches the user's memos and articles, returning a dict of the memos and articles
+    that match the query, each ordered by rank. Every result is a dict with the id,
+    date, title, a highlighted HTML snippet, the rank (higher is better) and url.
+    """
+    return {
+        "memos": search_memos(user, query, limit),
+        "articles": search_articles(user, query, limit),
+    }
+
+
+def search_memos(user, query, limit=20):
+    """
+    Returns the user's memos matching the query (by memo or entry) ordered by rank.
+    """
+    queryset = Memo.objects.filter(author=user)
+    memos = _search(queryset, "entry", query, limit)
+    return [
+        {
+            "id": memo.id,
+            "date": memo.date,
+            "title": memo.memo or str(memo),
+            "snippet": highlight(memo.snippet),
+            "rank": memo.rank,
+            "url": memo.get_absolute_url(),
+        }
+        for memo in memos
+    ]
+
+
+def search_articles(user, query, limit=20):
+    """
+    Returns the user's articles matching the query (by title or description) ordered
+    by rank, excluding articles deleted in Instapaper.
+    """
+    queryset = Article.objects.filter(account__user=user, deleted=False)
+    articles = _search(queryset, "description", query, limit)
+    return [
+        {
+            "id": article.id,
+            "date": article.memo_date or (
+                article.progress_timestamp and article.progress_timestamp.date()
+            ),
+            "title": str(article),
+            "snippet": highlight(article.snippet),
+            "rank": article.rank,
+            "url": article.url,
+        }
+        for article in articles
+    ]
+
+
+def _search(queryset, snippet, query, limit):
+    """
+    Dispatches the search of the queryset to the database backend, returning at most
+    limit model instances annotated with rank and a snippet of the snippet field.
+    """
+    if not query or not query.strip():
+        return []
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        return _search_postgresql(queryset, snippet, query, limit)
+    if vendor == "sqlite":
+        return _search_sqlite(queryset, snippet, query, limit)
+    return _search_fallback(queryset, snippet, query, limit)
+
+
+def _annotate_memo_date(queryset):
+    if queryset.model is Article:
+        return queryset.annotate(memo_date=F("memo__date"))
+    return queryset
+
+
+def _search_postgresql(queryset, snippet, query, limit):
+    from django.contrib.postgres.search import (
+        SearchQuery, SearchRank, SearchHeadline, SearchVectorField,
+    )
+
+    table = queryset.model._meta.db_table
+    vector = RawSQL(f'"{table}"."search_vector"', [], output_field=SearchVectorField())
+    squery = SearchQuery(query, config=CONFIG, search_type="websearch")
+
+    queryset = queryset.annotate(search=vector).filter(search=squery).annotate(
+        rank=SearchRank(vector, squery),
+        snippet=SearchHeadline(
+            snippet, squery, config=CONFIG, start_sel=START_SEL, stop_sel=STOP_SEL,
+            max_words=32, min_words=16,
+        ),
+    )
+    return list(_annotate_memo_date(queryset).order_by("-rank", "-pk")[:limit])
+
+
+def _search_sqlite(queryset, snippet, query, limit):
+    terms = fts5_query(query)
+    if not terms:
+        return []
+
+    table = queryset.model._meta.db_table
+    columns = [column for column, _ in INDEXES[table]]
+    weights = ", ".join(str(FTS5_WEIGHTS[weight]) for _, weight in INDEXES[table])
+
+    # The FTS5 auxiliary functions are only available in the query of the FTS table,
+    # so the matches are ranked there and joined to the filtered queryset.
+    matches = (
+        f"SELECT rowid, -bm25({table}_search, {weights}) AS rank, "
+        f"snippet({table}_search, {columns.index(snippet)}, %s, %s, '…', 24) "
+        f"AS snippet FROM {table}_search WHERE {table}_search MATCH %s"
+    )
+    pks, params = queryset.order_by().values("pk").query.sql_with_params()
+
+    # Articles are dated by the memo they are associated with
+    select, join = "", ""
+    if queryset.model is Article:
+        select = ", memos.date AS memo_date"
+        join = f"LEFT JOIN memos ON memos.id = {table}.memo_id"
+
+    sql = (
+        f"SELECT {table}.*, matches.rank, matches.snippet{select} "
+        f"FROM ({matches}) AS matches JOIN {table} ON {table}.id = matches.rowid "
+        f"{join} WHERE {table}.id IN ({pks}) "
+        f"ORDER BY matches.rank DESC, {table}.id DESC LIMIT %s"
+    )
+
+    instances = list(queryset.model.objects.raw(
+        sql, [START_SEL, STOP_SEL, terms, *params, limit]
+    ))
+
+    # Raw queries do not convert the values of columns that are not model fields
+    for instance in instances:
+        if isinstance(getattr(instance, "memo_date", None), str):
+            instance.memo_date = date.fromisoformat(instance.memo_date)
+    return instances
+
+
+def _search_fallback(queryset, snippet, query, limit):
+    terms = [phrase or word for phrase, word in _RE_TERMS.findall(query)]
+    if not terms:
+        return []
+
+    for term in terms:
+        match = Q()
+        for column, _ in INDEXES[queryset.model._meta.db_table]:
+            match |= Q(**{f"{column}__icontains": term})
+        queryset = queryset.filter(match)
+
+    queryset = queryset.annotate(rank=Value(0.0))
+    instances = list(_annotate_memo_date(queryset).order_by("-pk")[:limit])
+    for instance in instances:
+        text = Truncator(getattr(instance, snippet) or "").words(32)
+        instance.snippet = text
+    return instances
+
+
+def fts5_query(query):
+    """
+    Converts a search query into an FTS5 query that matches documents containing all
+    of the quoted phrases and words of the query, escaping any FTS5 query syntax.
+    """
+    terms = [
+        phrase.strip() or word for phrase, word in _RE_TERMS.findall(query)
+    ]
+    return " ".join(
+        '"{}"'.format(term.replace('"', '""')) for term in terms if term
+    )
+
+
+def highlight(snippet):
+    """
+    Escapes the snippet and replaces the highlight marks with HTML mark elements.
+    """
+    if not snippet:
+        return ""
+    snippet = escape(snippet).replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>")
+    return mark_safe(snippet)
+
+
+##########################################################################
+## Index Management
+##########################################################################
+
+def install_index(connection, table):
+    """
+    Creates the search index of the table and indexes its existing rows.
+    """
+    if connection.vendor == "postgresql":
+        document = " || ".join(
+            f"setweight(to_tsvector('{CONFIG}', coalesce({column}, '')), '{weight}')"
+            for column, weight in INDEXES[table]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({document}) STORED"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_search_idx "
+                f"ON {table} USING GIN (search_vector)"
+            )
+
+    elif connection.vendor == "sqlite":
+        columns = ", ".join(column for column, _ in INDEXES[table])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_search USING fts5("
+                f"{columns}, content='{table}', content_rowid='id', "
+                f"tokenize='porter unicode61')"
+            )
+        install_triggers(connection, table)
+        rebuild_index(connection, table)
+
+
+def install_triggers(connection, table):
+    """
+    Creates the triggers that keep the SQLite FTS5 table of the table up to date,
+    returning True if any trigger did not already exist. Note that SQLite drops the
+    triggers of a table when a migration rebuilds it; see ensure_indexes.
+    """
+    names = [column for column, _ in INDEXES[table]]
+    columns = ", ".join(names)
+    new = ", ".join(f"new.{column}" for column in names)
+    old = ", ".join(f"old.{column}" for column in names)
+
+    insert = f"INSERT INTO {table}_search(rowid, {columns}) VALUES (new.id, {new});"
+    delete = (
+        f"INSERT INTO {table}_search({table}_search, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+
+    triggers = {
+        f"{table}_search_insert": f"AFTER INSERT ON {table} BEGIN {insert} END",
+        f"{table}_search_delete": f"AFTER DELETE ON {table} BEGIN {delete} END",
+        f"{table}_search_update": (
+            f"AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} END"
+        ),
+    }
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+            [table]
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+
+        for name, trigger in triggers.items():
+            if name not in existing:
+                cursor.execute(f"CREATE TRIGGER {name} {trigger}")
+    return not existing.issuperset(triggers)
+
+
+def drop_index(connection, table):
+    """
+    Drops the search index of the table.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX IF EXISTS {table}_search_idx")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+
+        elif connection.vendor == "sqlite":
+            for trigger in ("insert", "delete", "update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_search_{trigger}")
+            cursor.execute(f"DROP TABLE IF EXISTS {table}_search")
+
+
+def rebuild_index(connection, table):
+    """
+    Indexes all rows of the table again. This is only required on SQLite (e.g. after
+    the table has been modified with the triggers missing), since PostgreSQL generates
+    the search vectors of every row as it is written.
+    """
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table}_search({table}_search) VALUES ('rebuild')"
+            )
+
+
+def ensure_indexes(connection):
+    """
+    Restores the triggers of the installed SQLite search indexes, which are dropped
+    when a migration rebuilds an indexed table, and rebuilds those indexes. Called
+    after every migration.
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    tables = set(connection.introspection.table_names())
+    for table in INDEXES:
+        if table in tables and f"{table}_search" in tables:
+            if install_triggers(connection, table):
+                rebuild_index(connection, table)
@@ -0,0 +1,95 @@
+# diary.serializers
+# Serializers for the diary API
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 23:18:27 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: serializers.py [] benjamin@bengfort.com $
+
+"""
+Serializers for the diary API
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from rest_framework import serializers
+from reading.models import ArticleCounts
+from memoro.api import DynamicFieldsModelSerializer
+from diary.models import Memo, Location, Tabs
+
+
+##########################################################################
+## Serializers
+##########################################################################
+
+class ArticleCountsSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ArticleCounts
+        fields = ("read", "unread", "archived", "starred")
+
+
+class MemoTabsSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Tabs
+        fields = ("desktop_windows", "desktop_tabs", "mobile_tabs", "tablet_tabs")
+
+
+class MemoSerializer(DynamicFieldsModelSerializer):
+    """
+    A memo with its tabs and article counts and the ids of the articles read that day.
+    The memo is always written by the requesting user.
+    """
+
+    tabs = MemoTabsSerializer(read_only=True)
+    article_counts = ArticleCountsSerializer(read_only=True)
+    articles = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta:
+        model = Memo
+        fields = (
+            "id", "date", "memo", "entry", "private", "feeling", "location", "tabs",
+            "article_counts", "articles", "created", "modified",
+        )
+
+
+class LocationSerializer(DynamicFieldsModelSerializer):
+
+    class Meta:
+        model = Location
+        fields = (
+            "id", "name", "latitude", "longitude", "ipaddr", "address", "city",
+            "country", "region", "postal_code", "quick_select", "created", "modified",
+        )
+
+
+class TabsSerializer(DynamicFieldsModelSerializer):
+    """
+    The tabs counted with a memo of the requesting user, along with the memo's date.
+    """
+
+    date = serializers.SerializerMethodField()
+    total = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Tabs
+        fields = (
+            "id", "memo", "date", "desktop_windows", "desktop_tabs", "mobile_tabs",
+            "tablet_tabs", "total", "created", "modified",
+        )
+
+    def get_date(self, obj):
+        # The date is annotated by the viewset queryset to paginate on
+        day = getattr(obj, "date", None) or obj.memo.date
+        return day.isoformat()
+
+    def validate_memo(self, memo):
+        if memo.author_id != self.context["request"].user.id:
+            raise serializers.ValidationError("memo does not exist")
+        return memo
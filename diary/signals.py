@@ -0,0 +1,74 @@
+# diary.signals
+# Signal handlers that keep diary summaries and search indexes up to date
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 19:40:22 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: signals.py [] benjamin@bengfort.com $
+
+"""
+Signal handlers that keep diary summaries and search indexes up to date
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from diary.models import Memo, DailySummary
+from diary.search import ensure_indexes
+from diary.summary import invalidate_month
+from django.db import connections
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete, post_migrate
+
+
+##########################################################################
+## Memo Signals
+##########################################################################
+
+@receiver(post_save, sender=Memo, dispatch_uid="memo_saved_invalidate_month")
+def memo_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Refreshes the daily summary of the memo and invalidates the month summary when a
+    memo is created or moved to another date.
+    """
+    if raw:
+        return
+
+    # Keep the daily rollup of the memo up to date
+    DailySummary.objects.refresh(Memo.objects.filter(pk=instance.pk))
+
+    if created:
+        invalidate_month(instance.author_id, instance.date)
+        return
+
+    if instance.tracker.has_changed("date"):
+        invalidate_month(instance.author_id, instance.date)
+        previous = instance.tracker.previous("date")
+        if previous is not None:
+            invalidate_month(instance.author_id, previous)
+
+
+@receiver(post_delete, sender=Memo, dispatch_uid="memo_deleted_invalidate_month")
+def memo_deleted(sender, instance, **kwargs):
+    """
+    Invalidates the month summary when a memo is deleted.
+    """
+    invalidate_month(instance.author_id, instance.date)
+
+
+##########################################################################
+## Migration Signals
+##########################################################################
+
+@receiver(post_migrate, dispatch_uid="migrated_ensure_search_indexes")
+def migrated(sender, using="default", **kwargs):
+    """
+    Restores the SQLite search index triggers once all apps have been migrated, since
+    SQLite drops the triggers of a table when a migration rebuilds it.
+    """
+    if sender.label == "diary":
+        ensure_indexes(connections[using])
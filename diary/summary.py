@@ -0,0 +1,86 @@
+# diary.summary
+# Summaries of the diary entries of a user over a period of time
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 19:31:08 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: summary.py [] benjamin@bengfort.com $
+
+"""
+Summaries of the diary entries of a user over a period of time
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from calendar import Calendar
+from datetime import timedelta
+
+from diary.models import Memo
+from django.urls import reverse
+from django.core.cache import cache
+
+
+# Weeks start on Sunday
+CALENDAR = Calendar(firstweekday=6)
+
+# Month summaries are invalidated when memos are added or removed from the month
+MONTH_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+##########################################################################
+## Month Summary
+##########################################################################
+
+def month_summary(user, month):
+    """
+    Returns the weeks of the month as lists of (day, url) pairs, where url links to the
+    user's entry for the day if there is one. Days of the weeks that are not in the
+    month are (None, None). The memo dates of the month are fetched in a single query
+    and the result is cached per user and month until a memo in the month is created,
+    deleted, or moved to another date.
+    """
+    key = month_cache_key(user.pk, month)
+    weeks = cache.get(key)
+    if weeks is not None:
+        return weeks
+
+    start = month.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    entries = set(
+        Memo.objects.filter(
+            author=user, date__gte=start, date__lt=end
+        ).values_list("date", flat=True)
+    )
+
+    weeks = [
+        [
+            (day, entry_url(day) if day in entries else None)
+            if day.month == start.month else (None, None)
+            for day in week
+        ]
+        for week in CALENDAR.monthdatescalendar(start.year, start.month)
+    ]
+
+    cache.set(key, weeks, MONTH_CACHE_TIMEOUT)
+    return weeks
+
+
+def invalidate_month(user_id, day):
+    """
+    Removes the cached month summary of the user for the month of the day.
+    """
+    cache.delete(month_cache_key(user_id, day))
+
+
+def month_cache_key(user_id, day):
+    return f"diary:month:{user_id}:{day.year}-{day.month:02d}"
+
+
+def entry_url(day):
+    kwargs = {"year": day.year, "month": day.month, "day": day.day}
+    return reverse("entry", kwargs=kwargs)
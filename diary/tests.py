@@ -17,6 +17,967 @@ Application tests.
 ## Imports
 ##########################################################################
 
-from django.test import TestCase
+import io
+import os
+import csv
+import gzip
+import json
+import tempfile
+import numpy as np
 
-# Create your tests here.
+from unittest import mock
+from datetime import date, timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from diary.models import Memo, DailySummary, OverviewSnapshot
+from django.core.cache import cache
+from diary.summary import month_summary, month_cache_key
+from diary.search import search, fts5_query
+from diary.export import export, export_records
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from reading.models import Article, ArticleCounts
+from memoro.analytics import DailyMetrics
+from memoro.testing import PerformanceTestMixin, create_dataset
+from markdownify.templatetags.markdownify import markdownify
+
+
+##########################################################################
+## Model Tests
+##########################################################################
+
+class MemoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=2, articles=0)
+
+    def test_rendered_entry(self):
+        """
+        Ensure the rendered entry is stored and only rendered again after a save
+        """
+        memo = Memo.objects.get(author=self.user, date=date.today())
+        memo.entry = "Hello **world**"
+        memo.save()
+
+        with mock.patch("diary.models.markdownify", wraps=markdownify) as render:
+            html = memo.rendered_entry()
+            self.assertIn("<strong>world</strong>", html)
+            self.assertEqual(render.call_count, 1)
+
+            # The stored HTML is used when the memo is fetched again
+            memo = Memo.objects.get(pk=memo.pk)
+            self.assertEqual(memo.rendered_entry(), html)
+            self.assertEqual(render.call_count, 1)
+
+            # Saving the memo invalidates the stored HTML
+            memo.entry = "Hello *world*"
+            memo.save()
+            memo = Memo.objects.get(pk=memo.pk)
+            self.assertIn("<em>world</em>", memo.rendered_entry())
+            self.assertEqual(render.call_count, 2)
+
+    def test_rendered_entry_empty(self):
+        """
+        Ensure an empty entry is not rendered
+        """
+        memo = Memo.objects.get(author=self.user, date=date.today())
+        memo.entry = None
+        self.assertEqual(memo.rendered_entry(), "")
+
+
+@override_settings(CACHES={"default": {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+}})
+class MonthSummaryTests(TestCase):
+    """
+    Month summaries are cached in a local memory cache in place of the Redis server
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=2, articles=0)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_month_summary(self):
+        """
+        Check the month summary links the entries of the month
+        """
+        month = date(2020, 2, 1)
+        Memo.objects.create(author=self.user, date=date(2020, 2, 14))
+
+        with self.assertNumQueries(1):
+            weeks = month_summary(self.user, month)
+
+        days = [day for week in weeks for day, _ in week if day is not None]
+        self.assertEqual(days, [date(2020, 2, day) for day in range(1, 30)])
+        self.assertTrue(all(len(week) == 7 for week in weeks))
+        self.assertEqual(weeks[0][0], (None, None))
+
+        links = {day: url for week in weeks for day, url in week if url}
+        self.assertEqual(links, {date(2020, 2, 14): "/2020-2-14/"})
+
+        # The summary is cached
+        with self.assertNumQueries(0):
+            self.assertEqual(month_summary(self.user, month), weeks)
+
+    def test_month_summary_invalidation(self):
+        """
+        Ensure creating, moving, and deleting memos invalidates the month summary
+        """
+        def links(month):
+            return {
+                day for week in month_summary(self.user, month)
+                for day, url in week if url
+            }
+
+        feb, mar = date(2020, 2, 1), date(2020, 3, 1)
+        self.assertEqual(links(feb), set())
+        self.assertEqual(links(mar), set())
+
+        memo = Memo.objects.create(author=self.user, date=date(2020, 2, 14))
+        self.assertEqual(links(feb), {memo.date})
+
+        # Saving without changing the date keeps the cache
+        memo.memo = "Valentine's Day"
+        memo.save()
+        with self.assertNumQueries(0):
+            links(feb)
+
+        memo.date = date(2020, 3, 14)
+        memo.save()
+        self.assertEqual(links(feb), set())
+        self.assertEqual(links(mar), {memo.date})
+
+        memo.delete()
+        self.assertEqual(links(mar), set())
+
+    @override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    }})
+    def test_month_summary_without_cache(self):
+        """
+        Ensure month summaries are computed in a single query without a cache server
+        """
+        month = date(2020, 2, 1)
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                weeks = month_summary(self.user, month)
+
+        memo = Memo.objects.create(author=self.user, date=date(2020, 2, 14))
+        weeks = month_summary(self.user, month)
+        links = {day for week in weeks for day, url in week if url}
+        self.assertEqual(links, {memo.date})
+
+
+class DailySummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=30, articles=3)
+
+    def test_refresh(self):
+        """
+        Check daily summaries are refreshed in a fixed number of queries
+        (including the savepoint of the write transaction)
+        """
+        DailySummary.objects.all().delete()
+        memos = Memo.objects.filter(author=self.user)
+
+        with self.assertNumQueries(6):
+            self.assertEqual(DailySummary.objects.refresh(memos), 30)
+
+        # Refreshing existing summaries updates them
+        memos.update(entry="one two three")
+        with self.assertNumQueries(6):
+            self.assertEqual(DailySummary.objects.refresh(memos), 30)
+
+        summary = DailySummary.objects.get(memo__date=date.today())
+        self.assertEqual(summary.author, self.user)
+        self.assertEqual(summary.words, 3)
+        self.assertEqual(summary.articles, 3)
+
+    def test_memo_saved(self):
+        """
+        Ensure saving a memo refreshes its daily summary
+        """
+        memo = Memo.objects.create(
+            author=self.user, date=date(2020, 2, 14), entry="hello world", feeling=2
+        )
+        self.assertEqual(memo.summary.words, 2)
+        self.assertEqual(memo.summary.feeling, 2)
+
+        memo.entry = "hello there world"
+        memo.save()
+        memo.summary.refresh_from_db()
+        self.assertEqual(memo.summary.words, 3)
+
+    def test_year(self):
+        """
+        Check the days of the year are returned with a single query
+        """
+        with self.assertNumQueries(1):
+            days = DailySummary.objects.year(self.user, 2020)
+
+        self.assertEqual(len(days), 366)
+        self.assertEqual(days[0]["date"], date(2020, 1, 1))
+        self.assertFalse(any(day["entry"] for day in days))
+
+        days = DailySummary.objects.year(self.user, date.today().year)
+        today = {day["date"]: day for day in days}[date.today()]
+        self.assertTrue(today["entry"])
+        self.assertEqual(today["articles"], 3)
+        self.assertEqual(today["words"], 7)
+
+
+class DailySummaryMigrationTests(TransactionTestCase):
+
+    before = [("diary", "0002_memo_entry_html"), ("reading", "0001_initial")]
+    after = [("diary", "0003_dailysummary")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        """
+        Ensure the daily summaries of existing memos are created by the migration
+        """
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+
+        User = apps.get_model("auth", "User")
+        Memo = apps.get_model("diary", "Memo")
+        Article = apps.get_model("reading", "Article")
+        InstapaperAccount = apps.get_model("reading", "InstapaperAccount")
+
+        user = User.objects.create(username="reader")
+        account = InstapaperAccount.objects.create(user=user)
+        memo = Memo.objects.create(
+            author=user, date=date(2020, 2, 14), entry="hello world", feeling=2
+        )
+        Memo.objects.create(author=user, date=date(2020, 2, 15))
+        Article.objects.create(account=account, bookmark_id=1, memo=memo)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+
+        DailySummary = apps.get_model("diary", "DailySummary")
+        summaries = {
+            summary.date: (summary.author_id, summary.words, summary.articles)
+            for summary in DailySummary.objects.all()
+        }
+        self.assertEqual(summaries, {
+            date(2020, 2, 14): (user.pk, 2, 1), date(2020, 2, 15): (user.pk, 0, 0),
+        })
+
+
+class OverviewSnapshotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=90, articles=4)
+
+    def test_refresh(self):
+        """
+        Ensure the overview snapshot totals and trends are computed from the rollups
+        """
+        # Three queries for the rollups and update or create (with its savepoints)
+        with self.assertNumQueries(9):
+            snapshot = OverviewSnapshot.objects.refresh(self.user)
+
+        data = OverviewSnapshot.objects.get(author=self.user).data
+        self.assertEqual(data, snapshot.data)
+        self.assertEqual(data["end"], date.today().isoformat())
+        self.assertEqual(data["totals"]["entries"], 90)
+        self.assertEqual(data["totals"]["words"], 90 * 7)
+        self.assertEqual(data["totals"]["articles"], 360)
+
+        weeks, months = data["weeks"], data["months"]
+        self.assertIn(len(weeks), (13, 14))
+        self.assertEqual(sum(week["entries"] for week in weeks), 90)
+        self.assertTrue(all(
+            date.fromisoformat(week["week"]).weekday() == 6 for week in weeks
+        ))
+        self.assertEqual(sum(month["read"] for month in months), 360)
+        self.assertEqual(sum(month["entries"] for month in months), 90)
+
+        # The rolling feeling of the last week is the mean of the previous 30 days
+        end = date.fromisoformat(weeks[-1]["week"]) + timedelta(days=6)
+        feelings = Memo.objects.filter(
+            author=self.user, date__gt=end - timedelta(days=30)
+        ).values_list("feeling", flat=True)
+        self.assertAlmostEqual(
+            weeks[-1]["feeling"], sum(feelings) / len(feelings), places=3
+        )
+
+        # Only the desktop tabs are counted in the fixture
+        tabs = Memo.objects.get(author=self.user, date=date.today()).tabs
+        if date.today().weekday() == 6:
+            self.assertEqual(weeks[-1]["tabs"], tabs.desktop_tabs)
+        self.assertTrue(all(0 <= week["tabs"] <= 40 for week in weeks))
+
+    def test_refresh_empty(self):
+        """
+        Ensure the overview snapshot of a user without entries is empty
+        """
+        other = create_dataset(username="other", days=0, articles=0, seed=7)
+        data = OverviewSnapshot.objects.refresh(other).data
+        self.assertIsNone(data["start"])
+        self.assertEqual(data["weeks"], [])
+        self.assertEqual(data["totals"]["entries"], 0)
+
+
+class DailyMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=60, articles=3)
+
+    def setUp(self):
+        # Remove a week of entries two weeks ago to create a gap
+        self.today = date.today()
+        self.gap = self.today - timedelta(days=20)
+        Memo.objects.filter(
+            author=self.user, date__gte=self.gap, date__lt=self.gap + timedelta(days=7)
+        ).delete()
+
+    def test_load(self):
+        """
+        Ensure the metrics are loaded into date indexed arrays with a query per table
+        """
+        with self.assertNumQueries(3):
+            metrics = DailyMetrics.load(self.user)
+
+        self.assertEqual(len(metrics), 60)
+        self.assertEqual(metrics.end, self.today)
+        self.assertEqual(metrics.present.sum(), 53)
+        self.assertEqual(np.nansum(metrics["words"]), 53 * 7)
+        self.assertEqual(np.nansum(metrics["read"]), 53 * 3)
+
+        memo = Memo.objects.get(author=self.user, date=self.today)
+        self.assertEqual(metrics["feeling"][-1], memo.feeling)
+        self.assertEqual(metrics["tabs"][-1], memo.tabs.total())
+        self.assertTrue(np.isnan(metrics["tabs"][metrics.index([self.gap])[0]]))
+
+        # The range is limited by the start and end
+        metrics = DailyMetrics.load(self.user, self.gap, self.today)
+        self.assertEqual(len(metrics), 21)
+        self.assertEqual(metrics.present.sum(), 14)
+
+        # Longer ranges than max days are rejected, including those of the entries
+        self.assertEqual(len(DailyMetrics.load(self.user, max_days=60)), 60)
+        with self.assertRaises(ValueError):
+            DailyMetrics.load(self.user, max_days=59)
+
+    def test_load_without_summaries(self):
+        """
+        Ensure tabs and counts of memos older than the first summary are not loaded
+        """
+        first = self.today - timedelta(days=9)
+        DailySummary.objects.filter(author=self.user, date__lt=first).delete()
+        ArticleCounts.objects.filter(memo__date=self.today).update(read=1)
+
+        metrics = DailyMetrics.load(self.user)
+        self.assertEqual(metrics.start, first)
+        self.assertEqual(len(metrics), 10)
+        self.assertEqual(np.nansum(metrics["read"]), 9 * 3 + 1)
+        self.assertEqual(metrics["read"][-1], 1)
+
+    def test_rolling_mean(self):
+        """
+        Compare the rolling mean to a mean of each window that ignores missing days
+        """
+        metrics = DailyMetrics.load(self.user)
+        feeling = metrics["feeling"]
+        rolling = metrics.rolling_mean("feeling", 7)
+
+        for idx in range(len(metrics)):
+            window = feeling[max(idx - 6, 0):idx + 1]
+            window = window[~np.isnan(window)]
+            if len(window):
+                self.assertAlmostEqual(rolling[idx], window.mean())
+            else:
+                self.assertTrue(np.isnan(rolling[idx]))
+
+        rolling = metrics.rolling_mean("feeling", 7, min_periods=7)
+        self.assertEqual((~np.isnan(rolling)).sum(), 60 - 6 - 13)
+
+    def test_grouping(self):
+        """
+        Compare the weekday, week and month groups to grouping the memos
+        """
+        metrics = DailyMetrics.load(self.user)
+        memos = list(Memo.objects.filter(author=self.user))
+
+        weekdays = metrics.by_weekday("feeling", "sum")
+        for weekday in range(7):
+            self.assertEqual(weekdays[weekday], sum(
+                memo.feeling for memo in memos if memo.date.weekday() == weekday
+            ))
+
+        weeks, counts = metrics.by_week("feeling", "count")
+        self.assertEqual(counts.sum(), 53)
+        self.assertTrue(all(
+            week.item().weekday() == 6 and count <= 7
+            for week, count in zip(weeks, counts)
+        ))
+
+        months, read = metrics.by_month("read", "sum")
+        self.assertEqual(str(months[-1]), self.today.strftime("%Y-%m"))
+        self.assertEqual(read[-1], 3 * sum(
+            1 for memo in memos if memo.date.replace(day=1) == self.today.replace(day=1)
+        ))
+
+    def test_reindex(self):
+        """
+        Ensure reindexing pads the series with missing days
+        """
+        metrics = DailyMetrics.load(self.user)
+        padded = metrics.reindex(metrics.start - timedelta(days=3), self.today)
+        self.assertEqual(len(padded), 63)
+        self.assertTrue(np.isnan(padded["feeling"][:3]).all())
+        np.testing.assert_array_equal(padded["words"][3:], metrics["words"])
+
+        cropped = metrics.reindex(self.gap, self.gap + timedelta(days=6))
+        self.assertEqual(cropped.present.sum(), 0)
+
+    def test_correlation_and_gaps(self):
+        """
+        Ensure correlations and gaps are computed on the days with values
+        """
+        metrics = DailyMetrics.load(self.user)
+        self.assertEqual(metrics.gaps(), [(self.gap, 7)])
+        self.assertEqual(metrics.gaps(min_days=8), [])
+
+        # Articles are constant in the fixture so they are not correlated
+        self.assertIsNone(metrics.correlation("articles", "feeling"))
+        metrics.series["articles"] = metrics["feeling"] * 2 + 1
+        self.assertAlmostEqual(metrics.correlation("articles", "feeling"), 1.0)
+        self.assertAlmostEqual(metrics.correlation("feeling", "articles"), 1.0)
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=10, articles=2)
+
+    def test_search_memos(self):
+        """
+        Ensure memos are indexed incrementally when they are saved and deleted
+        """
+        memo = Memo.objects.get(author=self.user, date=date.today())
+        self.assertEqual(search(self.user, "aardvark")["memos"], [])
+
+        memo.entry = "We saw an <b>aardvark</b> at the zoo today."
+        memo.save()
+        results = search(self.user, "aardvarks")["memos"]
+        self.assertEqual([result["id"] for result in results], [memo.id])
+        self.assertIn("<mark>aardvark</mark>", results[0]["snippet"])
+        self.assertIn("&lt;b&gt;", results[0]["snippet"])
+        self.assertEqual(results[0]["url"], memo.get_absolute_url())
+
+        memo.entry = "Nothing to see here."
+        memo.save()
+        self.assertEqual(search(self.user, "aardvark")["memos"], [])
+        self.assertEqual(len(search(self.user, "nothing see")["memos"]), 1)
+
+        memo.delete()
+        self.assertEqual(search(self.user, "nothing see")["memos"], [])
+
+    def test_search_ranking(self):
+        """
+        Ensure memos that match by memo are ranked above those that match by entry
+        """
+        first, second = Memo.objects.filter(author=self.user)[:2]
+        first.entry = "A long day, we walked all over Lisbon"
+        first.save()
+        second.memo = "Lisbon"
+        second.save()
+
+        results = search(self.user, "lisbon")["memos"]
+        self.assertEqual([result["id"] for result in results], [second.id, first.id])
+        self.assertGreater(results[0]["rank"], results[1]["rank"])
+
+    def test_search_articles(self):
+        """
+        Ensure bulk created and updated articles are indexed and deleted are excluded
+        """
+        memo = Memo.objects.get(author=self.user, date=date.today())
+        account = self.user.instapaper_account
+        Article.objects.bulk_create([
+            Article(
+                bookmark_id=9000+idx, account=account, memo=memo, folder="archive",
+                url=f"https://example.com/search/{idx}", title=f"Quantum {idx}",
+                description="Notes on computing with qubits",
+            )
+            for idx in range(3)
+        ])
+
+        results = search(self.user, "qubits")["articles"]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["date"], memo.date)
+
+        Article.objects.filter(bookmark_id=9000).update(deleted=True)
+        Article.objects.filter(bookmark_id=9001).update(description="Other things")
+        results = search(self.user, "qubits")["articles"]
+        self.assertEqual([result["title"] for result in results], ["Quantum 2"])
+
+    def test_search_other_users(self):
+        """
+        Ensure the memos and articles of other users are not searched
+        """
+        other = create_dataset(username="other", days=0, articles=0, seed=7)
+        self.assertEqual(len(search(self.user, "heading")["memos"]), 10)
+        self.assertEqual(search(other, "heading"), {"memos": [], "articles": []})
+
+    def test_fts5_query(self):
+        """
+        Ensure search queries are escaped for the FTS5 query syntax
+        """
+        self.assertEqual(fts5_query('new york'), '"new" "york"')
+        self.assertEqual(fts5_query('"new york" OR -city*'), '"new york" "OR" "city"')
+        self.assertEqual(fts5_query('" ? ('), '')
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=30, articles=3)
+
+    def test_export_records(self):
+        """
+        Ensure the memos are merged with their articles in two queries
+        """
+        memo = Memo.objects.get(author=self.user, date=date.today())
+        memo.tabs.delete()
+        Article.objects.filter(memo=memo).update(memo=None)
+
+        with self.assertNumQueries(2):
+            records = list(export_records(self.user, chunk_size=7))
+
+        self.assertEqual(len(records), 30)
+        self.assertEqual(
+            [record["date"] for record in records],
+            sorted(Memo.objects.filter(author=self.user).values_list("date", flat=True))
+        )
+        self.assertTrue(all(len(record["articles"]) == 3 for record in records[:-1]))
+        self.assertEqual(records[-1]["articles"], [])
+        self.assertIsNone(records[-1]["tabs"])
+        self.assertEqual(records[0]["article_counts"]["read"], 3)
+        self.assertIn(records[0]["location"]["name"], ("Home", "Work", "Cafe"))
+
+        # Every article is exported with its memo
+        first = Memo.objects.get(author=self.user, date=records[0]["date"])
+        self.assertEqual(
+            {article["bookmark_id"] for article in records[0]["articles"]},
+            set(first.articles.values_list("bookmark_id", flat=True)),
+        )
+
+    def test_export_jsonl(self):
+        """
+        Ensure the JSON Lines export is chunked and can be compressed with gzip
+        """
+        chunks = list(export(self.user, "jsonl", chunk_size=1024))
+        self.assertGreater(len(chunks), 1)
+
+        lines = b"".join(chunks).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 30)
+        self.assertEqual(len(json.loads(lines[0])["articles"]), 3)
+
+        compressed = b"".join(export(self.user, "jsonl", "gzip", chunk_size=1024))
+        self.assertEqual(gzip.decompress(compressed), b"".join(chunks))
+
+    def test_export_csv(self):
+        """
+        Ensure the CSV export has a row per memo with the articles as JSON
+        """
+        data = b"".join(export(self.user, "csv")).decode("utf-8")
+        rows = list(csv.DictReader(io.StringIO(data)))
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[-1]["date"], date.today().isoformat())
+        self.assertEqual(rows[-1]["article_counts_read"], "3")
+        self.assertEqual(len(json.loads(rows[-1]["articles"])), 3)
+
+    def test_export_errors(self):
+        """
+        Ensure unknown formats and compression are rejected before exporting
+        """
+        with self.assertRaises(ValueError):
+            export(self.user, "xml")
+        with self.assertRaises(ValueError):
+            export(self.user, "csv", "bzip2")
+
+    def test_export_command(self):
+        """
+        Ensure the export command writes the export to a file
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "export.csv.gz")
+            call_command(
+                "export", user=self.user.username, format="csv",
+                compression="gzip", output=path,
+            )
+            with gzip.open(path, "rb") as f:
+                self.assertEqual(f.read(), b"".join(export(self.user, "csv")))
+
+    def test_export_view(self):
+        """
+        Ensure the export is streamed to logged in users as an attachment
+        """
+        url = reverse("export")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(self.user)
+        response = self.client.get(url + "?format=jsonl&compression=gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("memoro-tester.jsonl.gz", response["Content-Disposition"])
+
+        data = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(data.splitlines()), 30)
+
+        response = self.client.get(url + "?format=xml")
+        self.assertEqual(response.status_code, 400)
+
+
+##########################################################################
+## View Tests
+##########################################################################
+
+class DiaryViewPerformanceTests(PerformanceTestMixin, TestCase):
+    """
+    Query count and render time budgets for the diary views. The query budgets include
+    the session and user queries of the authenticated request; if a change needs more
+    queries, make sure they do not grow with the number of memos or articles.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=90, articles=4)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def entry_url(self, day):
+        return reverse("entry", kwargs={
+            "year": day.year, "month": day.month, "day": day.day
+        })
+
+    def test_today_view(self):
+        """
+        Check the today view render budget
+        """
+        response = self.assertRenderBudget(reverse("today"), queries=7, seconds=0.25)
+        self.assertEqual(response.context["object"].date, date.today())
+
+    def test_calendar_view(self):
+        """
+        Check the calendar view render budget
+        """
+        # Nothing is cached in tests, so the month summary query is counted
+        self.assertRenderBudget(reverse("calendar"), queries=3, seconds=0.25)
+
+        url = reverse("calendar") + "?year=2000&month=1"
+        self.assertRenderBudget(url, queries=3, seconds=0.25)
+
+    def test_year_view(self):
+        """
+        Check the year view render budget
+        """
+        url = reverse("year", kwargs={"year": date.today().year})
+        response = self.assertRenderBudget(url, queries=3, seconds=0.25)
+        self.assertEqual(response.context["entries"], 90)
+        self.assertEqual(response.context["articles"], 360)
+        self.assertTrue(all(len(week) == 7 for week in response.context["weeks"]))
+
+    def test_heatmap_api(self):
+        """
+        Check the heatmap endpoint budget
+        """
+        url = reverse("api:heatmap-detail", kwargs={"pk": date.today().year})
+        response = self.assertRenderBudget(url, queries=3, seconds=0.25)
+        self.assertEqual(response.json()["year"], date.today().year)
+        self.assertEqual(sum(day["entry"] for day in response.json()["days"]), 90)
+
+        url = reverse("api:heatmap-detail", kwargs={"pk": "notayear"})
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+    def test_overview_view(self):
+        """
+        Check the overview is rendered from the snapshot in constant queries
+        """
+        # The snapshot is created by the first request of the render budget
+        response = self.assertRenderBudget(reverse("overview"), queries=3, seconds=0.25)
+        self.assertEqual(response.context["totals"]["entries"], 90)
+        self.assertEqual(len(response.context["charts"]), 4)
+
+        # The overview is not updated until the snapshot is refreshed
+        Memo.objects.filter(author=self.user, date=date.today()).delete()
+        response = self.assertRenderBudget(reverse("overview"), queries=3)
+        self.assertEqual(response.context["totals"]["entries"], 90)
+
+        OverviewSnapshot.objects.refresh(self.user)
+        response = self.assertRenderBudget(reverse("overview"), queries=3)
+        self.assertEqual(response.context["totals"]["entries"], 89)
+
+    def test_analytics_api(self):
+        """
+        Check the analytics endpoint budgets
+        """
+        url = reverse("api:analytics-list")
+        response = self.assertRenderBudget(url, queries=5, seconds=0.25)
+        self.assertEqual(response.json()["entries"], 90)
+        self.assertEqual(response.json()["metrics"]["words"]["days"], 90)
+        self.assertEqual(len(response.json()["metrics"]["feeling"]["weekdays"]), 7)
+
+        url = reverse("api:analytics-detail", kwargs={"pk": "feeling"})
+        response = self.assertRenderBudget(url + "?window=30", queries=5, seconds=0.25)
+        self.assertEqual(len(response.json()["days"]), 90)
+        self.assertEqual(response.json()["window"], 30)
+
+        url = reverse("api:analytics-detail", kwargs={"pk": "read"})
+        response = self.client.get(url + f"?start={date.today().isoformat()}")
+        self.assertEqual(response.json()["days"][0]["value"], 4)
+        self.assertEqual(response.json()["months"][0]["value"], 4)
+
+        url = reverse("api:analytics-detail", kwargs={"pk": "nope"})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        url = reverse("api:analytics-list")
+        self.assertEqual(self.client.get(url + "?start=yesterday").status_code, 400)
+        for name in ("list", "detail"):
+            kwargs = {"pk": "feeling"} if name == "detail" else {}
+            url = reverse(f"api:analytics-{name}", kwargs=kwargs)
+            response = self.client.get(url + "?start=2020-02-01&end=2020-01-01")
+            self.assertEqual(response.status_code, 400)
+
+            # Ranges are bounded, including those with an end from the entries
+            for query in ("?start=0001-01-01&end=9999-12-31", "?start=1900-01-01"):
+                response = self.client.get(url + query)
+                self.assertEqual(response.status_code, 400)
+
+    def test_analytics_api_empty(self):
+        """
+        Ensure ranges without entries return empty series
+        """
+        for query in ("?end=2000-01-01", "?start=2999-01-01"):
+            response = self.client.get(reverse("api:analytics-list") + query)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["entries"], 0)
+            self.assertEqual(response.json()["gaps"], [])
+            self.assertEqual(response.json()["metrics"]["words"]["days"], 0)
+
+            url = reverse("api:analytics-detail", kwargs={"pk": "feeling"})
+            response = self.client.get(url + query)
+            self.assertEqual(response.status_code, 200)
+            for series in ("days", "weeks", "months"):
+                self.assertEqual(response.json()[series], [])
+
+    def test_search_view(self):
+        """
+        Check the search view render budget
+        """
+        url = reverse("search") + "?q=markdown+link"
+        response = self.assertRenderBudget(url, queries=4, seconds=0.25)
+        self.assertEqual(len(response.context["results"]["memos"]), 50)
+        self.assertContains(response, "<mark>markdown</mark>")
+
+        response = self.assertRenderBudget(reverse("search"), queries=2)
+        self.assertEqual(response.context["results"]["memos"], [])
+
+    def test_search_api(self):
+        """
+        Check the search endpoint budget
+        """
+        url = reverse("api:search-list") + "?q=article&limit=5"
+        response = self.assertRenderBudget(url, queries=4, seconds=0.25)
+        self.assertEqual(len(response.json()["articles"]), 5)
+        self.assertEqual(response.json()["memos"], [])
+
+        url = reverse("api:search-list")
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url + "?q=a&limit=0").status_code, 400)
+
+    def test_entry_view(self):
+        """
+        Check the entry view render budget
+        """
+        day = date.today() - timedelta(days=10)
+        response = self.assertRenderBudget(
+            self.entry_url(day), queries=6, seconds=0.25
+        )
+        self.assertEqual(response.context["object"].date, day)
+        self.assertEqual(response.context["object"].num_articles, 4)
+        self.assertEqual(response.context["prev_entry"].date, day - timedelta(days=1))
+        self.assertEqual(response.context["next_entry"].date, day + timedelta(days=1))
+
+    def test_entry_view_nav_entries(self):
+        """
+        Check the prev and next entries skip missing days and are None at the ends
+        """
+        today = date.today()
+        Memo.objects.filter(author=self.user, date=today - timedelta(days=1)).delete()
+
+        response = self.assertRenderBudget(self.entry_url(today), queries=6)
+        self.assertEqual(
+            response.context["prev_entry"].date, today - timedelta(days=2)
+        )
+        self.assertIsNone(response.context["next_entry"])
+
+        first = today - timedelta(days=89)
+        response = self.assertRenderBudget(self.entry_url(first), queries=6)
+        self.assertIsNone(response.context["prev_entry"])
+        self.assertEqual(response.context["next_entry"].date, first + timedelta(days=1))
+
+    def test_entry_view_articles(self):
+        """
+        Ensure entry view queries do not grow with the number of articles
+        """
+        day = date.today() - timedelta(days=20)
+        memo = Memo.objects.get(author=self.user, date=day)
+        account = self.user.instapaper_account
+
+        Article.objects.bulk_create([
+            Article(
+                bookmark_id=5000+idx, account=account, memo=memo, folder="archive",
+                url=f"https://example.com/more/{idx}", title=f"More {idx}",
+            )
+            for idx in range(50)
+        ])
+
+        response = self.assertRenderBudget(
+            self.entry_url(day), queries=6, seconds=0.25
+        )
+        self.assertContains(response, "More 49")
+
+    def test_entry_view_not_found(self):
+        """
+        Check the entry view budget for a day without an entry
+        """
+        self.assertRenderBudget(
+            self.entry_url(date(2000, 1, 1)), queries=3, seconds=0.25,
+            status_code=404,
+        )
+
+
+class DiaryAPITests(PerformanceTestMixin, TestCase):
+    """
+    Query count budgets of the pages of the diary API endpoints
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=90, articles=4)
+        cls.other = create_dataset(username="other", days=0, articles=0, seed=7)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_memos(self):
+        """
+        Ensure the memos are paginated by date in a fixed number of queries per page
+        """
+        url = reverse("api:memo-list") + "?per_page=20"
+        memos = self.assertPaginationBudget(url, queries=4, seconds=0.25)
+
+        dates = [memo["date"] for memo in memos]
+        self.assertEqual(len(dates), 90)
+        self.assertEqual(dates, sorted(set(dates), reverse=True))
+        self.assertEqual(dates[0], date.today().isoformat())
+        self.assertEqual(len(memos[0]["articles"]), 4)
+        self.assertEqual(memos[0]["article_counts"]["read"], 4)
+        self.assertIn("desktop_tabs", memos[0]["tabs"])
+
+    def test_memos_sparse_fields(self):
+        """
+        Ensure only the requested fields (and their related objects) are fetched
+        """
+        url = reverse("api:memo-list") + "?fields=id,date,feeling"
+        memos = self.assertPaginationBudget(url, queries=3)
+        self.assertEqual(len(memos), 90)
+        self.assertEqual(set(memos[0]), {"id", "date", "feeling"})
+
+        response = self.client.get(reverse("api:memo-list") + "?fields=id,author")
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_memo(self):
+        """
+        Ensure memos are created for the requesting user
+        """
+        url = reverse("api:memo-list")
+        response = self.client.post(
+            url, {"date": "2000-01-01", "memo": "Y2K", "feeling": 1},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+
+        memo = Memo.objects.get(date=date(2000, 1, 1))
+        self.assertEqual(memo.author, self.user)
+        self.assertEqual(memo.summary.feeling, 1)
+
+        detail = reverse("api:memo-detail", kwargs={"pk": memo.pk})
+        response = self.client.patch(
+            detail, {"entry": "Nothing happened"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["entry"], "Nothing happened")
+
+        # Other users cannot access the memo
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+    def test_tabs(self):
+        """
+        Ensure tabs are paginated by the memo date and only added to the user's memos
+        """
+        url = reverse("api:tabs-list") + "?per_page=50"
+        tabs = self.assertPaginationBudget(url, queries=3)
+        dates = [tab["date"] for tab in tabs]
+        self.assertEqual(dates, sorted(set(dates), reverse=True))
+        self.assertEqual(len(dates), 90)
+
+        memo = Memo.objects.create(date=date(2000, 1, 1), author=self.other)
+        response = self.client.post(
+            reverse("api:tabs-list"), {"memo": memo.pk, "desktop_tabs": 3},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        memo.author = self.user
+        memo.save()
+        response = self.client.post(
+            reverse("api:tabs-list"), {"memo": memo.pk, "desktop_tabs": 3},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["date"], "2000-01-01")
+
+    def test_locations(self):
+        """
+        Ensure the locations are listed
+        """
+        url = reverse("api:location-list") + "?fields=id,name"
+        locations = self.assertPaginationBudget(url, queries=3)
+        self.assertEqual(len(locations), 6)
+
+        # Locations are shared by all users and cannot be changed from the API
+        url = reverse("api:location-detail", kwargs={"pk": locations[0]["id"]})
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.patch(
+            url, {"name": "Moon"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(self.client.delete(url).status_code, 405)
+        response = self.client.post(
+            reverse("api:location-list"), {"name": "Moon"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 405)
@@ -17,22 +17,33 @@ Views control the logic of request handling.
 ## Imports
 ##########################################################################
 
-from calendar import Calendar
-from datetime import date, timedelta
+from datetime import date, timedelta, MINYEAR, MAXYEAR
 
 from diary.forms import TodayForm
+from diary.search import search
+from diary.export import export, filename, FORMATS
+from diary.serializers import MemoSerializer, LocationSerializer, TabsSerializer
+from memoro.api import SparseFieldsetsMixin, DateCursorPagination
+from diary.summary import month_summary
 from diary.models import Location, GeoEntity
-from diary.models import Memo, FEELINGS, Tabs
+from diary.models import Memo, FEELINGS, Tabs, DailySummary
+from reading.models import Article
 
-from django.http import Http404
+from django.views import View
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.db.models import Count, F, Q, Subquery, Prefetch
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.views.generic.edit import UpdateView
 from django.utils.translation import gettext as _
-from django.views.generic import ListView, DetailView
+from django.views.generic import ListView, DetailView, TemplateView
 from django.core.exceptions import SuspiciousOperation
 from django.contrib.auth.mixins import LoginRequiredMixin
 
+from rest_framework import viewsets
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+
 
 class TodayView(LoginRequiredMixin, UpdateView):
 
@@ -81,18 +92,20 @@ class TodayView(LoginRequiredMixin, UpdateView):
 class CalendarView(LoginRequiredMixin, ListView):
 
     model = Memo
-    calendar = Calendar(firstweekday=6)
     template_name = "site/calendar.html"
 
+    def get(self, request, *args, **kwargs):
+        # Parse the month from the query string once per request
+        self.month = self.get_month()
+        return super(CalendarView, self).get(request, *args, **kwargs)
+
     def get_queryset(self):
         """
         Filter entries by currently logged in user.
         """
         queryset = super(CalendarView, self).get_queryset()
         queryset = queryset.filter(author=self.request.user)
-
-        month = self.get_month()
-        return queryset.filter(date__month=month.month, date__year=month.year)
+        return queryset.filter(date__month=self.month.month, date__year=self.month.year)
 
     def get_month(self):
         """
@@ -108,29 +121,10 @@ class CalendarView(LoginRequiredMixin, ListView):
 
     def get_weeks(self):
         """
-        Gets the weeks and days for the current month, populating with query data.
+        Gets the weeks and days for the current month, populated with links to the
+        entries of the month (cached until a memo in the month is added or removed).
         """
-        entries = {}
-        for day in self.get_queryset().values('date'):
-            day = day['date']
-            entries[day] = reverse_lazy(
-                'entry',
-                kwargs=dict(zip(('year', 'month', 'day'), (day.year, day.month, day.day)))
-            )
-
-        month = self.get_month()
-        weeks = []
-        for week in self.calendar.monthdatescalendar(month.year, month.month):
-            week_data = []
-            for day in week:
-                if day.month == month.month:
-                    week_data.append(
-                        (day, entries.get(day, None))
-                    )
-                else:
-                    week_data.append((None, None))
-            weeks.append(week_data)
-        return weeks
+        return month_summary(self.request.user, self.month)
 
     def get_context_data(self, **kwargs):
         """
@@ -139,10 +133,53 @@ class CalendarView(LoginRequiredMixin, ListView):
         context = super(CalendarView, self).get_context_data(**kwargs)
         context['page'] = 'calendar'
         context['weeks'] = self.get_weeks()
-        context['month'] = self.get_month()
+        context['month'] = self.month
+        context['today'] = date.today()
+        context['prev_month'] = (self.month - timedelta(days=1)).replace(day=1)
+        context['next_month'] = (self.month + timedelta(days=32)).replace(day=1)
+        return context
+
+
+class YearView(LoginRequiredMixin, TemplateView):
+    """
+    A heatmap of the entries of a year, rendered from the daily summaries.
+    """
+
+    template_name = "site/year.html"
+
+    def get_context_data(self, **kwargs):
+        """
+        Adds the days of the year arranged in weeks starting on Sunday.
+        """
+        context = super(YearView, self).get_context_data(**kwargs)
+        year = self.kwargs.get("year", date.today().year)
+        if not MINYEAR <= year < MAXYEAR:
+            raise Http404(_("No calendar for this year"))
+
+        days = DailySummary.objects.year(self.request.user, year)
+
+        # Pad the first week so that every week starts on Sunday
+        weeks, week = [], [None] * ((days[0]["date"].weekday() + 1) % 7)
+        for day in days:
+            day["url"] = reverse_lazy("entry", kwargs={
+                "year": day["date"].year, "month": day["date"].month,
+                "day": day["date"].day,
+            }) if day["entry"] else None
+
+            week.append(day)
+            if len(week) == 7:
+                weeks.append(week)
+                week = []
+        if week:
+            weeks.append(week + [None] * (7 - len(week)))
+
+        context['page'] = 'calendar'
+        context['year'] = year
+        context['weeks'] = weeks
+        context['entries'] = sum(1 for day in days if day["entry"])
+        context['words'] = sum(day["words"] for day in days)
+        context['articles'] = sum(day["articles"] for day in days)
         context['today'] = date.today()
-        context['prev_month'] = (context['month'] - timedelta(days=1)).replace(day=1)
-        context['next_month'] = (context['month'] + timedelta(days=32)).replace(day=1)
         return context
 
 
@@ -153,10 +190,15 @@ class EntryView(LoginRequiredMixin, DetailView):
 
     def get_queryset(self):
         """
-        Filter entries by currently logged in user.
+        Filter entries by currently logged in user, fetching the tabs, article counts,
+        location, and articles rendered with the entry in as few queries as possible.
         """
         queryset = super(EntryView, self).get_queryset()
-        return queryset.filter(author=self.request.user)
+        return queryset.filter(author=self.request.user).select_related(
+            "tabs", "article_counts", "location",
+        ).annotate(
+            num_articles=Count("articles")
+        ).prefetch_related("articles")
 
     def get_object(self, queryset=None):
         """
@@ -182,11 +224,21 @@ class EntryView(LoginRequiredMixin, DetailView):
 
     def get_nav_entries(self, obj):
         """
-        Returns the (prev, next) entries in the database if they exist.
+        Returns the (prev, next) entries in the database if they exist, fetching both
+        with a single query.
         """
-        queryset = self.get_queryset()
-        prev = queryset.order_by('-date').filter(date__lt=obj.date).first()
-        next = queryset.order_by('date').filter(date__gt=obj.date).first()
+        queryset = Memo.objects.filter(author=self.request.user)
+        before = queryset.filter(date__lt=obj.date).order_by('-date').values('date')[:1]
+        after = queryset.filter(date__gt=obj.date).order_by('date').values('date')[:1]
+
+        prev, next = None, None
+        for entry in queryset.filter(
+            Q(date=Subquery(before)) | Q(date=Subquery(after))
+        ).only('id', 'date'):
+            if entry.date < obj.date:
+                prev = entry
+            else:
+                next = entry
         return prev, next
 
     def get_context_data(self, **kwargs):
@@ -198,4 +250,153 @@ class EntryView(LoginRequiredMixin, DetailView):
 
         obj = context['object']
         context['prev_entry'], context['next_entry'] = self.get_nav_entries(obj)
-        return context
\ No newline at end of file
+        return context
+
+
+class SearchView(LoginRequiredMixin, TemplateView):
+    """
+    Ranked full-text search of the user's memos and articles, e.g. /search/?q=paris
+    """
+
+    template_name = "site/search.html"
+
+    # Maximum number of memos and articles to show
+    limit = 50
+
+    def get_context_data(self, **kwargs):
+        context = super(SearchView, self).get_context_data(**kwargs)
+        context['page'] = 'search'
+        context['query'] = self.request.GET.get("q", "").strip()
+        context['results'] = search(self.request.user, context['query'], self.limit)
+        return context
+
+
+class ExportView(LoginRequiredMixin, View):
+    """
+    Streams the export of the user's memos as an attachment, e.g. /export/?format=csv
+    or /export/?format=jsonl&compression=gzip
+    """
+
+    def get(self, request, *args, **kwargs):
+        format = request.GET.get("format", "jsonl")
+        compression = request.GET.get("compression", None) or None
+
+        try:
+            chunks = export(request.user, format, compression)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+
+        if compression is None:
+            content_type = f"{FORMATS[format]}; charset=utf-8"
+        else:
+            content_type = "application/octet-stream"
+
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="{filename(request.user, format, compression)}"'
+        )
+        return response
+
+
+##########################################################################
+## API Views
+##########################################################################
+
+class MemoViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
+    """
+    The requesting user's memos, newest first, paginated by date. Use the fields query
+    parameter to fetch only some fields, e.g. ?fields=id,date,feeling, in which case
+    the tabs, article counts and articles are only fetched if requested.
+    """
+
+    serializer_class = MemoSerializer
+    pagination_class = DateCursorPagination
+    select_related_fields = {"tabs": "tabs", "article_counts": "article_counts"}
+    prefetch_related_fields = {
+        "articles": Prefetch(
+            "articles", queryset=Article.objects.only("id", "memo_id")
+        ),
+    }
+
+    def get_queryset(self):
+        return self.select_fields(Memo.objects.filter(author=self.request.user))
+
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user)
+
+
+class LocationViewSet(SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    The locations memos can be written at, most recently created first. Locations are
+    shared by all users and are not owned by any of them, so they are read-only.
+    """
+
+    queryset = Location.objects.all()
+    serializer_class = LocationSerializer
+
+
+class TabsViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
+    """
+    The tabs counted with the requesting user's memos, newest first, paginated by the
+    date of the memo.
+    """
+
+    serializer_class = TabsSerializer
+    pagination_class = DateCursorPagination
+
+    def get_queryset(self):
+        queryset = Tabs.objects.filter(memo__author=self.request.user)
+        return self.select_fields(queryset.annotate(date=F("memo__date")))
+
+
+class HeatmapViewSet(viewsets.ViewSet):
+    """
+    Returns every day of a year with the presence, feeling, word count, and articles
+    read of the user's entries from the daily summaries, e.g. /api/heatmap/2020/ or
+    the current year from /api/heatmap/.
+    """
+
+    def list(self, request):
+        return self.retrieve(request, date.today().year)
+
+    def retrieve(self, request, pk=None):
+        try:
+            year = int(pk)
+        except (TypeError, ValueError):
+            year = None
+
+        if year is None or not MINYEAR <= year < MAXYEAR:
+            raise ValidationError({"year": "a valid year is required"})
+
+        days = DailySummary.objects.year(request.user, year)
+        for day in days:
+            day["date"] = day["date"].isoformat()
+
+        return Response({"year": year, "days": days})
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """
+    Returns the user's memos and articles matching the full-text query ordered by rank
+    with highlighted snippets, e.g. /api/search/?q=paris&limit=10
+    """
+
+    def list(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "a search query is required"})
+
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            limit = None
+
+        if limit is None or not 0 < limit <= 100:
+            raise ValidationError({"limit": "limit must be between 1 and 100"})
+
+        results = search(request.user, query, limit)
+        for result in results["memos"] + results["articles"]:
+            result["date"] = result["date"] and result["date"].isoformat()
+            result["snippet"] = str(result["snippet"])
+
+        return Response({"query": query, **results})
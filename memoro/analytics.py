@@ -0,0 +1,333 @@
+# memoro.analytics
+# Time series analytics of the daily metrics of the diary
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 22:14:09 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: analytics.py [] benjamin@bengfort.com $
+
+"""
+Time series analytics of the daily metrics of the diary. The per-day scalars of the
+daily summaries, tabs and article counts are loaded into contiguous date indexed
+float arrays (with NaN on days without a value) with a single query per table so that
+trends can be computed with vectorized operations rather than row by row.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from datetime import date
+
+from diary.models import DailySummary, Tabs
+from reading.models import ArticleCounts
+
+
+# The metrics loaded from each table, in the order of their columns
+SUMMARY_METRICS = ("feeling", "words", "articles")
+TABS_METRICS = ("desktop_tabs", "mobile_tabs", "tablet_tabs")
+COUNTS_METRICS = ("read", "unread", "archived", "starred")
+
+# All metrics, where tabs is the total of the tab counts of the day
+METRICS = SUMMARY_METRICS + ("tabs",) + COUNTS_METRICS
+
+# Numpy weekdays of datetime64 days, where the epoch (1970-01-01) is a Thursday
+EPOCH_WEEKDAY = 3
+
+
+##########################################################################
+## Daily Metrics
+##########################################################################
+
+class DailyMetrics(object):
+    """
+    Contiguous daily time series of the metrics of a user's diary between start and end
+    (inclusive). Each metric is a float64 array with an element per day, where days
+    without a value (e.g. no entry was written) are NaN. If end is before start, the
+    range and all of the series are empty.
+    """
+
+    def __init__(self, start, end, **series):
+        self.start = start
+        self.end = end
+        self.dates = np.arange(
+            np.datetime64(start, "D"), np.datetime64(end, "D") + 1,
+            dtype="datetime64[D]",
+        )
+        self.series = {name: np.full(len(self), np.nan) for name in METRICS}
+        self.series.update(series)
+
+    @classmethod
+    def load(cls, user, start=None, end=None, max_days=None):
+        """
+        Loads the metrics of the user between start and end (inclusive) in a query per
+        table. If start or end are not specified, they are the dates of the user's
+        first and last daily summaries in the range (or today if there are none), so
+        the range is empty if only end is given and it is before the first summary, or
+        only start is given and it is after the last one. Tabs and counts are only
+        loaded for the days between start and end. If max_days is given, a ValueError
+        is raised before the series are allocated if the range has more days.
+        """
+        summaries = DailySummary.objects.filter(author=user).order_by("date")
+        if start is not None:
+            summaries = summaries.filter(date__gte=start)
+        if end is not None:
+            summaries = summaries.filter(date__lte=end)
+
+        summaries = list(summaries.values_list("date", *SUMMARY_METRICS))
+        if start is None:
+            start = summaries[0][0] if summaries else date.today()
+        if end is None:
+            end = summaries[-1][0] if summaries else date.today()
+
+        if max_days is not None and (end - start).days + 1 > max_days:
+            raise ValueError(f"the range is longer than {max_days} days")
+
+        # Tabs and counts may be recorded on days outside of the range of the summaries
+        metrics = cls(start, end)
+        tabs = Tabs.objects.filter(
+            memo__author=user, memo__date__gte=start, memo__date__lte=end
+        ).order_by()
+        counts = ArticleCounts.objects.filter(
+            memo__author=user, memo__date__gte=start, memo__date__lte=end
+        ).order_by()
+
+        metrics._fill(summaries, SUMMARY_METRICS)
+        metrics._fill(counts.values_list("memo__date", *COUNTS_METRICS), COUNTS_METRICS)
+
+        # The total of the tab counts of a day is NaN only if none were counted
+        series = metrics._fill(tabs.values_list("memo__date", *TABS_METRICS))
+        if series is not None:
+            total = np.nansum(series, axis=1)
+            total[np.isnan(series).all(axis=1)] = np.nan
+            metrics.series["tabs"] = total
+        return metrics
+
+    def _fill(self, rows, names=None):
+        """
+        Places the values of (date, *values) rows into the series with the names or
+        returns a 2D array of the values by day if names is None.
+        """
+        rows = list(rows)
+        if not rows:
+            return None
+
+        days, *columns = zip(*rows)
+        index = self.index(days)
+        values = np.full((len(self), len(columns)), np.nan)
+        values[index] = np.array(columns, dtype=np.float64).T
+
+        if names is None:
+            return values
+
+        for idx, name in enumerate(names):
+            self.series[name] = values[:, idx]
+        return values
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, name):
+        return self.series[name]
+
+    def index(self, days):
+        """
+        Returns the indices of the days (any sequence of dates) in the series.
+        """
+        days = np.array(days, dtype="datetime64[D]")
+        return (days - np.datetime64(self.start, "D")).astype(np.int64)
+
+    def reindex(self, start, end):
+        """
+        Returns the metrics between start and end, padding days outside of the current
+        range with NaN.
+        """
+        other = DailyMetrics(start, end)
+        if not len(other):
+            return other
+
+        # The overlap of the day offsets of both ranges
+        offset = int((other.dates[0] - self.dates[0]).astype(np.int64))
+        lo, hi = max(offset, 0), min(offset + len(other), len(self))
+        for name, values in self.series.items():
+            if lo < hi:
+                other.series[name][lo - offset:hi - offset] = values[lo:hi]
+        return other
+
+    @property
+    def present(self):
+        """
+        A boolean array of the days with a diary entry.
+        """
+        return ~np.isnan(self.series["feeling"])
+
+    @property
+    def weekdays(self):
+        """
+        The weekday of every day where Monday is 0 and Sunday is 6.
+        """
+        return (self.dates.astype(np.int64) + EPOCH_WEEKDAY) % 7
+
+    def describe(self, name):
+        """
+        Returns the number of days with a value of the metric and the mean, minimum and
+        maximum of those values (None if there are no values).
+        """
+        values = self.series[name]
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return {"days": 0, "mean": None, "min": None, "max": None}
+
+        return {
+            "days": len(values),
+            "mean": round(float(values.mean()), 3),
+            "min": float(values.min()),
+            "max": float(values.max()),
+        }
+
+    def rolling_mean(self, name, window=7, min_periods=1):
+        """
+        Returns the trailing mean of the metric over the window of days up to and
+        including each day, ignoring missing days. Days with fewer than min_periods
+        values in their window are NaN.
+        """
+        values = self.series[name]
+        missing = np.isnan(values)
+
+        # Windowed sums are the differences of the cumulative sums, the first days of
+        # the series have partial windows.
+        cumulative = np.cumsum(np.where(missing, 0.0, values))
+        totals = cumulative.copy()
+        totals[window:] -= cumulative[:-window]
+
+        cumulative = np.cumsum(~missing)
+        counts = cumulative.copy()
+        counts[window:] -= cumulative[:-window]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = totals / counts
+        means[counts < max(min_periods, 1)] = np.nan
+        return means
+
+    def group(self, name, keys, size, how="mean"):
+        """
+        Groups the values of the metric by the integer keys (an element per day in
+        the range 0 to size), returning the sum, mean, or count of the values in each
+        group, ignoring missing days. The mean of a group without values is NaN.
+        """
+        values = self.series[name]
+        present = ~np.isnan(values)
+        counts = np.bincount(keys[present], minlength=size).astype(np.float64)
+        if how == "count":
+            return counts
+
+        sums = np.bincount(keys[present], weights=values[present], minlength=size)
+        if how == "sum":
+            return sums
+        if how != "mean":
+            raise ValueError(f"unknown aggregation '{how}'")
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / counts
+
+    def by_weekday(self, name, how="mean"):
+        """
+        Groups the metric by weekday, returning an array from Monday to Sunday.
+        """
+        return self.group(name, self.weekdays, 7, how)
+
+    def by_week(self, name, how="mean"):
+        """
+        Groups the metric by the weeks starting on Sunday, returning the first day of
+        each week and the grouped values.
+        """
+        if not len(self):
+            return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.float64)
+
+        first = self.dates[0] - (self.weekdays[0] + 1) % 7
+        keys = (self.dates - first).astype(np.int64) // 7
+        weeks = first + 7 * np.arange(keys[-1] + 1)
+        return weeks, self.group(name, keys, len(weeks), how)
+
+    def by_month(self, name, how="mean"):
+        """
+        Groups the metric by month, returning the months and the grouped values.
+        """
+        if not len(self):
+            return np.array([], dtype="datetime64[M]"), np.array([], dtype=np.float64)
+
+        months = self.dates.astype("datetime64[M]")
+        keys = (months - months[0]).astype(np.int64)
+        return (
+            np.arange(months[0], months[-1] + 1, dtype="datetime64[M]"),
+            self.group(name, keys, keys[-1] + 1, how),
+        )
+
+    def correlation(self, x, y, lag=0):
+        """
+        Returns the Pearson correlation of the metrics on the days both have values, or
+        None if there are fewer than three such days or either metric is constant. If
+        lag is positive, x is correlated with y lag days later.
+        """
+        x, y = self.series[x], self.series[y]
+        if lag > 0:
+            x, y = x[:-lag], y[lag:]
+
+        both = ~(np.isnan(x) | np.isnan(y))
+        if both.sum() < 3:
+            return None
+
+        x, y = x[both], y[both]
+        if x.std() == 0 or y.std() == 0:
+            return None
+        return float(np.corrcoef(x, y)[0, 1])
+
+    def gaps(self, name="feeling", min_days=1):
+        """
+        Returns the (first day, number of days) of the runs of at least min_days days
+        missing a value of the metric (by default days without an entry), longest first.
+        """
+        missing = np.isnan(self.series[name]).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], missing, [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+        lengths = ends - starts
+        order = np.argsort(-lengths, kind="stable")
+        return [
+            (self.dates[starts[idx]].item(), int(lengths[idx]))
+            for idx in order if lengths[idx] >= min_days
+        ]
+
+
+##########################################################################
+## Serialization
+##########################################################################
+
+def tolist(values, digits=3):
+    """
+    Converts an array to a JSON serializable list, rounding floats and replacing NaN
+    with None and datetime64 values with ISO formatted dates.
+    """
+    if np.issubdtype(values.dtype, np.datetime64):
+        return [str(value) for value in values.astype("datetime64[D]")]
+
+    if np.issubdtype(values.dtype, np.integer):
+        return [int(value) for value in values]
+
+    return [
+        None if np.isnan(value) else round(float(value), digits)
+        for value in values.astype(np.float64)
+    ]
+
+
+def records(**series):
+    """
+    Zips the named arrays into a list of JSON serializable dicts, one per element.
+    """
+    columns = {name: tolist(values) for name, values in series.items()}
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
@@ -0,0 +1,130 @@
+# memoro.api
+# Pagination and serialization helpers shared by the memoro API views
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 23:05:48 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: api.py [] benjamin@bengfort.com $
+
+"""
+Pagination and serialization helpers shared by the memoro API views.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from rest_framework import pagination, serializers
+from rest_framework.exceptions import ValidationError
+
+
+##########################################################################
+## Pagination
+##########################################################################
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination of the newest records first. Pages are fetched by filtering on
+    the ordering field of the last record of the previous page rather than with an
+    OFFSET, so every page costs the same no matter how deep into the history it is.
+    The ordering field should be indexed and (nearly) unique.
+    """
+
+    ordering = "-created"
+    page_size_query_param = "per_page"
+    max_page_size = 200
+
+
+class DateCursorPagination(CursorPagination):
+
+    ordering = "-date"
+
+
+class ProgressCursorPagination(CursorPagination):
+
+    ordering = "-progress_timestamp"
+
+
+##########################################################################
+## Sparse Fieldsets
+##########################################################################
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A model serializer that takes an additional fields argument that limits the fields
+    that are serialized to the specified field names.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super(DynamicFieldsModelSerializer, self).__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsetsMixin(object):
+    """
+    Viewset mixin that allows clients to request a subset of the fields of the
+    serializer with a comma separated fields query parameter (on read requests only),
+    e.g. ?fields=id,date. The related objects of a field are only selected or
+    prefetched with the queryset if the field is requested, as specified by the
+    select_related_fields and prefetch_related_fields mappings of field names to
+    lookups (or Prefetch objects).
+    """
+
+    fields_query_param = "fields"
+    select_related_fields = {}
+    prefetch_related_fields = {}
+
+    def get_fields(self):
+        """
+        Returns the set of requested field names or None if all fields are requested.
+        """
+        if self.request.method not in ("GET", "HEAD", "OPTIONS"):
+            return None
+
+        fields = self.request.query_params.get(self.fields_query_param, None)
+        if not fields:
+            return None
+
+        fields = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = fields - set(self.get_serializer_class()().fields)
+        if unknown:
+            raise ValidationError({
+                self.fields_query_param: f"unknown fields: {', '.join(sorted(unknown))}"
+            })
+        return fields
+
+    def get_queryset(self):
+        queryset = super(SparseFieldsetsMixin, self).get_queryset()
+        return self.select_fields(queryset)
+
+    def select_fields(self, queryset):
+        """
+        Selects and prefetches the related objects of the requested fields.
+        """
+        fields = self.get_fields()
+
+        related = [
+            lookup for field, lookup in self.select_related_fields.items()
+            if fields is None or field in fields
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+
+        related = [
+            lookup for field, lookup in self.prefetch_related_fields.items()
+            if fields is None or field in fields
+        ]
+        if related:
+            queryset = queryset.prefetch_related(*related)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_fields())
+        return super(SparseFieldsetsMixin, self).get_serializer(*args, **kwargs)
@@ -88,6 +88,25 @@ DATABASES = {
 # Make sure we're using psycopg2
 DATABASES['default']['ENGINE'] = 'django.db.backends.postgresql_psycopg2'
 
+# The cache is a Redis server shared by the web and worker processes so that
+# invalidations (e.g. of the calendar month when a memo is saved) are seen by all of
+# them. Without REDIS_URL nothing is cached: a per-process cache would serve stale
+# months and a database cache would cost as many queries as it saves.
+REDIS_URL = environ_setting("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+
 
 ##########################################################################
 ## Secrets
@@ -103,6 +122,23 @@ GOOGLE_JS_API_KEY = environ_setting("GOOGLE_JS_API_KEY")
 INSTAPAPER_CONSUMER_ID=environ_setting("INSTAPAPER_CONSUMER_ID")
 INSTAPAPER_CONSUMER_SECRET=environ_setting("INSTAPAPER_CONSUMER_SECRET")
 
+# Instapaper API endpoint, e.g. to use a local fake Instapaper server for benchmarks
+INSTAPAPER_ENDPOINT = environ_setting(
+    "INSTAPAPER_ENDPOINT", "https://www.instapaper.com/api/1/"
+)
+
+# Instapaper API client keep-alive session pool size and request timeout (seconds)
+INSTAPAPER_POOL_SIZE = int(environ_setting("INSTAPAPER_POOL_SIZE", 4))
+INSTAPAPER_TIMEOUT = float(environ_setting("INSTAPAPER_TIMEOUT", 30))
+
+# Maximum average Instapaper API requests per second (0 disables request pacing)
+INSTAPAPER_RATE_LIMIT = float(environ_setting("INSTAPAPER_RATE_LIMIT", 0))
+
+# Minutes without a heartbeat after which a running sync job is requeued by a worker
+INSTAPAPER_SYNC_STALE_MINUTES = int(
+    environ_setting("INSTAPAPER_SYNC_STALE_MINUTES", 15)
+)
+
 
 ##########################################################################
 ## Runtime
@@ -263,11 +299,9 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
 
-    ## Pagination in the API
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGINATE_BY': 50,
-    'PAGINATE_BY_PARAM': 'per_page',
-    'MAX_PAGINATE_BY': 200,
+    ## Pagination in the API (keyset pagination, see memoro.api)
+    'DEFAULT_PAGINATION_CLASS': 'memoro.api.CursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 
@@ -38,6 +38,14 @@ ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
 # Specify the name of the test database
 DATABASES['default']['TEST'] = {'NAME': 'memoro_test'}
 
+# Nothing is cached so that query budgets include the queries of cache misses (tests of
+# the cache use a local memory cache in place of the Redis server)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
+
 # Content without side effects
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 MEDIA_ROOT = TESTDIR / "media"
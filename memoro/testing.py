@@ -0,0 +1,166 @@
+# memoro.testing
+# Helpers for testing the performance of memoro views
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 18:44:51 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: testing.py [] benjamin@bengfort.com $
+
+"""
+Helpers for testing the performance of memoro views
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import time
+import random
+
+from datetime import date, datetime, timedelta
+from contextlib import contextmanager
+
+from django.db import connection
+from django.utils import timezone
+from django.contrib.auth.models import User
+from django.test.utils import CaptureQueriesContext
+
+from diary.models import Memo, Location, Tabs, DailySummary
+from reading.models import Article, ArticleCounts, InstapaperAccount
+
+
+# Render time budgets are multiplied by this factor, e.g. to allow for slow CI runners
+TIME_SCALE = float(os.environ.get("MEMORO_TIME_SCALE", 1.0))
+
+
+##########################################################################
+## Performance Budgets
+##########################################################################
+
+class PerformanceTestMixin(object):
+    """
+    Mixin for django TestCases that asserts upper bounds on the number of SQL queries
+    and the time taken to render views, so that N+1 queries and other regressions on
+    hot pages fail the tests rather than slipping in unnoticed.
+    """
+
+    @contextmanager
+    def assertBudget(self, queries=None, seconds=None):
+        """
+        Asserts that the block executes at most queries SQL queries and takes at most
+        seconds (scaled by MEMORO_TIME_SCALE) to run.
+        """
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            yield context
+            elapsed = time.perf_counter() - started
+
+        if queries is not None and len(context) > queries:
+            executed = "\n".join(
+                f"{idx}. {query['sql']}"
+                for idx, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f"{len(context)} queries executed, budget is {queries}:\n{executed}"
+            )
+
+        if seconds is not None and elapsed > seconds * TIME_SCALE:
+            self.fail(
+                f"took {elapsed:0.3f} seconds, budget is {seconds * TIME_SCALE:0.3f}"
+            )
+
+    def assertRenderBudget(self, url, queries=None, seconds=None, status_code=200):
+        """
+        Requests the url with the test client and asserts that the response is
+        rendered within the query and time budget. A request is made before the
+        measured request so that template loading is not included in the time.
+        """
+        self.client.get(url)
+        with self.assertBudget(queries=queries, seconds=seconds):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status_code)
+        return response
+
+    def assertPaginationBudget(self, url, queries=None, seconds=None):
+        """
+        Follows the next links of the paginated API endpoint from the url, asserting
+        that every page is fetched within the query and time budget so that the cost of
+        a page does not grow with its depth. Returns the results of all the pages.
+        """
+        results = []
+        while url:
+            with self.assertBudget(queries=queries, seconds=seconds):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+            results.extend(response.json()["results"])
+            url = response.json()["next"]
+        return results
+
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+def create_dataset(username="tester", days=90, articles=4, seed=42):
+    """
+    Creates a user with an Instapaper account and a diary of memos for the previous
+    number of days (including today), each with a location, tabs, article counts and
+    articles read that day. Returns the user.
+    """
+    rand = random.Random(seed)
+    user = User.objects.create_user(username, f"{username}@example.com", "supersecret")
+    account = InstapaperAccount.objects.create(user=user, username=user.email)
+
+    locations = [
+        Location.objects.create(
+            name=name, latitude=rand.uniform(-90, 90),
+            longitude=rand.uniform(-180, 180), quick_select=True,
+        )
+        for name in ("Home", "Work", "Cafe")
+    ]
+
+    today = date.today()
+    memos = Memo.objects.bulk_create([
+        Memo(
+            date=today - timedelta(days=offset), author=user,
+            memo=f"Memo {offset}", location=rand.choice(locations),
+            entry="# Heading\n\nSome *markdown* with a [link](https://example.com).\n",
+            feeling=rand.randint(-2, 2),
+        )
+        for offset in range(days)
+    ])
+
+    # Postgres returns the primary keys on bulk create but SQLite does not
+    memos = list(Memo.objects.filter(author=user).order_by("date"))
+    Tabs.objects.bulk_create([
+        Tabs(memo=memo, desktop_windows=2, desktop_tabs=rand.randint(0, 40))
+        for memo in memos
+    ])
+    ArticleCounts.objects.bulk_create([
+        ArticleCounts(memo=memo, read=articles, unread=10, archived=100, starred=5)
+        for memo in memos
+    ])
+
+    bookmark_id = 1000
+    records = []
+    for memo in memos:
+        read = timezone.make_aware(datetime.combine(memo.date, datetime.min.time()))
+        for _ in range(articles):
+            bookmark_id += 1
+            records.append(Article(
+                bookmark_id=bookmark_id, account=account, memo=memo,
+                url=f"https://example.com/{username}/{bookmark_id}",
+                title=f"Article {bookmark_id}", folder="archive", progress=1.0,
+                progress_timestamp=read + timedelta(hours=rand.randint(8, 20)),
+                time=read - timedelta(days=rand.randint(0, 30)),
+            ))
+    Article.objects.bulk_create(records)
+
+    # Bulk creation does not send the signals that refresh the rollups
+    DailySummary.objects.refresh(Memo.objects.filter(author=user))
+    return user
@@ -35,9 +35,12 @@ from django.contrib import admin
 from rest_framework import routers
 from django.urls import path, include
 
-from reading.views import InstapaperManager
-from memoro.views import HeartbeatViewSet, Overview
-from diary.views import TodayView, CalendarView, EntryView
+from reading.views import InstapaperManager, SyncJobStatus, ArticleViewSet
+from memoro.views import HeartbeatViewSet, AnalyticsViewSet, Overview
+from diary.views import TodayView, CalendarView, YearView, EntryView, SearchView
+from diary.views import ExportView
+from diary.views import MemoViewSet, LocationViewSet, TabsViewSet
+from diary.views import HeatmapViewSet, SearchViewSet
 
 
 ##########################################################################
@@ -47,6 +50,13 @@ from diary.views import TodayView, CalendarView, EntryView
 # Top level router
 router = routers.DefaultRouter()
 router.register(r'status', HeartbeatViewSet, "status")
+router.register(r'memos', MemoViewSet, "memo")
+router.register(r'articles', ArticleViewSet, "article")
+router.register(r'locations', LocationViewSet, "location")
+router.register(r'tabs', TabsViewSet, "tabs")
+router.register(r'heatmap', HeatmapViewSet, "heatmap")
+router.register(r'search', SearchViewSet, "search")
+router.register(r'analytics', AnalyticsViewSet, "analytics")
 
 
 ##########################################################################
@@ -59,8 +69,12 @@ urlpatterns = [
     path("", TodayView.as_view(), name="today"),
     path("<int:year>-<int:month>-<int:day>/", EntryView.as_view(), name="entry"),
     path("calendar/", CalendarView.as_view(), name="calendar"),
+    path("calendar/<int:year>/", YearView.as_view(), name="year"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("export/", ExportView.as_view(), name="export"),
     path("overview/", Overview.as_view(), name="overview"),
     path("instapaper/", InstapaperManager.as_view(), name="instapaper"),
+    path("instapaper/jobs/<int:pk>/", SyncJobStatus.as_view(), name="sync-job"),
     path('api/', include((router.urls, 'rest_framework'), namespace="api")),
 ]
 
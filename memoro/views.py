@@ -18,8 +18,10 @@ necessarily associated with a specific app such as the home page or status endpo
 ## Imports
 ##########################################################################
 
-from datetime import datetime
+from datetime import date, datetime
+from diary.models import OverviewSnapshot
 from memoro.version import get_version, get_revision
+from memoro.analytics import DailyMetrics, METRICS, tolist, records
 
 from django.shortcuts import render
 from django.views.generic import TemplateView
@@ -28,6 +30,14 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError, NotFound
+
+
+# Weekday names in the order of the analytics weekday groups
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# The longest range of days the analytics are computed for (about ten years)
+MAX_DAYS = 3660
 
 
 ##########################################################################
@@ -35,15 +45,71 @@ from rest_framework.permissions import AllowAny
 ##########################################################################
 
 class Overview(LoginRequiredMixin, TemplateView):
+    """
+    Long-range trends of the user's diary rendered from their overview snapshot, which
+    is refreshed nightly by the rollup command rather than computed per request.
+    """
 
     template_name = "site/overview.html"
 
+    def get_snapshot(self):
+        """
+        Returns the user's overview snapshot, computing it on the first visit.
+        """
+        try:
+            return OverviewSnapshot.objects.get(author=self.request.user)
+        except OverviewSnapshot.DoesNotExist:
+            return OverviewSnapshot.objects.refresh(self.request.user)
+
     def get_context_data(self, **kwargs):
         context = super(Overview, self).get_context_data(**kwargs)
         context['page'] = 'overview'
+
+        snapshot = self.get_snapshot()
+        weeks, months = snapshot.data["weeks"], snapshot.data["months"]
+        context['snapshot'] = snapshot
+        context['totals'] = snapshot.data["totals"]
+        context['charts'] = [
+            ("Words written per week", bars(weeks, "week", "words")),
+            (
+                f"Feeling ({snapshot.data['rolling']} day rolling average)",
+                bars(weeks, "week", "feeling", low=-2, high=2),
+            ),
+            ("Average tabs open per week", bars(weeks, "week", "tabs")),
+            ("Articles read per month", bars(months, "month", "read")),
+        ]
+
+        weekdays = snapshot.data.get("weekdays", {}).get("feeling", [])
+        context['weekdays'] = bars(
+            [
+                {"weekday": weekday, "feeling": feeling}
+                for weekday, feeling in zip(WEEKDAYS, weekdays)
+            ],
+            "weekday", "feeling", low=-2, high=2,
+        )
+        context['correlations'] = snapshot.data.get("correlations", {})
+        context['gaps'] = snapshot.data.get("gaps", [])
         return context
 
 
+def bars(rows, label, key, low=0, high=None):
+    """
+    Returns the values of key in rows as (label, value, height) bars of a chart, where
+    height is the percent of the value between low and high (the max value by default).
+    """
+    values = [row[key] for row in rows if row[key] is not None]
+    high = high if high is not None else max(values, default=0)
+    span = (high - low) or 1
+
+    return [
+        (
+            row[label], row[key],
+            0 if row[key] is None else round(100 * (row[key] - low) / span, 1),
+        )
+        for row in rows
+    ]
+
+
 ##########################################################################
 ## API Views
 ##########################################################################
@@ -64,6 +130,93 @@ class HeartbeatViewSet(viewsets.ViewSet):
         })
 
 
+class AnalyticsViewSet(viewsets.ViewSet):
+    """
+    Analytics of the daily metrics of the user's diary between the optional start and
+    end query parameters (ISO dates, by default the first and last entry). The list
+    summarizes every metric by weekday along with correlations and gaps, e.g.
+    /api/analytics/?start=2020-01-01, and the detail returns the daily, rolling
+    (window days, 7 by default), weekly and monthly series of a metric, e.g.
+    /api/analytics/feeling/?window=30. A start after the end or a range longer than
+    MAX_DAYS is invalid, and a range without entries (e.g. only an end before the
+    first entry) has empty series.
+    """
+
+    def get_metrics(self, request):
+        params = {}
+        for param in ("start", "end"):
+            try:
+                value = request.query_params.get(param, None)
+                params[param] = date.fromisoformat(value) if value else None
+            except ValueError:
+                raise ValidationError({param: "must be an ISO formatted date"})
+
+        if params["start"] and params["end"] and params["start"] > params["end"]:
+            raise ValidationError({"end": "must not be before start"})
+
+        # The range is checked after missing dates are set from the entries
+        try:
+            return DailyMetrics.load(request.user, max_days=MAX_DAYS, **params)
+        except ValueError:
+            raise ValidationError({"end": f"must be within {MAX_DAYS} days of start"})
+
+    def list(self, request):
+        metrics = self.get_metrics(request)
+        present = metrics.present
+
+        return Response({
+            "start": metrics.start.isoformat(),
+            "end": metrics.end.isoformat(),
+            "entries": int(present.sum()),
+            "metrics": {
+                name: dict(
+                    metrics.describe(name), weekdays=tolist(metrics.by_weekday(name))
+                )
+                for name in METRICS
+            },
+            "correlations": {
+                f"{x}_{y}": metrics.correlation(x, y)
+                for x, y in (
+                    ("articles", "feeling"), ("read", "feeling"),
+                    ("tabs", "feeling"), ("words", "feeling"),
+                )
+            },
+            "gaps": [
+                {"start": start.isoformat(), "days": days}
+                for start, days in metrics.gaps()
+            ],
+        })
+
+    def retrieve(self, request, pk=None):
+        if pk not in METRICS:
+            raise NotFound(f"unknown metric, choose one of {', '.join(METRICS)}")
+
+        try:
+            window = int(request.query_params.get("window", 7))
+        except ValueError:
+            window = 0
+
+        if window < 1:
+            raise ValidationError({"window": "must be a positive number of days"})
+
+        metrics = self.get_metrics(request)
+        weeks, weekly = metrics.by_week(pk)
+        months, monthly = metrics.by_month(pk, "sum" if pk != "feeling" else "mean")
+
+        return Response({
+            "metric": pk,
+            "start": metrics.start.isoformat(),
+            "end": metrics.end.isoformat(),
+            "window": window,
+            "days": records(
+                date=metrics.dates, value=metrics[pk],
+                rolling=metrics.rolling_mean(pk, window),
+            ),
+            "weeks": records(week=weeks, mean=weekly),
+            "months": records(month=months, value=monthly),
+        })
+
+
 ##########################################################################
 ## Error Views
 ##########################################################################
@@ -18,8 +18,9 @@ Admin site model registration
 ##########################################################################
 
 from django.contrib import admin
-from reading.models import Article, InstapaperAccount
+from reading.models import Article, InstapaperAccount, SyncJob
 
 # Register your models here.
 admin.site.register(Article)
-admin.site.register(InstapaperAccount)
\ No newline at end of file
+admin.site.register(InstapaperAccount)
+admin.site.register(SyncJob)
\ No newline at end of file
@@ -0,0 +1,326 @@
+# reading.benchmark
+# Benchmarks the Instapaper synchronization pipeline with synthetic libraries
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 17:35:12 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: benchmark.py [] benjamin@bengfort.com $
+
+"""
+Benchmarks the Instapaper synchronization pipeline with synthetic libraries
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import io
+import sys
+import time
+import django
+import tracemalloc
+
+from datetime import date, timedelta
+from contextlib import redirect_stdout
+
+from diary.models import Memo
+from memoro.version import get_version
+from reading.fakeinstapaper import FakeInstapaper, Library
+from reading.models import Article, ArticleCounts, InstapaperAccount
+
+from django.conf import settings
+from django.utils import timezone
+from django.test import override_settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+
+
+# The stages of the benchmark in the order they are run for each library size
+STAGES = (
+    "sync", "resync", "churn_sync", "from_bookmarks_create", "from_bookmarks_update",
+    "delete_bookmarks", "associate", "daily_counts",
+)
+
+# A stage regressed if it made more queries or took this much longer than the baseline,
+# where wall time differences of less than MIN_WALL_DELTA seconds are ignored as noise
+THRESHOLD = 1.25
+MIN_WALL_DELTA = 0.01
+
+
+##########################################################################
+## Measurements
+##########################################################################
+
+class Measurement(object):
+    """
+    Context manager that measures the wall time, number of SQL queries and (optionally)
+    the peak memory allocated by Python while the block executes. Queries are counted
+    with a database execute wrapper so that the count is not capped by the debug query
+    log. Note that tracing memory slows down execution, and that the peak includes any
+    allocations made by other threads such as the fake Instapaper server.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.wall = 0.0
+        self.queries = 0
+        self.peak_memory = None
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self.count_query)
+        self._wrapper.__enter__()
+
+        if self.memory:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, etype, value, traceback):
+        self.wall = time.perf_counter() - self._started
+        if self.memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self._wrapper.__exit__(etype, value, traceback)
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def to_json(self):
+        return {
+            "wall": round(self.wall, 6),
+            "queries": self.queries,
+            "peak_memory": self.peak_memory,
+        }
+
+
+##########################################################################
+## Benchmark
+##########################################################################
+
+class SyncBenchmark(object):
+    """
+    Runs the synchronization pipeline against synthetic libraries of each size served
+    by a local fake Instapaper server, measuring every stage in STAGES:
+
+    - sync: the instapaper command synchronizing a new account with the library
+    - resync: the instapaper command synchronizing again with nothing changed
+    - churn_sync: the instapaper command after churn of the library has been modified
+    - from_bookmarks_create: writing a bookmarks payload of size to a new account
+    - from_bookmarks_update: writing the same payload with every bookmark changed
+    - delete_bookmarks: soft deleting 10% of the payload bookmarks
+    - associate: associating all articles of the account with memos
+    - daily_counts: computing the article counts of today's memo
+
+    Each size is run in a transaction that is rolled back, so the benchmark can be run
+    against a database with existing data (existing memos in the date range of the
+    library are temporarily given to the benchmark user so that articles are
+    associated with them).
+    """
+
+    def __init__(
+        self, sizes=(100, 1000, 10000), churn=0.05, parallel=False, latency=0.0,
+        memory=True, seed=42, stdout=None,
+    ):
+        self.sizes = sizes
+        self.churn = churn
+        self.parallel = parallel
+        self.latency = latency
+        self.memory = memory
+        self.seed = seed
+        self.stdout = stdout or sys.stdout
+
+    def run(self):
+        """
+        Runs the benchmark for all sizes and returns the results as a JSON dict.
+        """
+        results = {
+            "version": get_version(),
+            "timestamp": timezone.now().isoformat(),
+            "python": sys.version.split()[0],
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "options": {
+                "churn": self.churn,
+                "parallel": self.parallel,
+                "latency": self.latency,
+                "memory": self.memory,
+                "seed": self.seed,
+            },
+            "results": [],
+        }
+
+        for size in self.sizes:
+            stages = self.run_size(size)
+            results["results"].append({"size": size, "stages": stages})
+        return results
+
+    def run_size(self, size):
+        """
+        Runs all stages for a library of size bookmarks, returning their measurements.
+        """
+        stages = {}
+        library = Library.generate(size, seed=self.seed)
+        payload = [
+            {key: value for key, value in bookmark.items() if key != "type"}
+            for _, bookmark in
+            Library.generate(size, seed=self.seed + 1).bookmarks.values()
+        ]
+
+        with transaction.atomic():
+            user, account = self.setup(f"benchmark-{size}", library)
+            payload_user, payload_account = self.setup(f"benchmark-{size}-payload")
+
+            server = FakeInstapaper(library, latency=self.latency, seed=self.seed)
+            with server, override_settings(
+                INSTAPAPER_ENDPOINT=server.endpoint,
+                INSTAPAPER_CONSUMER_ID=settings.INSTAPAPER_CONSUMER_ID or "benchmark",
+                INSTAPAPER_CONSUMER_SECRET=(
+                    settings.INSTAPAPER_CONSUMER_SECRET or "benchmark"
+                ),
+            ):
+                for stage in ("sync", "resync", "churn_sync"):
+                    if stage == "churn_sync":
+                        library.churn(self.churn, seed=self.seed)
+                    stages[stage] = self.measure(
+                        size, stage, self.synchronize, user, library
+                    )
+
+            records = [dict(record) for record in payload]
+            stages["from_bookmarks_create"] = self.measure(
+                size, "from_bookmarks_create", Article.instapaper.from_bookmarks,
+                payload_account, records, "archive",
+            )
+
+            records = [dict(record, hash=f"{record['hash']}x") for record in payload]
+            stages["from_bookmarks_update"] = self.measure(
+                size, "from_bookmarks_update", Article.instapaper.from_bookmarks,
+                payload_account, records, "archive",
+            )
+
+            deleted_ids = ",".join(
+                str(record["bookmark_id"]) for record in payload[::10]
+            )
+            stages["delete_bookmarks"] = self.measure(
+                size, "delete_bookmarks", Article.instapaper.delete_bookmarks,
+                deleted_ids, account=payload_account,
+            )
+
+            stages["associate"] = self.measure(
+                size, "associate", Article.instapaper.associate, account
+            )
+            stages["daily_counts"] = self.measure(
+                size, "daily_counts", ArticleCounts.objects.daily_counts, account
+            )
+
+            transaction.set_rollback(True)
+        return stages
+
+    def setup(self, username, library=None):
+        """
+        Creates a user and Instapaper account and the memos of the days the bookmarks
+        of the library were saved (and today) so that articles can be associated.
+        """
+        user = User.objects.create(username=username)
+        account = InstapaperAccount.objects.create(
+            user=user, username=library.user["username"] if library else username
+        )
+
+        if library is not None:
+            days = {date.today()} | {
+                date.fromtimestamp(bookmark["time"]) + timedelta(days=offset)
+                for _, bookmark in library.bookmarks.values()
+                for offset in (0, 1)
+            }
+            Memo.objects.filter(date__in=days).update(author=user)
+            existing = set(
+                Memo.objects.filter(date__in=days).values_list("date", flat=True)
+            )
+            Memo.objects.bulk_create(
+                [Memo(date=day, author=user) for day in days - existing],
+                batch_size=500,
+            )
+        return user, account
+
+    def synchronize(self, user, library):
+        """
+        Runs the instapaper management command for the user and library.
+        """
+        with redirect_stdout(io.StringIO()):
+            call_command(
+                "instapaper", user=user.username, username=library.user["username"],
+                password="benchmark", parallel=self.parallel,
+                stdout=io.StringIO(), stderr=io.StringIO(),
+            )
+
+    def measure(self, size, stage, func, *args, **kwargs):
+        with Measurement(memory=self.memory) as measurement:
+            func(*args, **kwargs)
+
+        self.stdout.write(format_measurement(size, stage, measurement.to_json()) + "\n")
+        return measurement.to_json()
+
+
+##########################################################################
+## Reporting
+##########################################################################
+
+def format_measurement(size, stage, measurement, baseline=None, threshold=THRESHOLD):
+    """
+    Formats a single measurement as a line of the report, comparing the wall time and
+    queries to the baseline measurement if given and flagging regressions.
+    """
+    line = (
+        f"{size:>8} {stage:<22} {measurement['wall']:>10.3f}s "
+        f"{measurement['queries']:>8} queries"
+    )
+
+    if measurement.get("peak_memory") is not None:
+        line += f" {measurement['peak_memory'] / 1048576:>9.1f}MiB"
+
+    if baseline:
+        wall = measurement["wall"] / baseline["wall"] if baseline["wall"] else 0.0
+        queries = measurement["queries"] - baseline["queries"]
+        line += f"   {wall:>5.2f}x time {queries:+d} queries"
+        if is_regression(measurement, baseline, threshold):
+            line += "   REGRESSION"
+    return line
+
+
+def is_regression(measurement, baseline, threshold=THRESHOLD):
+    """
+    Returns True if the measurement made more queries than the baseline or its wall
+    time was more than threshold times (and MIN_WALL_DELTA seconds) longer.
+    """
+    if measurement["queries"] > baseline["queries"]:
+        return True
+
+    delta = measurement["wall"] - baseline["wall"]
+    return delta > MIN_WALL_DELTA and measurement["wall"] > baseline["wall"] * threshold
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Yields (line, regressed) report lines comparing the results to a baseline results
+    JSON dict for each size and stage that were measured in both.
+    """
+    previous = {
+        (result["size"], stage): measurement
+        for result in baseline["results"]
+        for stage, measurement in result["stages"].items()
+    }
+
+    for result in results["results"]:
+        for stage, measurement in result["stages"].items():
+            other = previous.get((result["size"], stage), None)
+            if other is not None:
+                yield (
+                    format_measurement(
+                        result["size"], stage, measurement, other, threshold
+                    ),
+                    is_regression(measurement, other, threshold),
+                )
@@ -0,0 +1,675 @@
+# reading.fakeinstapaper
+# A local stand-in for the Instapaper API for benchmarks and tests
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 16:21:37 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: fakeinstapaper.py [] benjamin@bengfort.com $
+
+"""
+A local stand-in for the Instapaper API for benchmarks and tests. The server implements
+the xAuth access token flow and the account, bookmarks, folders, and highlights
+endpoints used by the client against an in-memory synthetic library, with configurable
+latency and error injection. Point the client at it with the endpoint argument or the
+INSTAPAPER_ENDPOINT setting, e.g.::
+
+    with FakeInstapaper(Library.generate(10000)) as server:
+        client = Instapaper(endpoint=server.endpoint)
+        client.authenticate("reader@example.com", "secret")
+
+OAuth signatures are not verified, only that an access token was issued by the server.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import time
+import random
+import hashlib
+import threading
+
+from collections import Counter
+from urllib.parse import parse_qsl, unquote, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Instapaper API error codes returned by the fake server
+RATE_LIMITED = 1040
+INVALID_BOOKMARK = 1241
+INVALID_FOLDER = 1242
+SERVICE_ERROR = 1500
+
+ERROR_MESSAGES = {
+    RATE_LIMITED: "Rate-limit exceeded",
+    INVALID_BOOKMARK: "Invalid or missing bookmark_id",
+    INVALID_FOLDER: "Invalid or missing folder_id",
+    SERVICE_ERROR: "Unexpected service error",
+}
+
+BUILTIN_FOLDERS = ("unread", "archive", "starred")
+
+WORDS = (
+    "memory", "reading", "journal", "archive", "paper", "notes", "daily", "review",
+    "python", "django", "systems", "distributed", "consensus", "latency", "writing",
+    "history", "science", "design", "data", "network", "garden", "coffee", "travel",
+    "music", "health", "economics", "policy", "research", "learning", "craft",
+)
+
+
+##########################################################################
+## Synthetic Library
+##########################################################################
+
+class Library(object):
+    """
+    An in-memory Instapaper account: the user, their bookmarks and user folders. The
+    bookmarks are stored by bookmark_id and the folder of each bookmark is one of the
+    built-in unread or archive folders or a user folder_id. Text and highlights are
+    generated deterministically from the bookmark_id when requested so that large
+    libraries are cheap to create. All methods are thread-safe.
+    """
+
+    def __init__(
+        self, username="reader@example.com", password=None, user_id=1, seed=42
+    ):
+        self.user = {
+            "type": "user",
+            "user_id": user_id,
+            "username": username,
+            "subscription_is_active": "1",
+        }
+        self.password = password
+        self.seed = seed
+        self.bookmarks = {}
+        self.folders = {}
+        self.tokens = {}
+        self.lock = threading.RLock()
+        self._next_id = 1000
+
+    @classmethod
+    def generate(cls, size=100, folders=2, seed=42, days=365, **kwargs):
+        """
+        Creates a library of size bookmarks saved over the previous number of days,
+        roughly 20% unread, 70% archived and 10% spread across the user folders, with
+        a random reading progress and about 5% of bookmarks starred.
+        """
+        library = cls(seed=seed, **kwargs)
+        rand = random.Random(seed)
+        now = int(time.time())
+
+        for idx in range(folders):
+            library.add_folder(f"Folder {idx+1}")
+        user_folders = list(library.folders)
+
+        for _ in range(size):
+            choice = rand.random()
+            if choice < 0.2 or (choice >= 0.9 and not user_folders):
+                folder = "unread"
+            elif choice < 0.9:
+                folder = "archive"
+            else:
+                folder = rand.choice(user_folders)
+
+            saved = now - rand.randint(0, days * 86400)
+            progress = round(rand.random(), 4) if folder != "unread" else 0.0
+            library.add_bookmark(
+                title=" ".join(rand.choice(WORDS) for _ in range(rand.randint(2, 8))),
+                description=" ".join(rand.choice(WORDS) for _ in range(12)),
+                folder=folder,
+                time=saved,
+                progress=progress,
+                progress_timestamp=saved + rand.randint(0, 86400) if progress else 0,
+                starred=rand.random() < 0.05,
+            )
+
+        return library
+
+    def add_bookmark(
+        self, url=None, title="", description="", folder="unread", time=None,
+        progress=0.0, progress_timestamp=0, starred=False, private_source="",
+    ):
+        """
+        Adds a bookmark to the library and returns its record.
+        """
+        with self.lock:
+            self._next_id += 1
+            bookmark = {
+                "type": "bookmark",
+                "bookmark_id": self._next_id,
+                "url": url or f"https://example.com/{self.seed}/{self._next_id}",
+                "title": title,
+                "description": description,
+                "hash": "",
+                "progress": progress,
+                "progress_timestamp": progress_timestamp,
+                "private_source": private_source,
+                "time": int(time or _now()),
+                "starred": "1" if starred else "0",
+            }
+            self.bookmarks[bookmark["bookmark_id"]] = (folder, _rehash(bookmark))
+            return bookmark
+
+    def add_folder(self, title):
+        """
+        Adds a user folder to the library and returns its record.
+        """
+        with self.lock:
+            self._next_id += 1
+            folder = {
+                "type": "folder",
+                "folder_id": self._next_id,
+                "title": title,
+                "display_title": title,
+                "slug": title.lower().replace(" ", "-"),
+                "sync_to_mobile": 1,
+                "position": len(self.folders) + 1,
+            }
+            self.folders[str(folder["folder_id"])] = folder
+            return folder
+
+    def folder(self, bookmark_id):
+        """
+        Returns the folder of the bookmark or raises KeyError if it does not exist.
+        """
+        with self.lock:
+            return self.bookmarks[int(bookmark_id)][0]
+
+    def listing(self, folder_id="unread", limit=25, have=""):
+        """
+        Implements bookmarks/list: returns the meta, user and up to limit of the newest
+        bookmarks in the folder that are not in have with the same hash. Like the API,
+        the delete_ids are the have bookmarks that would not have appeared within the
+        limit: those no longer in the folder and, if the page is full, those older
+        than its last bookmark (even though they are still in the folder). Reading
+        progress in have (id:hash:progress:progress_timestamp) newer than the
+        library's is saved.
+        """
+        limit = max(1, min(500, int(limit or 25)))
+        have = parse_have(have)
+
+        with self.lock:
+            if folder_id not in BUILTIN_FOLDERS and folder_id not in self.folders:
+                raise FakeInstapaperError(INVALID_FOLDER)
+
+            # Synchronize reading positions sent by the client
+            for bookmark_id, (_, progress, timestamp) in have.items():
+                if bookmark_id in self.bookmarks and progress is not None:
+                    _, bookmark = self.bookmarks[bookmark_id]
+                    if timestamp > int(bookmark["progress_timestamp"] or 0):
+                        bookmark["progress"] = progress
+                        bookmark["progress_timestamp"] = timestamp
+                        _rehash(bookmark)
+
+            ids = self.in_folder(folder_id)
+            folder = sorted(
+                (self.bookmarks[bookmark_id][1] for bookmark_id in ids),
+                key=lambda b: (b["time"], b["bookmark_id"]), reverse=True,
+            )
+
+            # The window is the bookmarks up to the last bookmark of a full page
+            bookmarks, window = [], set()
+            for bookmark in folder:
+                if len(bookmarks) == limit:
+                    break
+                bookmark_id = bookmark["bookmark_id"]
+                window.add(bookmark_id)
+                if bookmark_id not in have or have[bookmark_id][0] != bookmark["hash"]:
+                    bookmarks.append(bookmark)
+
+            delete_ids = sorted(set(have) - window)
+            meta = {"type": "meta", "delete_ids": ",".join(map(str, delete_ids))}
+            return [meta, dict(self.user)] + [dict(b) for b in bookmarks]
+
+    def in_folder(self, folder_id):
+        """
+        Returns the ids of the bookmarks in the folder, starred is the built-in folder
+        of all starred bookmarks regardless of their folder.
+        """
+        with self.lock:
+            if folder_id == "starred":
+                return [
+                    bookmark_id for bookmark_id, (_, bookmark) in self.bookmarks.items()
+                    if bookmark["starred"] == "1"
+                ]
+            return [
+                bookmark_id for bookmark_id, (folder, _) in self.bookmarks.items()
+                if folder == folder_id
+            ]
+
+    def update(self, bookmark_id, folder=None, **fields):
+        """
+        Updates the fields and optionally the folder of a bookmark, returning it.
+        """
+        with self.lock:
+            current, bookmark = self.get(bookmark_id)
+            bookmark.update(fields)
+            folder = folder or current
+            self.bookmarks[bookmark["bookmark_id"]] = (folder, _rehash(bookmark))
+            return bookmark
+
+    def delete(self, bookmark_id):
+        with self.lock:
+            self.get(bookmark_id)
+            del self.bookmarks[int(bookmark_id)]
+
+    def get(self, bookmark_id):
+        """
+        Returns the (folder, record) of the bookmark or raises a FakeInstapaperError.
+        """
+        try:
+            return self.bookmarks[int(bookmark_id)]
+        except (KeyError, TypeError, ValueError):
+            raise FakeInstapaperError(INVALID_BOOKMARK)
+
+    def text(self, bookmark_id, paragraphs=8):
+        """
+        Returns the generated text view HTML of the bookmark.
+        """
+        _, bookmark = self.get(bookmark_id)
+        rand = random.Random(f"{self.seed}:{bookmark['bookmark_id']}")
+        body = "\n".join(
+            "<p>{}.</p>".format(" ".join(rand.choice(WORDS) for _ in range(60)))
+            for _ in range(paragraphs)
+        )
+        return (
+            f"<html><head><title>{bookmark['title']}</title></head>"
+            f"<body><h1>{bookmark['title']}</h1>\n{body}\n</body></html>"
+        )
+
+    def highlights(self, bookmark_id):
+        """
+        Returns zero to three generated highlights of the bookmark.
+        """
+        _, bookmark = self.get(bookmark_id)
+        bookmark_id = bookmark["bookmark_id"]
+        rand = random.Random(f"{self.seed}:{bookmark_id}:highlights")
+        return [
+            {
+                "type": "highlight",
+                "highlight_id": bookmark_id * 10 + idx,
+                "bookmark_id": bookmark_id,
+                "text": " ".join(rand.choices(WORDS, k=rand.randint(4, 20))),
+                "note": None,
+                "time": bookmark["time"] + rand.randint(0, 86400),
+                "position": idx,
+            }
+            for idx in range(rand.randint(0, 3))
+        ]
+
+    def churn(self, fraction=0.05, seed=None):
+        """
+        Randomly modifies about fraction of the library as a reader would between
+        synchronizations: updating reading progress, archiving, deleting and adding
+        bookmarks. Returns a Counter of the changes made.
+        """
+        rand = random.Random(seed)
+        changes = Counter()
+
+        with self.lock:
+            ids = list(self.bookmarks)
+            for bookmark_id in rand.sample(ids, int(len(ids) * fraction)):
+                action = rand.random()
+                if action < 0.5:
+                    self.update(
+                        bookmark_id, progress=round(rand.random(), 4),
+                        progress_timestamp=_now(),
+                    )
+                    changes["progressed"] += 1
+                elif action < 0.75:
+                    self.update(bookmark_id, folder="archive")
+                    changes["archived"] += 1
+                else:
+                    self.delete(bookmark_id)
+                    changes["deleted"] += 1
+
+            for _ in range(int(len(ids) * fraction / 2)):
+                self.add_bookmark(title=" ".join(rand.sample(WORDS, 4)))
+                changes["added"] += 1
+
+        return changes
+
+    def authenticate(self, username, password):
+        """
+        Issues an access token (oauth_token, oauth_token_secret) for the xAuth
+        credentials or raises a FakeInstapaperError if they are not valid.
+        """
+        with self.lock:
+            if username != self.user["username"] or (
+                self.password is not None and password != self.password
+            ):
+                raise FakeInstapaperError(401, "Invalid xAuth credentials", status=401)
+
+            token = hashlib.sha1(f"{username}:{len(self.tokens)}".encode()).hexdigest()
+            self.tokens[token] = hashlib.sha1(token.encode()).hexdigest()
+            return token, self.tokens[token]
+
+
+##########################################################################
+## Server
+##########################################################################
+
+class FakeInstapaper(ThreadingHTTPServer):
+    """
+    Serves the Instapaper API for the library on a background thread. Latency seconds
+    (plus up to jitter seconds) are added to every response and a fraction of requests
+    (error_rate) fail with one of the error statuses; throttling errors include a
+    Retry-After header if retry_after is set and a 400 status responds with the
+    rate-limit exceeded API error. Requests by path are counted in stats.
+
+    Use port 0 (the default) to bind to any free port; endpoint is the URL to point the
+    client at once the server is bound.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, library=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+        error_rate=0.0, error_statuses=(429, 503), retry_after=None, seed=None,
+    ):
+        self.library = library if library is not None else Library.generate()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.thread = None
+        super(FakeInstapaper, self).__init__((host, port), FakeInstapaperHandler)
+
+    @property
+    def endpoint(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/1/"
+
+    def start(self):
+        """
+        Serves requests on a daemon thread and returns the endpoint.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self.endpoint
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, etype, value, traceback):
+        self.stop()
+
+    def inject(self):
+        """
+        Waits for the configured latency and returns an error status to respond with
+        or None if the request should succeed.
+        """
+        with self.library.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            failed = self.error_rate and self.random.random() < self.error_rate
+            status = self.random.choice(self.error_statuses) if failed else None
+
+        if delay > 0:
+            time.sleep(delay)
+        return status
+
+
+class FakeInstapaperHandler(BaseHTTPRequestHandler):
+    """
+    Dispatches POST requests to the /api/1/ and /api/1.1/ paths of the Instapaper API.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        params = self.parse_params()
+        self.server.stats[path] += 1
+
+        status = self.server.inject()
+        if status is not None:
+            self.server.stats["errors"] += 1
+            return self.error(status)
+
+        try:
+            if path.endswith("/oauth/access_token"):
+                token, secret = self.server.library.authenticate(
+                    params.get("x_auth_username"), params.get("x_auth_password")
+                )
+                return self.respond(
+                    f"oauth_token={token}&oauth_token_secret={secret}",
+                    content_type="application/x-www-form-urlencoded",
+                )
+
+            if params.get("oauth_token") not in self.server.library.tokens:
+                raise FakeInstapaperError(403, "Invalid access token", status=403)
+            return self.dispatch(path, params)
+        except FakeInstapaperError as e:
+            self.respond(
+                json.dumps([e.to_json()]), status=e.status,
+                content_type="application/json",
+            )
+        except (TypeError, ValueError) as e:
+            self.respond(
+                json.dumps([FakeInstapaperError(SERVICE_ERROR, str(e)).to_json()]),
+                status=500, content_type="application/json",
+            )
+
+    def dispatch(self, path, params):
+        library = self.server.library
+        parts = path.strip("/").split("/")
+        if parts[:2] == ["api", "1.1"]:
+            return self.dispatch_highlights(parts[2:], params)
+        if parts[:2] != ["api", "1"]:
+            raise FakeInstapaperError(404, "Not found", status=404)
+
+        resource = "/".join(parts[2:])
+        if resource == "account/verify_credentials":
+            return self.respond_json([library.user])
+
+        if resource == "bookmarks/list":
+            return self.respond_json(library.listing(
+                params.get("folder_id", "unread"), params.get("limit", 25),
+                params.get("have", ""),
+            ))
+
+        if resource == "bookmarks/get_text":
+            text = library.text(params.get("bookmark_id"))
+            return self.respond(text, content_type="text/html; charset=utf-8")
+
+        if resource == "bookmarks/add":
+            bookmark = library.add_bookmark(
+                url=params.get("url"), title=params.get("title", ""),
+                description=params.get("description", ""),
+                folder=params.get("folder_id", "unread"),
+            )
+            return self.respond_json([bookmark])
+
+        if resource == "bookmarks/delete":
+            library.delete(params.get("bookmark_id"))
+            return self.respond_json([])
+
+        actions = {
+            "bookmarks/star": {"starred": "1"},
+            "bookmarks/unstar": {"starred": "0"},
+            "bookmarks/archive": {"folder": "archive"},
+            "bookmarks/unarchive": {"folder": "unread"},
+            "bookmarks/move": {"folder": params.get("folder_id")},
+            "bookmarks/update_read_progress": {
+                "progress": float(params.get("progress", 0)),
+                "progress_timestamp": int(float(
+                    params.get("progress_timestamp", None) or _now()
+                )),
+            },
+        }
+        if resource in actions:
+            fields = actions[resource]
+            folder = fields.get("folder", "unread")
+            if folder not in BUILTIN_FOLDERS and folder not in library.folders:
+                raise FakeInstapaperError(INVALID_FOLDER)
+            return self.respond_json(
+                [library.update(params.get("bookmark_id"), **fields)]
+            )
+
+        if resource == "folders/list":
+            with library.lock:
+                return self.respond_json(list(library.folders.values()))
+
+        if resource == "folders/add":
+            return self.respond_json([library.add_folder(params.get("title", ""))])
+
+        if resource == "folders/delete":
+            with library.lock:
+                if library.folders.pop(params.get("folder_id"), None) is None:
+                    raise FakeInstapaperError(INVALID_FOLDER)
+            return self.respond_json([])
+
+        if resource == "folders/set_order":
+            with library.lock:
+                for pair in params.get("order", "").split(","):
+                    folder_id, _, position = pair.partition(":")
+                    if folder_id in library.folders:
+                        library.folders[folder_id]["position"] = int(position or 0)
+                return self.respond_json(list(library.folders.values()))
+
+        raise FakeInstapaperError(404, "Not found", status=404)
+
+    def dispatch_highlights(self, parts, params):
+        library = self.server.library
+        if len(parts) == 3 and parts[0] == "bookmarks" and parts[2] == "highlights":
+            return self.respond_json(library.highlights(parts[1]))
+
+        if len(parts) == 3 and parts[0] == "bookmarks" and parts[2] == "highlight":
+            _, bookmark = library.get(parts[1])
+            return self.respond_json([{
+                "type": "highlight",
+                "highlight_id": int(time.time() * 1000),
+                "bookmark_id": bookmark["bookmark_id"],
+                "text": params.get("text", ""),
+                "note": None,
+                "time": _now(),
+                "position": int(params.get("position", 0)),
+            }])
+
+        if len(parts) == 3 and parts[0] == "highlights" and parts[2] == "delete":
+            return self.respond_json([])
+
+        raise FakeInstapaperError(404, "Not found", status=404)
+
+    def parse_params(self):
+        """
+        Parses the form-encoded (or JSON) body along with the OAuth parameters, which
+        may be in the body or the Authorization header depending on the content.
+        """
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+
+        params = {}
+        auth = self.headers.get("Authorization", "")
+        if auth.startswith("OAuth "):
+            for item in auth[6:].split(","):
+                key, _, value = item.strip().partition("=")
+                params[key] = unquote(value.strip('"'))
+
+        if body.lstrip().startswith("{"):
+            try:
+                params.update({k: str(v) for k, v in json.loads(body).items()})
+            except ValueError:
+                pass
+        else:
+            params.update(parse_qsl(body, keep_blank_values=True))
+        return params
+
+    def error(self, status):
+        headers = {}
+        if status in (429, 503) and self.server.retry_after is not None:
+            headers["Retry-After"] = str(self.server.retry_after)
+
+        if status == 400:
+            error = FakeInstapaperError(RATE_LIMITED)
+        else:
+            error = FakeInstapaperError(SERVICE_ERROR)
+
+        self.respond(
+            json.dumps([error.to_json()]), status=status,
+            content_type="application/json", headers=headers,
+        )
+
+    def respond_json(self, data, status=200):
+        self.respond(json.dumps(data), status=status, content_type="application/json")
+
+    def respond(self, body, status=200, content_type="text/plain", headers=None):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Silence the per-request logging of the base handler
+        pass
+
+
+class FakeInstapaperError(Exception):
+
+    def __init__(self, code, message=None, status=400):
+        self.code = code
+        self.message = message or ERROR_MESSAGES.get(code, "Unknown error")
+        self.status = status
+
+    def to_json(self):
+        return {"type": "error", "error_code": self.code, "message": self.message}
+
+
+##########################################################################
+## Helpers
+##########################################################################
+
+def parse_have(have):
+    """
+    Parses a have parameter of comma separated id, id:hash or
+    id:hash:progress:progress_timestamp values into a dict of id: (hash, progress,
+    progress_timestamp) where the missing values are None.
+    """
+    parsed = {}
+    for item in (have or "").split(","):
+        parts = item.strip().split(":")
+        if not parts[0]:
+            continue
+        try:
+            bookmark_id = int(parts[0])
+            bhash = parts[1] if len(parts) > 1 else None
+            progress = float(parts[2]) if len(parts) > 3 else None
+            timestamp = int(float(parts[3])) if len(parts) > 3 else None
+        except ValueError:
+            continue
+        parsed[bookmark_id] = (bhash, progress, timestamp)
+    return parsed
+
+
+def _rehash(bookmark):
+    """
+    Updates the hash of the bookmark from its content and reading progress.
+    """
+    content = "{url}|{title}|{description}|{progress}|{progress_timestamp}|{starred}"
+    bookmark["hash"] = hashlib.md5(
+        content.format(**bookmark).encode("utf-8")
+    ).hexdigest()[:8]
+    return bookmark
+
+
+def _now():
+    return int(time.time())
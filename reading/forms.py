@@ -18,9 +18,7 @@ Web forms for simple HTTP interactions
 ##########################################################################
 
 from django import forms
-from django.utils import timezone
 from reading.instapaper import Instapaper
-from reading.models import Article, ArticleCounts
 from django.core.exceptions import ValidationError
 
 
@@ -101,52 +99,3 @@ class InstapaperLoginForm(forms.Form):
             if item["type"] == "user":
                 self.account.refresh_from_api(item)
                 self.account.save()
-
-    def synchronize(self):
-        """
-        This method performs a "daily synchronization" - it fetches bookmarks from
-        Instapaper and updates all bookmarks with their reading progress. It then
-        creates a daily article count for today if there is a Memo.
-        """
-        if self.client is None:
-            raise ValidationError("cannot synchronize without authentication")
-
-        # Return update statistics across all folders
-        created, updated, deleted = 0, 0, 0
-
-        # NOTE: ignoring "starred" folder since this duplicates other folders
-        # TODO: handle other folders created by the user
-        for folder in ("unread", "archive"):
-            # Use the have parameter to reduce the result set returned
-            have = Article.instapaper.have(self.account, folder)
-            bookmarks = self.client.bookmarks(limit=500, folder_id=folder, have=have)
-
-            for record in bookmarks:
-                rtype = record.pop("type").lower().strip()
-                if rtype == "bookmark":
-                    if Article.instapaper.from_bookmark(self.account, record, folder):
-                        created += 1
-                    else:
-                        updated += 1
-
-                elif rtype == "user":
-                    self.account.refresh_from_api(record)
-                    self.account.save()
-
-                elif rtype == "meta":
-                    deleted_ids = record.get("delted_ids", None)
-                    if deleted_ids:
-                        deleted += Article.instapaper.delete_bookmarks(deleted_ids)
-
-                else:
-                    raise ValueError(f"unhandled record type '{rtype}'")
-
-        # Update the account synchronization status
-        self.account.last_synchronized = timezone.now()
-        self.account.save()
-
-        # Create daily counts for Memoro
-        ArticleCounts.objects.daily_counts(self.account)
-
-        # Return the number of API interactions that occurred
-        return created, updated, deleted
\ No newline at end of file
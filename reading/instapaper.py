@@ -19,9 +19,20 @@ Client for the Instapaper API (https://www.instapaper.com/api/full)
 
 import os
 import json
+import time
+import queue
+import random
+import asyncio
+import httplib2
+import functools
+import threading
 import oauth2 as oauth
 
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from urllib.parse import urljoin, urlencode, parse_qsl
 
 try:
@@ -34,6 +45,15 @@ ENDPOINT = "https://www.instapaper.com/api/1/"
 CONSUMER_ID_ENVVAR="INSTAPAPER_CONSUMER_ID"
 CONSUMER_SECRET_ENVVAR = "INSTAPAPER_CONSUMER_SECRET"
 
+POOL_SIZE = 4
+TIMEOUT = 30
+
+# Responses that are retried by default, 429 and 503 are rate limiting responses that
+# are also retried for requests that are not idempotent since the server did not act
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429, 503})
+RATE_LIMIT_ERROR = 1040
+
 
 ##########################################################################
 ## Instapaper Client
@@ -48,19 +68,21 @@ class Instapaper(object):
 
     @classmethod
     def cached_access_token(
-        cls, oauth_token, oauth_token_secret, client_key=None, client_secret=None
+        cls, oauth_token, oauth_token_secret, client_key=None, client_secret=None,
+        **kwargs
     ):
         """
         Initialize API client with cached access token to prevent reauthentication.
         """
-        client = cls(client_key=client_key, client_secret=client_secret)
-        consumer = oauth.Consumer(client.client_key, client.client_secret)
+        client = cls(client_key=client_key, client_secret=client_secret, **kwargs)
         access_token = oauth.Token(oauth_token, oauth_token_secret)
-        client.session = oauth.Client(consumer, access_token)
-        client.session.set_signature_method = oauth.SignatureMethod_HMAC_SHA1()
+        client.session = client._session_pool(access_token)
         return client
 
-    def __init__(self, client_key=None, client_secret=None):
+    def __init__(
+        self, client_key=None, client_secret=None, pool_size=None, timeout=None,
+        retry=None, rate_limit=None, endpoint=None,
+    ):
         if client_key is None:
             if settings and settings.INSTAPAPER_CONSUMER_ID:
                 client_key = settings.INSTAPAPER_CONSUMER_ID
@@ -78,30 +100,47 @@ class Instapaper(object):
                 1038, "client oauth consumer id and secret required"
             )
 
+        if pool_size is None:
+            pool_size = getattr(settings, "INSTAPAPER_POOL_SIZE", None) or POOL_SIZE
+
+        if timeout is None:
+            timeout = getattr(settings, "INSTAPAPER_TIMEOUT", None) or TIMEOUT
+
         self.client_key = client_key
         self.client_secret = client_secret
+        if rate_limit is None:
+            rate_limit = getattr(settings, "INSTAPAPER_RATE_LIMIT", None)
+
+        if endpoint is None:
+            endpoint = getattr(settings, "INSTAPAPER_ENDPOINT", None) or ENDPOINT
+
+        self.endpoint = endpoint
+        self.pool_size = int(pool_size)
+        self.timeout = float(timeout)
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.pacer = TokenBucket(rate_limit) if rate_limit else None
         self.session = None
 
+        # Counters of requests, retries, throttled responses, and time spent waiting
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
     def authenticate(self, username, password):
         """
         All API interactions must happen through authenticated sessions that are
         constructed using an xAuth workflow. This endpoint authenticates the a user with
         their username and password and creates the session for other requests.
         """
-        consumer = oauth.Consumer(self.client_key, self.client_secret)
-        client = oauth.Client(consumer)
-        client.add_credentials("username", "password")
-        client.authorizations
-
         creds = {
             "x_auth_username": username,
             "x_auth_password": password,
             "x_auth_mode": "client_auth"
         }
 
+        # Use the pooled consumer-only session to fetch the access token
+        client = self._session_pool()
         token_url = self._endpoint("oauth/access_token")
-        client.set_signature_method = oauth.SignatureMethod_HMAC_SHA1()
-        rep, content = client.request(token_url, method="POST", body=urlencode(creds))
+        rep, content = self._request(client, token_url, body=urlencode(creds))
 
         if rep.status < 200 or rep.status >= 300:
             raise HTTPException(rep, content)
@@ -115,8 +154,7 @@ class Instapaper(object):
             raise HTTPException(rep, content) from e
 
         access_token = oauth.Token(token["oauth_token"], token["oauth_token_secret"])
-        self.session = oauth.Client(consumer, access_token)
-        self.session.set_signature_method = oauth.SignatureMethod_HMAC_SHA1()
+        self.session = self._session_pool(access_token)
         return token
 
     def verify_credentials(self):
@@ -158,6 +196,60 @@ class Instapaper(object):
         }
         return self._post("bookmarks/list", params)
 
+    def iter_bookmarks(self, folder_id="unread", have="", limit=500, highlights=""):
+        """
+        Walks a folder to completion by requesting pages of at most limit bookmarks,
+        adding the bookmarks returned by each page to the have parameter of the next
+        request so that they are not sent again. Yields the response of each request,
+        stopping when a page returns fewer than limit bookmarks (or nothing new).
+
+        The have parameter may be a string or an iterable of have segments (e.g. from
+        InstapaperQueryset.iter_have). All of the segments are sent with the first
+        request; otherwise the unchanged bookmarks in the segments that had not been
+        sent yet would be returned by the first pages only to be skipped.
+
+        Note that the delete_ids of a full page include every bookmark in have beyond
+        the limit of the request, whether or not it is still in the folder. Only the
+        delete_ids of a page with fewer than limit bookmarks (the last page of the
+        walk) cover the whole folder; callers should only delete those bookmarks, and
+        only if they were not returned by any page of the walk.
+        """
+        if not isinstance(have, str):
+            have = ",".join(segment for segment in have if segment)
+        returned = []
+        seen = set()
+
+        while True:
+            page = self.bookmarks(
+                limit=limit, folder_id=folder_id,
+                have=",".join(segment for segment in [have] + returned if segment),
+                highlights=highlights,
+            )
+
+            # Collect the bookmarks before yielding since the caller may modify records
+            bookmarks = [
+                (record["bookmark_id"], record.get("hash", ""))
+                for record in page
+                if record.get("type", None) == "bookmark"
+                and record["bookmark_id"] not in seen
+            ]
+
+            yield page
+
+            if len(bookmarks) < limit:
+                return
+
+            # Bookmarks returned by the page are in the next have with their new hash
+            ids = {bookmark_id for bookmark_id, _ in bookmarks}
+            if have:
+                have = ",".join(
+                    item for item in have.split(",")
+                    if int(item.split(":", 1)[0]) not in ids
+                )
+
+            seen.update(ids)
+            returned.append(",".join(f"{bid}:{bhash}" for bid, bhash in bookmarks))
+
     def update_read_progress(self, bookmark_id, progress, timestamp=None):
         """
         Updates the user's reading progress on a single article. This functionality is
@@ -256,7 +348,7 @@ class Instapaper(object):
         if is_private_from_source is not None:
             content["is_private_from_source"] = is_private_from_source
 
-        return self._post("bookmarks/add", params)
+        return self._post("bookmarks/add", params, idempotent=False)
 
     def delete_bookmark(self, bookmark_id):
         """
@@ -343,13 +435,10 @@ class Instapaper(object):
             "User-Agent": "Memoro Instapaper API Client (Python)",
         }
 
-        data = {"bookmark_id": bookmark_id}
-        body = json.dumps(data, ensure_ascii=False).encode('UTF-8') if data else b''
-        rep, content = self.session.request(
-            self._endpoint("bookmarks/get_text"),
-            method="POST",
-            body=body,
-            headers=headers
+        # NOTE: the body must be form encoded for the OAuth client to sign and send it
+        body = urlencode({"bookmark_id": bookmark_id})
+        rep, content = self._request(
+            self.session, self._endpoint("bookmarks/get_text"), body, headers
         )
 
         if rep.status == 200:
@@ -359,7 +448,7 @@ class Instapaper(object):
         # Otherwise this is an exception
         try:
             # If we cannot parse the json data, raise an HTTPException
-            content = json.loads(content, encoding='UTF-8')
+            content = json.loads(content)
         except Exception as e:
             raise HTTPException(rep, content) from e
 
@@ -383,7 +472,7 @@ class Instapaper(object):
         ----------
         title : str, required
         """
-        return self._post("folders/add", {"title": title})
+        return self._post("folders/add", {"title": title}, idempotent=False)
 
     def delete_folder(self, folder_id):
         """
@@ -454,7 +543,9 @@ class Instapaper(object):
             The 0-indexed position of text in the content.
         """
         params = {"text": text, "position": position}
-        return self._post(f"/api/1.1/bookmarks/{bookmark_id}/highlight", params)
+        return self._post(
+            f"/api/1.1/bookmarks/{bookmark_id}/highlight", params, idempotent=False
+        )
 
     def delete_highlight(self, highlight_id):
         """
@@ -466,7 +557,7 @@ class Instapaper(object):
         """
         return self._post(f"/api/1.1/highlights/{highlight_id}/delete")
 
-    def _post(self, path, data=None):
+    def _post(self, path, data=None, idempotent=True):
         if self.session is None:
             raise InstapaperException(1039, "client has not been authenticated")
 
@@ -479,8 +570,8 @@ class Instapaper(object):
         # body = json.dumps(data, ensure_ascii=False).encode('UTF-8') if data else b''
         from urllib.parse import urlencode
         body = urlencode({key: str(val) for key, val in data.items()}) if data else b''
-        rep, content = self.session.request(
-            self._endpoint(path), method="POST", body=body, headers=headers
+        rep, content = self._request(
+            self.session, self._endpoint(path), body, headers, idempotent=idempotent
         )
 
         # Received a non-200 response, raise an exception
@@ -489,13 +580,63 @@ class Instapaper(object):
 
         try:
             # If we cannot parse the json data, raise an HTTPException
-            content = json.loads(content, encoding='UTF-8')
+            content = json.loads(content)
         except Exception as e:
             raise HTTPException(rep, content) from e
 
         self._handle_error(content)
         return content
 
+    def _request(self, session, url, body=b'', headers=None, idempotent=True):
+        """
+        Executes a POST request using the session, applying the request pacing and the
+        retry policy of the client. Retries are made on connection errors and on
+        retryable responses (including rate limiting), after which the last response
+        is returned for the caller to handle. Requests that are not idempotent (e.g.
+        adding a bookmark) are only retried when they were throttled, since the server
+        may have acted on a request that failed in any other way.
+        """
+        attempt = 0
+        while True:
+            if self.pacer is not None:
+                self._count("waited", self.pacer.acquire())
+
+            self._count("requests")
+            try:
+                rep, content = session.request(
+                    url, method="POST", body=body, headers=headers
+                )
+            except (OSError, httplib2.HttpLib2Error):
+                if not self.retry.should_retry(attempt, idempotent=idempotent):
+                    self._count("failures")
+                    raise
+                self._count("errors")
+                delay = self.retry.delay(attempt)
+            else:
+                status = rep.status
+                if is_rate_limited(rep, content):
+                    self._count("throttled")
+                    status = 429
+
+                if not self.retry.should_retry(attempt, status, idempotent):
+                    if status in self.retry.statuses:
+                        self._count("failures")
+                    return rep, content
+
+                delay = self.retry.delay(attempt, rep)
+                if delay is None:
+                    # The server requested a longer wait than the policy allows
+                    self._count("failures")
+                    return rep, content
+
+            self._count("retries")
+            self._count("waited", delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _count(self, key, value=1):
+        with self._stats_lock:
+            self.stats[key] += value
 
     def _handle_error(self, content):
         if isinstance(content, list):
@@ -512,7 +653,365 @@ class Instapaper(object):
         """
         Returns an endpoint for the specified relative path.
         """
-        return urljoin(ENDPOINT, path)
+        return urljoin(self.endpoint, path)
+
+    def _session_pool(self, token=None):
+        """
+        Returns the shared session pool for the client's consumer and the token.
+        """
+        consumer = oauth.Consumer(self.client_key, self.client_secret)
+        return session_pool(consumer, token, size=self.pool_size, timeout=self.timeout)
+
+
+##########################################################################
+## Retries and Rate Limiting
+##########################################################################
+
+class RetryPolicy(object):
+    """
+    Describes how the client retries failed requests: connection errors and responses
+    with one of the retry statuses are retried up to max_retries times, waiting with an
+    exponential backoff (capped at max_backoff seconds) and full jitter between
+    attempts. If the server specifies a Retry-After header it is honored instead of the
+    backoff, unless it is longer than max_backoff, in which case the request fails.
+    Requests that are not idempotent are only retried on the throttling statuses.
+    """
+
+    def __init__(
+        self, max_retries=3, backoff=0.5, max_backoff=60, jitter=True,
+        statuses=RETRY_STATUSES,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+
+    def should_retry(self, attempt, status=None, idempotent=True):
+        """
+        Returns True if the attempt should be retried, status is None on errors. Only
+        throttled attempts of requests that are not idempotent are retried.
+        """
+        if attempt >= self.max_retries:
+            return False
+        if not idempotent:
+            return status in THROTTLE_STATUSES
+        return status is None or status in self.statuses
+
+    def delay(self, attempt, response=None):
+        """
+        Returns the number of seconds to wait before the next attempt or None if the
+        Retry-After header of the response exceeds the maximum backoff.
+        """
+        retry_after = parse_retry_after(response)
+        if retry_after is not None:
+            if retry_after > self.max_backoff:
+                return None
+            return retry_after
+
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class TokenBucket(object):
+    """
+    A thread-safe token bucket that paces requests to an average of rate requests per
+    second, allowing bursts of up to capacity requests.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes a token from the bucket, sleeping until one is available. Returns the
+        number of seconds spent waiting.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+            # Reserve the token, waiting outside the lock for it to be replenished
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def parse_retry_after(response):
+    """
+    Returns the Retry-After header of the response in seconds, or None if not set.
+    """
+    if response is None:
+        return None
+
+    value = response.get("retry-after", None)
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(tz=timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limited(response, content):
+    """
+    Returns True if the response indicates the client has been rate limited, either
+    with a throttling status code or a rate-limit exceeded error from the API.
+    """
+    if response.status in THROTTLE_STATUSES:
+        return True
+
+    if response.status == 400 and content:
+        try:
+            content = json.loads(content)
+        except ValueError:
+            return False
+
+        if isinstance(content, list) and len(content) == 1:
+            content = content[0]
+        if isinstance(content, dict):
+            return content.get("error_code", None) == RATE_LIMIT_ERROR
+    return False
+
+
+##########################################################################
+## Asyncio Instapaper Client
+##########################################################################
+
+def _coroutine(name):
+    """
+    Wraps the blocking Instapaper client method as a coroutine that is executed in the
+    thread pool of the async client.
+    """
+    method = getattr(Instapaper, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await self._run(getattr(self.client, name), *args, **kwargs)
+    return wrapper
+
+
+class AsyncInstapaper(object):
+    """
+    An asyncio counterpart of the Instapaper client that exposes the same API methods
+    as coroutines. Requests are executed by a blocking Instapaper client in a thread
+    pool whose sessions are drawn from the client's keep-alive session pool, so at most
+    concurrency requests are in flight at once. The fan-out helpers (get_texts and
+    get_highlights) fetch a batch of bookmarks concurrently, bounded by a semaphore to
+    respect the Instapaper rate limits.
+    """
+
+    @classmethod
+    def cached_access_token(
+        cls, oauth_token, oauth_token_secret, concurrency=None, **kwargs
+    ):
+        """
+        Initialize API client with cached access token to prevent reauthentication.
+        """
+        client = Instapaper.cached_access_token(
+            oauth_token, oauth_token_secret, **kwargs
+        )
+        return cls(client, concurrency=concurrency)
+
+    def __init__(self, client=None, concurrency=None, **kwargs):
+        if client is None:
+            client = Instapaper(**kwargs)
+
+        # Without more sessions than workers, threads would block on the session pool
+        self.client = client
+        self.concurrency = min(concurrency or client.pool_size, client.pool_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="instapaper"
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, etype, value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down the thread pool, waiting for any pending requests to complete.
+        """
+        self._executor.shutdown(wait=True)
+
+    authenticate = _coroutine("authenticate")
+    verify_credentials = _coroutine("verify_credentials")
+    bookmarks = _coroutine("bookmarks")
+    update_read_progress = _coroutine("update_read_progress")
+    add_bookmark = _coroutine("add_bookmark")
+    delete_bookmark = _coroutine("delete_bookmark")
+    star = _coroutine("star")
+    unstar = _coroutine("unstar")
+    archive = _coroutine("archive")
+    unarchive = _coroutine("unarchive")
+    move = _coroutine("move")
+    get_text = _coroutine("get_text")
+    folders = _coroutine("folders")
+    add_folder = _coroutine("add_folder")
+    delete_folder = _coroutine("delete_folder")
+    set_folder_order = _coroutine("set_folder_order")
+    highlights = _coroutine("highlights")
+    add_highlight = _coroutine("add_highlight")
+    delete_highlight = _coroutine("delete_highlight")
+
+    async def get_texts(self, bookmark_ids, return_exceptions=False):
+        """
+        Concurrently fetches the text-view HTML of the specified bookmarks, returning
+        a dictionary of bookmark_id to text. See fan_out for more details.
+        """
+        return await self.fan_out(
+            "get_text", bookmark_ids, return_exceptions=return_exceptions
+        )
+
+    async def get_highlights(self, bookmark_ids, return_exceptions=False):
+        """
+        Concurrently fetches the highlights of the specified bookmarks, returning a
+        dictionary of bookmark_id to highlights. See fan_out for more details.
+        """
+        return await self.fan_out(
+            "highlights", bookmark_ids, return_exceptions=return_exceptions
+        )
+
+    async def fan_out(self, method, bookmark_ids, return_exceptions=False):
+        """
+        Calls the named API method for each bookmark_id with at most concurrency calls
+        in flight at once and returns a dictionary mapping the bookmark_id to the result
+        of the call. If return_exceptions is True, exceptions (e.g. an HTTPException for
+        a single bookmark) are returned in the dictionary instead of being raised.
+        """
+        method = getattr(self, method)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def call(bookmark_id):
+            async with semaphore:
+                return await method(bookmark_id)
+
+        bookmark_ids = list(bookmark_ids)
+        results = await asyncio.gather(
+            *[call(bookmark_id) for bookmark_id in bookmark_ids],
+            return_exceptions=return_exceptions,
+        )
+        return dict(zip(bookmark_ids, results))
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+
+##########################################################################
+## Connection Pooling
+##########################################################################
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def session_pool(consumer, token=None, size=POOL_SIZE, timeout=TIMEOUT):
+    """
+    Returns the session pool for the consumer and token, creating it if required. Pools
+    are shared by all clients in the process so that keep-alive connections are reused
+    across API calls and across synchronization runs.
+    """
+    key = (
+        consumer.key, consumer.secret,
+        token.key if token else None, token.secret if token else None,
+        size, timeout,
+    )
+
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SessionPool(consumer, token, size=size, timeout=timeout)
+        return _pools[key]
+
+
+def close_pools():
+    """
+    Closes all of the connections held by the shared session pools.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+class SessionPool(object):
+    """
+    A thread-safe pool of at most size OAuth sessions for a consumer and access token.
+    Each session is an httplib2 client that keeps its connections to the API alive
+    between requests, so checking sessions out of the pool rather than creating new
+    ones avoids a TCP and TLS handshake on every request. The pool exposes the same
+    request method as the session so it can be used in its place.
+    """
+
+    def __init__(self, consumer, token=None, size=POOL_SIZE, timeout=TIMEOUT):
+        self.consumer = consumer
+        self.token = token
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def request(self, uri, method="GET", body=b'', headers=None):
+        with self.checkout() as session:
+            return session.request(uri, method=method, body=body, headers=headers)
+
+    @contextmanager
+    def checkout(self):
+        """
+        Checks a session out of the pool, blocking until a session is available.
+        """
+        with self._slots:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                session = oauth.Client(self.consumer, self.token, timeout=self.timeout)
+                session.set_signature_method(oauth.SignatureMethod_HMAC_SHA1())
+
+            try:
+                yield session
+            except Exception:
+                # The state of the connection is unknown, do not return it to the pool
+                self._close_session(session)
+                raise
+            self._idle.put(session)
+
+    def close(self):
+        """
+        Closes the connections of all idle sessions in the pool.
+        """
+        while True:
+            try:
+                self._close_session(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def _close_session(self, session):
+        for conn in session.connections.values():
+            conn.close()
+        session.connections.clear()
 
 
 class InstapaperException(Exception):
@@ -0,0 +1,110 @@
+# reading.management.commands.benchmark
+# Benchmarks Instapaper synchronization with synthetic libraries
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 18:02:26 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: benchmark.py [] benjamin@bengfort.com $
+
+"""
+Benchmarks Instapaper synchronization with synthetic libraries
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+
+from reading.benchmark import SyncBenchmark, THRESHOLD, compare
+from django.core.management.base import BaseCommand, CommandError
+
+
+##########################################################################
+## Command
+##########################################################################
+
+class Command(BaseCommand):
+
+    help = "benchmark the Instapaper synchronization pipeline with synthetic libraries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-n", "--sizes", default="100,1000,10000", metavar="N,N,...",
+            help="comma separated numbers of bookmarks in the synthetic libraries",
+        )
+        parser.add_argument(
+            "-C", "--churn", type=float, default=0.05, metavar="P",
+            help="the fraction of the library to modify before the churn sync",
+        )
+        parser.add_argument(
+            "-P", "--parallel", action="store_true",
+            help="fetch all folder listings concurrently when synchronizing",
+        )
+        parser.add_argument(
+            "-l", "--latency", type=float, default=0.0, metavar="SECS",
+            help="seconds of latency the fake Instapaper server adds to responses",
+        )
+        parser.add_argument(
+            "-M", "--no-memory", action="store_false", dest="memory",
+            help="do not trace peak memory (tracing slows down the stages)",
+        )
+        parser.add_argument(
+            "-s", "--seed", type=int, default=42,
+            help="random seed to generate the synthetic libraries with",
+        )
+        parser.add_argument(
+            "-o", "--output", metavar="PATH", default=None,
+            help="write the results as JSON to the specified path",
+        )
+        parser.add_argument(
+            "-c", "--compare", metavar="PATH", default=None,
+            help="compare the results to a previous JSON results file",
+        )
+        parser.add_argument(
+            "-t", "--threshold", type=float, default=THRESHOLD, metavar="X",
+            help="flag stages this many times slower than the compared results",
+        )
+        parser.add_argument(
+            "-F", "--fail", action="store_true",
+            help="exit with an error if any stage regressed from the compared results",
+        )
+
+    def handle(self, *args, **opts):
+        try:
+            sizes = [int(size) for size in opts["sizes"].split(",") if size.strip()]
+        except ValueError:
+            raise CommandError("sizes must be a comma separated list of integers")
+
+        baseline = None
+        if opts["compare"]:
+            with open(opts["compare"], "r") as f:
+                baseline = json.load(f)
+
+        bench = SyncBenchmark(
+            sizes=sizes, churn=opts["churn"], parallel=opts["parallel"],
+            latency=opts["latency"], memory=opts["memory"], seed=opts["seed"],
+            stdout=self.stdout,
+        )
+        results = bench.run()
+
+        if opts["output"]:
+            with open(opts["output"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"results written to {opts['output']}")
+
+        if baseline is not None:
+            self.stdout.write(f"compared to {opts['compare']}:")
+            regressions = 0
+            for line, regressed in compare(results, baseline, opts["threshold"]):
+                self.stdout.write(line)
+                regressions += regressed
+
+            if regressions:
+                message = f"{regressions} stages regressed from {opts['compare']}"
+                if opts["fail"]:
+                    raise CommandError(message)
+                self.stderr.write(message)
@@ -0,0 +1,108 @@
+# reading.management.commands.fakeinstapaper
+# Serves a local fake Instapaper API with a synthetic library
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 16:48:09 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: fakeinstapaper.py [] benjamin@bengfort.com $
+
+"""
+Serves a local fake Instapaper API with a synthetic library
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from django.core.management.base import BaseCommand
+from reading.fakeinstapaper import FakeInstapaper, Library
+
+
+##########################################################################
+## Command
+##########################################################################
+
+class Command(BaseCommand):
+
+    help = "serve a local fake Instapaper API seeded with a synthetic library"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-a", "--addr", default="127.0.0.1", metavar="HOST",
+            help="the address to bind the server to",
+        )
+        parser.add_argument(
+            "-p", "--port", type=int, default=8800,
+            help="the port to bind the server to",
+        )
+        parser.add_argument(
+            "-n", "--bookmarks", type=int, default=1000, metavar="N",
+            help="the number of bookmarks in the synthetic library",
+        )
+        parser.add_argument(
+            "-f", "--folders", type=int, default=2, metavar="N",
+            help="the number of user folders in the synthetic library",
+        )
+        parser.add_argument(
+            "-u", "--username", default="reader@example.com",
+            help="the username of the account to authenticate with",
+        )
+        parser.add_argument(
+            "-P", "--password", default=None,
+            help="require the password to authenticate (any is accepted by default)",
+        )
+        parser.add_argument(
+            "-s", "--seed", type=int, default=42,
+            help="random seed to generate the library and inject errors with",
+        )
+        parser.add_argument(
+            "-l", "--latency", type=float, default=0.0, metavar="SECS",
+            help="seconds of latency to add to every response",
+        )
+        parser.add_argument(
+            "-j", "--jitter", type=float, default=0.0, metavar="SECS",
+            help="up to this many seconds of random latency to add to responses",
+        )
+        parser.add_argument(
+            "-e", "--error-rate", type=float, default=0.0, metavar="P",
+            help="the fraction of requests to respond to with an error",
+        )
+        parser.add_argument(
+            "-S", "--error-status", type=int, action="append", dest="error_statuses",
+            metavar="CODE", help="error status to inject (default 429 and 503)",
+        )
+        parser.add_argument(
+            "-r", "--retry-after", type=float, default=None, metavar="SECS",
+            help="set the Retry-After header of injected throttling errors",
+        )
+
+    def handle(self, *args, **opts):
+        library = Library.generate(
+            opts["bookmarks"], folders=opts["folders"], seed=opts["seed"],
+            username=opts["username"], password=opts["password"],
+        )
+
+        server = FakeInstapaper(
+            library, host=opts["addr"], port=opts["port"], latency=opts["latency"],
+            jitter=opts["jitter"], error_rate=opts["error_rate"],
+            error_statuses=opts["error_statuses"] or (429, 503),
+            retry_after=opts["retry_after"], seed=opts["seed"],
+        )
+
+        self.stdout.write(
+            f"serving {len(library.bookmarks)} bookmarks for {opts['username']} "
+            f"at {server.endpoint}\n"
+            f"set INSTAPAPER_ENDPOINT={server.endpoint} to synchronize with it"
+        )
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            for path, count in sorted(server.stats.items()):
+                self.stdout.write(f"{count:>8} {path}")
@@ -21,8 +21,7 @@ import os
 import getpass
 
 from datetime import date
-from diary.models import Memo
-from django.utils import timezone
+from reading.sync import Synchronizer, summarize
 from reading.instapaper import Instapaper
 from django.contrib.auth.models import User
 from reading.utils import parse_bool, parse_timestamp
@@ -66,6 +65,10 @@ class Command(BaseCommand):
             "-c", "--article-count", action="store_true",
             help="perform the article count for today's memoro"
         )
+        parser.add_argument(
+            "-P", "--parallel", action="store_true",
+            help="fetch all folder listings concurrently before writing them"
+        )
 
     def handle(self, *args, **options):
         # Get the user associated with the account
@@ -83,21 +86,31 @@ class Command(BaseCommand):
             # Create the Instapaper API client, using cached access tokens if available.
             self.make_instapaper_client(**options)
 
-            # Note: ignoring the "starred" folder since this duplicates other folders
-            # TODO: handle other folders
-            for folder in ("unread", "archive"):
-                # Get the have query to reduce the result set returned
-                have = Article.instapaper.have(self.user, folder)
-                bookmarks = self.client.bookmarks(
-                    limit=500, folder_id=folder, have=have
-                )
+            # Synchronize the unread, archive, and user-created folders
+            sync = Synchronizer(self.client, self.user.instapaper_account)
+            sync.synchronize(parallel=options["parallel"])
+
+            for folder, (crt, upd, dlt, skp) in sync.results.items():
+                print((
+                    f"{crt} created, {upd} updated, {dlt} deleted, "
+                    f"{skp} unchanged in {folder}"
+                ))
+
+            for folder, e in sync.errors.items():
+                self.stderr.write(f"could not synchronize {folder}: {e}")
 
-                # Handle bookmarks and report the results
-                crt, upd, dlt = self.handle_bookmarks(bookmarks, folder)
-                print(f"{crt} created, {upd} updated, {dlt} deleted in {folder}")
+            stats = self.client.stats
+            print((
+                f"{stats['requests']} requests, {stats['retries']} retries, "
+                f"{stats['throttled']} throttled, {stats['waited']:0.1f}s waiting"
+            ))
 
-            self.user.instapaper_account.last_synchronized = timezone.now()
-            self.user.instapaper_account.save()
+            if sync.errors:
+                failed = ", ".join(sync.errors)
+                raise CommandError(f"synchronization failed for {failed}")
+
+            # Update today's counts and the daily summaries as the sync jobs do
+            summarize(self.user.instapaper_account)
 
     def get_user(self, username):
         try:
@@ -143,54 +156,11 @@ class Command(BaseCommand):
                 account.refresh_from_api(item)
                 account.save()
 
-    def handle_bookmarks(self, bookmarks, folder):
-        """
-        Updates the database with the fetched bookmarks
-        """
-        account = self.user.instapaper_account
-        created, updated, deleted = 0, 0, 0
-
-        for record in bookmarks:
-            rtype = record.pop("type").lower().strip()
-            if rtype == "bookmark":
-                if Article.instapaper.from_bookmark(account, record, folder):
-                    created += 1
-                else:
-                    updated += 1
-
-            elif rtype == "user":
-                account.refresh_from_api(record)
-                account.save()
-
-            elif rtype == "meta":
-                deleted_ids = record.get("delete_ids", None)
-                if deleted_ids:
-                    deleted += Article.instapaper.delete_bookmarks(deleted_ids)
-
-            else:
-                raise ValueError(f"unhandled record type '{rtype}'")
-
-        return created, updated, deleted
-
     def associate(self):
-        # Go through all articles in any folder that don't have a memo to associate.
-        query = Article.objects.filter(account=self.user.instapaper_account)
-        query = query.order_by('-progress_timestamp')
-
-        count = 0
-        for article in query:
-            if not article.read():
-                article.memo = None
-                article.save()
-                continue
-
-            memo = Memo.objects.filter(date=article.progress_timestamp.date()).first()
-            if memo:
-                article.memo = memo
-                article.save()
-                count += 1
-
-        print(f"associated {count} articles")
+        # Associate all articles in any folder with the memo of the day they were read
+        account = self.user.instapaper_account
+        count, changed = Article.instapaper.associate(account)
+        print(f"associated {count} articles ({changed} changed)")
 
     def article_count(self):
         counts = ArticleCounts.objects.daily_counts(self.user.instapaper_account)
@@ -213,8 +183,8 @@ class http_error(object):
 
         if etype == HTTPException:
             if self.debug:
-                print(e.response)
-                print(e.body)
+                print(value.response)
+                print(value.body)
                 return False
             raise CommandError(str(value)) from value
 
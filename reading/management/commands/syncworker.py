@@ -0,0 +1,76 @@
+# reading.management.commands.syncworker
+# Processes queued Instapaper synchronization jobs
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 15:02:41 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: syncworker.py [] benjamin@bengfort.com $
+
+"""
+Processes queued Instapaper synchronization jobs
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import time
+
+from reading.sync import run_job
+from reading.models import SyncJob
+from reading.instapaper import close_pools
+from django.db import close_old_connections
+from django.core.management.base import BaseCommand
+
+
+##########################################################################
+## Command
+##########################################################################
+
+class Command(BaseCommand):
+
+    help = "process queued Instapaper synchronization jobs in the background"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-i", "--interval", type=float, default=5.0, metavar="SECS",
+            help="seconds to wait between polls of the job queue when it is empty"
+        )
+        parser.add_argument(
+            "-s", "--stale", type=int, default=None, metavar="MINS",
+            help="requeue running jobs without a heartbeat for this long (default: "
+            "INSTAPAPER_SYNC_STALE_MINUTES)"
+        )
+        parser.add_argument(
+            "-1", "--once", action="store_true",
+            help="process all queued jobs then exit rather than polling"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                # Ensure database connections are usable between long polls
+                close_old_connections()
+
+                requeued = SyncJob.objects.requeue_stale(options["stale"])
+                if requeued:
+                    self.stderr.write(f"requeued {requeued} stale jobs")
+
+                job = SyncJob.objects.claim()
+                if job is not None:
+                    self.stdout.write(f"processing job {job.pk} for {job.account}")
+                    job = run_job(job)
+                    self.stdout.write(f"job {job.pk} {job.status}: {job.message}")
+                    continue
+
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            return
+        finally:
+            # Close the keep-alive connections to the API held by the session pools
+            close_pools()
@@ -17,13 +17,25 @@ Database managers for reading objecs
 ## Imports
 ##########################################################################
 
-from datetime import date
-from django.db import models
+from datetime import date, timedelta
+from itertools import chain
+from collections import defaultdict
 from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from django.db import models, transaction
+from django.db.models import Count, Q
 from django.contrib.auth import get_user_model
 from reading.utils import parse_bool, parse_timestamp
 
 
+# Fields written by the bulk bookmark ingestion for existing articles
+BOOKMARK_FIELDS = (
+    "url", "title", "description", "hash", "progress", "progress_timestamp",
+    "private_source", "time", "starred", "folder", "deleted", "memo", "modified",
+)
+
+
 ##########################################################################
 ## Articles Manager and Queryset
 ##########################################################################
@@ -37,10 +49,26 @@ class InstapaperQueryset(models.QuerySet):
         not provide any additional filtering - but it is recommended to filter deleted
         articles before running this query.
         """
-        return ",".join([
-            f"{row[0]}:{row[1]}"
-            for row in self.values_list("bookmark_id", "hash")
-        ])
+        return ",".join(self.iter_have())
+
+    def iter_have(self, size=500, chunk_size=2000):
+        """
+        Streams the "have" parameter of the bookmarks API method as comma-separated
+        segments of at most size "bookmark_id:hash" pairs, most recently added first
+        like the pages returned by the API. Rows are iterated with a server-side cursor
+        (where supported) in chunks of chunk_size, so the rows are never held in memory
+        at once.
+        """
+        segment = []
+        rows = self.order_by("-time", "-bookmark_id").values_list("bookmark_id", "hash")
+        for bookmark_id, bookmark_hash in rows.iterator(chunk_size=chunk_size):
+            segment.append(f"{bookmark_id}:{bookmark_hash}")
+            if len(segment) >= size:
+                yield ",".join(segment)
+                segment = []
+
+        if segment:
+            yield ",".join(segment)
 
     def read(self):
         return self.filter(memo__isnull=False)
@@ -62,6 +90,23 @@ class InstapaperQueryset(models.QuerySet):
             year = date.today().year
         return self.filter(time__year=year)
 
+    def counts(self, year=None, memo=None):
+        """
+        Computes the read, unread, archived, and starred counts of the queryset in a
+        single query using conditional aggregation. If a year is specified, archived
+        and starred are year to date counts. If a memo is specified, read is the number
+        of articles read on the day of the memo rather than all read articles.
+        """
+        read = Q(memo=memo) if memo is not None else Q(memo__isnull=False)
+        ytd = Q(time__year=year) if year is not None else Q()
+
+        return self.aggregate(
+            read=Count("pk", filter=read),
+            unread=Count("pk", filter=Q(folder="unread", memo__isnull=True)),
+            archived=Count("pk", filter=Q(folder="archive") & ytd),
+            starred=Count("pk", filter=Q(starred=True) & ytd),
+        )
+
     def account(self, account, active_only=True):
         """
         Filter by account or user. If active_only is True - filters deleted.
@@ -83,9 +128,83 @@ class InstapaperManager(models.Manager):
     def get_queryset(self):
         return InstapaperQueryset(self.model, using=self._db)
 
-    def from_bookmark(self, account, record, folder="unread"):
+    def from_bookmarks(self, account, records, folder="unread", batch_size=500):
         """
-        Create or updates an article from a bookmark record returned from the API.
+        Create or update articles from a page of bookmark records returned from the
+        API using a fixed number of queries: one to fetch the existing articles by
+        bookmark_id, one to fetch the memos for the days the articles were read, then
+        a bulk insert and a bulk update. Existing articles whose Instapaper hash, folder
+        and memo are unchanged are skipped entirely. Returns the number of articles
+        (created, updated, skipped).
+        """
+        # Parse the records, if a bookmark is duplicated in the page, the last wins
+        bookmarks = {}
+        for record in records:
+            bookmark_id, record = self.parse_bookmark(account, record, folder)
+            bookmarks[bookmark_id] = record
+
+        if not bookmarks:
+            return 0, 0, 0
+
+        existing = {
+            article.bookmark_id: article
+            for article in self.filter(account=account, bookmark_id__in=bookmarks)
+        }
+
+        # Apply the records to new or changed articles
+        now = timezone.now()
+        creates, updates, unchanged = [], [], {}
+        for bookmark_id, record in bookmarks.items():
+            if bookmark_id in existing:
+                article = existing[bookmark_id]
+                if (
+                    article.hash is not None
+                    and article.hash == record.get("hash", None)
+                    and article.folder == folder
+                    and not article.deleted
+                ):
+                    unchanged[bookmark_id] = article
+                    continue
+
+                for field, value in record.items():
+                    setattr(article, field, value)
+                article.modified = now
+                updates.append(article)
+            else:
+                creates.append(self.model(bookmark_id=bookmark_id, **record))
+
+        # Associate read articles with the memo for the day of the progress timestamp
+        # using a single query for all of the days read in the page of bookmarks. An
+        # unchanged article is still updated if the memo for the day was added since.
+        read = [
+            article for article in chain(creates, updates, unchanged.values())
+            if article.read()
+        ]
+        if read:
+            Memo = apps.get_model("diary", "Memo")
+            days = {article.progress_timestamp.date() for article in read}
+            memos = Memo.objects.filter(author=account.user, date__in=days)
+            memos = {memo.date: memo for memo in memos}
+            for article in read:
+                memo = memos.get(article.progress_timestamp.date())
+                if memo and memo.pk != article.memo_id:
+                    article.memo = memo
+                    if article.bookmark_id in unchanged:
+                        article.modified = now
+                        updates.append(article)
+
+        with transaction.atomic(using=self.db):
+            if creates:
+                self.bulk_create(creates, batch_size=batch_size)
+            if updates:
+                self.bulk_update(updates, BOOKMARK_FIELDS, batch_size=batch_size)
+
+        return len(creates), len(updates), len(bookmarks) - len(creates) - len(updates)
+
+    def parse_bookmark(self, account, record, folder="unread"):
+        """
+        Parses a bookmark record from the API into the model format, returning the
+        bookmark_id and the field values to create or update the article with.
         """
         # Add account and folder information
         record["folder"] = folder
@@ -101,43 +220,74 @@ class InstapaperManager(models.Manager):
         # so if we're updating a bookmark from the API we must ensure that it is not
         # marked as deleted since we know it's in Instapaper.
         record["deleted"] = False
+        return int(bookmark_id), record
 
-        # Update or create the bookmark
-        article, created = self.update_or_create(
-            bookmark_id=bookmark_id, defaults=record
-        )
-
-        # Associate the article with Memoro if the reading progress is greater than 0
-        # based on the day of the progress timestamp. If progress increases on multiple
-        # days, this will cause the last day to be the Memoro record.
-        if article.read():
-            Memo = apps.get_model("diary", "Memo")
-            memo = Memo.objects.filter(date=article.progress_timestamp.date()).first()
-            if memo:
-                article.memo = memo
-                article.save()
-
-        # Return if the bookmark was created or updated
-        return created
-
-    def delete_bookmarks(self, deleted_ids):
+    def delete_bookmarks(self, deleted_ids, account, folder=None):
         """
         Soft delete articles based on the deleted_ids parameter from the Instapaper API.
+        All matching articles of the account (and folder if given) are flagged as
+        deleted in a single UPDATE statement; returns the number of articles deleted.
+        Bookmark ids are only unique per account, so the account is required.
         """
         # Deleted IDs could be an empty string, just ignore in this case
         if not deleted_ids:
             return 0
 
-        deleted = 0
-        for bookmark_id in deleted_ids.split(","):
-            bookmark_id = int(bookmark_id.strip())
-            article = self.filter(bookmark_id=bookmark_id).first()
-            if article:
-                article.deleted = True
-                article.save()
-                deleted += 1
+        bookmark_ids = {
+            int(bookmark_id)
+            for bookmark_id in deleted_ids.split(",")
+            if bookmark_id.strip()
+        }
+
+        if not bookmark_ids:
+            return 0
+
+        query = self.filter(bookmark_id__in=bookmark_ids, deleted=False)
+        query = query.account(account, active_only=False)
+        if folder is not None:
+            query = query.filter(folder=folder)
+
+        # NOTE: update() does not call save() so modified must be set explicitly
+        return query.update(deleted=True, modified=timezone.now())
+
+    def associate(self, account, batch_size=500):
+        """
+        Associates all of the account's articles with the memo for the day they were
+        read (or clears the memo if the article has not been read). The memo dates are
+        loaded into memory once, the target memo is computed for every article in a
+        single pass, and only the articles whose memo changes are updated in batches
+        grouped by the target memo. Returns the number of (associated, changed)
+        articles.
+        """
+        Memo = apps.get_model("diary", "Memo")
+        memos = dict(
+            Memo.objects.filter(author=account.user).values_list("date", "id")
+        )
+
+        # Compute the target memo of every article, grouping the changes by memo
+        associated = 0
+        changes = defaultdict(list)
+        fields = ("id", "memo_id", "progress", "progress_timestamp", "time", "folder")
+        for article in self.filter(account=account).only(*fields).iterator():
+            if not article.read():
+                target = None
+            elif article.progress_timestamp.date() in memos:
+                target = memos[article.progress_timestamp.date()]
+                associated += 1
+            else:
+                # If there is no memo for the day read, the association is unchanged
+                target = article.memo_id
+
+            if target != article.memo_id:
+                changes[target].append(article.id)
+
+        # Apply the changes with batched updates, one per target memo
+        with transaction.atomic(using=self.db):
+            for target, pks in changes.items():
+                for idx in range(0, len(pks), batch_size):
+                    self.filter(pk__in=pks[idx:idx+batch_size]).update(memo_id=target)
 
-        return deleted
+        return associated, sum(len(pks) for pks in changes.values())
 
     def have(self, account, folder="unread"):
         """
@@ -150,6 +300,15 @@ class InstapaperManager(models.Manager):
         query = query.account(account=account, active_only=True).filter(folder=folder)
         return query.have()
 
+    def iter_have(self, account, folder="unread", size=500):
+        """
+        Streams the "have" parameter for the active articles of the account's folder
+        in segments of at most size bookmarks. See InstapaperQueryset.iter_have.
+        """
+        query = self.get_queryset()
+        query = query.account(account=account, active_only=True).filter(folder=folder)
+        return query.iter_have(size=size)
+
     def read(self):
         return self.get_queryset().read()
 
@@ -168,6 +327,13 @@ class InstapaperManager(models.Manager):
         """
         return self.get_queryset().ytd(year=year)
 
+    def counts(self, account, year=None, memo=None):
+        """
+        Computes the reading counters for the active articles of the account in a
+        single query. See InstapaperQueryset.counts for more details.
+        """
+        return self.account(account).counts(year=year, memo=memo)
+
     def account(self, account, active_only=True):
         """
         Filter by account or user. If active_only is True - filters deleted.
@@ -186,7 +352,9 @@ class ArticleCountsManager(models.Manager):
         Creates or updates the daily counts for a Memo object.
         """
         Memo = apps.get_model("diary", "Memo")
-        memo = Memo.objects.filter(date=date.today(), author=account.user).first()
+        memo = Memo.objects.select_related("article_counts").filter(
+            date=date.today(), author=account.user
+        ).first()
 
         # If there is no memo object, we cannot create the daily_counts - no error
         if not memo:
@@ -194,24 +362,82 @@ class ArticleCountsManager(models.Manager):
 
         # Associate the article counts with the memo
         if not hasattr(memo, "article_counts"):
-            counts = self.create(memo=memo)
+            counts = self.model(memo=memo)
         else:
             counts = memo.article_counts
 
-        # Compute the number of articles read today
-        counts.read = memo.articles.count()
-
-        # Create a queryset for the instapaper account
+        # Compute the number of articles read today, the current unread count, and the
+        # year to date archived and starred counts in a single query.
         Article = apps.get_model("reading", "Article")
-        qs = Article.instapaper.account(account)
-
-        # Add the current unread count for today
-        counts.unread = qs.unread().count()
+        for field, value in Article.instapaper.counts(
+            account, year=memo.date.year, memo=memo
+        ).items():
+            setattr(counts, field, value)
 
-        # Filter for year to date counts
-        qs = qs.ytd(memo.date.year)
-        counts.archived= qs.archived().count()
-        counts.starred = qs.starred().count()
         counts.save()
+        return counts
+
+
+##########################################################################
+## Sync Job Manager
+##########################################################################
+
+class SyncJobManager(models.Manager):
+
+    def enqueue(self, account, parallel=True):
+        """
+        Queues a synchronization job for the account. If the account already has a job
+        that is queued or running, that job is returned instead of creating a new one.
+        """
+        active = (self.model.STATUS.queued, self.model.STATUS.running)
+        job = self.filter(account=account, status__in=active).first()
+
+        if job is not None:
+            return job
+        return self.create(account=account, parallel=parallel)
 
-        return counts
\ No newline at end of file
+    def claim(self):
+        """
+        Claims the oldest queued job for a worker by marking it as running. Rows locked
+        by other workers are skipped so that multiple workers never claim the same job.
+        Returns None if there are no queued jobs.
+        """
+        with transaction.atomic(using=self.db):
+            job = (
+                self.select_for_update(skip_locked=True)
+                .filter(status=self.model.STATUS.queued)
+                .order_by("created")
+                .first()
+            )
+
+            if job is None:
+                return None
+
+            job.status = self.model.STATUS.running
+            job.started = timezone.now()
+            job.message = "synchronizing with Instapaper"
+            job.save()
+            return job
+
+    def requeue_stale(self, minutes=None):
+        """
+        Requeues running jobs whose heartbeat (the modified timestamp, which is updated
+        as the job makes progress) is more than minutes old, e.g. if the worker
+        processing them was stopped. Long synchronizations that are still making
+        progress are not requeued. Defaults to INSTAPAPER_SYNC_STALE_MINUTES. Returns
+        the number of jobs requeued.
+        """
+        if minutes is None:
+            minutes = settings.INSTAPAPER_SYNC_STALE_MINUTES
+
+        cutoff = timezone.now() - timedelta(minutes=minutes)
+        stale = self.filter(status=self.model.STATUS.running, modified__lt=cutoff)
+        return stale.update(
+            status=self.model.STATUS.queued, started=None, modified=timezone.now(),
+        )
+
+    def heartbeat(self, job):
+        """
+        Records that the running job is still making progress so it is not requeued.
+        """
+        return self.filter(pk=job.pk).update(modified=timezone.now())
@@ -0,0 +1,29 @@
+# Generated by Django 3.1.3 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(deleted=False), fields=['account', 'folder', 'time'], name='web_articles_folder_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('deleted', False), ('starred', True)), fields=['account', 'time'], name='web_articles_starred_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['account', '-progress_timestamp'], name='web_articles_progress_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='article',
+            constraint=models.UniqueConstraint(fields=('account', 'bookmark_id'), name='unique_account_bookmark'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.1.3 on 2026-10-18 18:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading', '0002_article_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('status', models.CharField(choices=[('queued', 'queued'), ('running', 'running'), ('succeeded', 'succeeded'), ('failed', 'failed')], default='queued', help_text='The current state of the synchronization job', max_length=16)),
+                ('parallel', models.BooleanField(default=True, help_text='Fetch the folder listings concurrently')),
+                ('message', models.CharField(blank=True, default=None, help_text='A description of the progress or the error of the job', max_length=255, null=True)),
+                ('created_articles', models.PositiveIntegerField(blank=True, default=None, help_text='The number of articles created by the synchronization', null=True)),
+                ('updated_articles', models.PositiveIntegerField(blank=True, default=None, help_text='The number of articles updated by the synchronization', null=True)),
+                ('deleted_articles', models.PositiveIntegerField(blank=True, default=None, help_text='The number of articles deleted by the synchronization', null=True)),
+                ('started', models.DateTimeField(blank=True, default=None, help_text='The time a worker started processing the job', null=True)),
+                ('finished', models.DateTimeField(blank=True, default=None, help_text='The time the job succeeded or failed', null=True)),
+                ('account', models.ForeignKey(help_text='The Instapaper account to synchronize', on_delete=django.db.models.deletion.CASCADE, related_name='sync_jobs', to='reading.instapaperaccount')),
+            ],
+            options={
+                'verbose_name': 'Synchronization Job',
+                'verbose_name_plural': 'Synchronization Jobs',
+                'db_table': 'sync_jobs',
+                'ordering': ('-created',),
+                'get_latest_by': 'created',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='syncjob',
+            index=models.Index(fields=['status', 'created'], name='sync_jobs_status_idx'),
+        ),
+    ]
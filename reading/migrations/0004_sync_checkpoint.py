@@ -0,0 +1,18 @@
+# Generated by Django 3.1.3 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading', '0003_syncjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instapaperaccount',
+            name='sync_checkpoint',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='The progress of an incomplete synchronization to resume from'),
+        ),
+    ]
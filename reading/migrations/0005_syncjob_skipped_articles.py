@@ -0,0 +1,18 @@
+# Generated by Django 3.1.3 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading', '0004_sync_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncjob',
+            name='skipped_articles',
+            field=models.PositiveIntegerField(blank=True, default=None, help_text='The number of unchanged articles skipped by the synchronization', null=True),
+        ),
+    ]
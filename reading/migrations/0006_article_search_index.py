@@ -0,0 +1,25 @@
+# Creates the full-text search index of the articles (see diary.search)
+
+from django.db import migrations
+
+
+def install_index(apps, schema_editor):
+    from diary.search import install_index
+    install_index(schema_editor.connection, "web_articles")
+
+
+def drop_index(apps, schema_editor):
+    from diary.search import drop_index
+    drop_index(schema_editor.connection, "web_articles")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0004_memo_search_index'),
+        ('reading', '0005_syncjob_skipped_articles'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_index, drop_index),
+    ]
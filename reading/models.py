@@ -20,10 +20,13 @@ Database models for the reading app
 import warnings
 
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
+from model_utils import Choices
 from reading.utils import parse_bool
 from model_utils.models import TimeStampedModel
-from reading.managers import InstapaperManager, ArticleCountsManager
+from django.utils.translation import gettext as _
+from reading.managers import InstapaperManager, ArticleCountsManager, SyncJobManager
 
 
 ##########################################################################
@@ -116,6 +119,28 @@ class Article(TimeStampedModel):
         verbose_name = "Web Article"
         verbose_name_plural = "Web Articles"
         unique_together = ("url", "private_source")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "bookmark_id"], name="unique_account_bookmark",
+            ),
+        ]
+        indexes = [
+            # have(), unread(), archived() and ytd() on the active articles of a folder
+            models.Index(
+                fields=["account", "folder", "time"], condition=Q(deleted=False),
+                name="web_articles_folder_time_idx",
+            ),
+            # starred() and starred year to date counts
+            models.Index(
+                fields=["account", "time"], condition=Q(deleted=False, starred=True),
+                name="web_articles_starred_idx",
+            ),
+            # default ordering of an account's articles
+            models.Index(
+                fields=["account", "-progress_timestamp"],
+                name="web_articles_progress_idx",
+            ),
+        ]
 
     # Managers
     objects = models.Manager()
@@ -234,6 +259,11 @@ class InstapaperAccount(TimeStampedModel):
         help_text="The last time the account was synchronized",
     )
 
+    sync_checkpoint = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text="The progress of an incomplete synchronization to resume from",
+    )
+
     class Meta:
         db_table = "instapaper_accounts"
         ordering = ("-modified",)
@@ -274,3 +304,105 @@ class InstapaperAccount(TimeStampedModel):
                     warnings.warn(
                         f"unhandled instapaper account field from API '{field}'"
                     )
+
+
+##########################################################################
+## Background Synchronization Jobs
+##########################################################################
+
+class SyncJob(TimeStampedModel):
+    """
+    A queued request to synchronize an Instapaper account, processed in the background
+    by the syncworker management command so that web requests return immediately. The
+    job records its status and results so that progress can be polled by the client.
+    """
+
+    STATUS = Choices(
+        ("queued", _("queued")),
+        ("running", _("running")),
+        ("succeeded", _("succeeded")),
+        ("failed", _("failed")),
+    )
+
+    account = models.ForeignKey(
+        "reading.InstapaperAccount", models.CASCADE,
+        null=False, blank=False, related_name="sync_jobs",
+        help_text="The Instapaper account to synchronize"
+    )
+
+    status = models.CharField(
+        max_length=16, choices=STATUS, default=STATUS.queued,
+        help_text="The current state of the synchronization job"
+    )
+
+    parallel = models.BooleanField(
+        default=True, help_text="Fetch the folder listings concurrently"
+    )
+
+    message = models.CharField(
+        max_length=255, null=True, blank=True, default=None,
+        help_text="A description of the progress or the error of the job"
+    )
+
+    created_articles = models.PositiveIntegerField(
+        default=None, null=True, blank=True,
+        help_text="The number of articles created by the synchronization"
+    )
+
+    updated_articles = models.PositiveIntegerField(
+        default=None, null=True, blank=True,
+        help_text="The number of articles updated by the synchronization"
+    )
+
+    deleted_articles = models.PositiveIntegerField(
+        default=None, null=True, blank=True,
+        help_text="The number of articles deleted by the synchronization"
+    )
+
+    skipped_articles = models.PositiveIntegerField(
+        default=None, null=True, blank=True,
+        help_text="The number of unchanged articles skipped by the synchronization"
+    )
+
+    started = models.DateTimeField(
+        null=True, blank=True, default=None,
+        help_text="The time a worker started processing the job"
+    )
+
+    finished = models.DateTimeField(
+        null=True, blank=True, default=None,
+        help_text="The time the job succeeded or failed"
+    )
+
+    class Meta:
+        db_table = "sync_jobs"
+        ordering = ("-created",)
+        get_latest_by = "created"
+        verbose_name = "Synchronization Job"
+        verbose_name_plural = "Synchronization Jobs"
+        indexes = [
+            models.Index(fields=["status", "created"], name="sync_jobs_status_idx"),
+        ]
+
+    objects = SyncJobManager()
+
+    def __str__(self):
+        return f"{self.account} synchronization {self.status}"
+
+    @property
+    def done(self):
+        return self.status in (self.STATUS.succeeded, self.STATUS.failed)
+
+    def to_json(self):
+        return {
+            "id": self.pk,
+            "status": self.status,
+            "done": self.done,
+            "message": self.message,
+            "created": self.created_articles,
+            "updated": self.updated_articles,
+            "deleted": self.deleted_articles,
+            "skipped": self.skipped_articles,
+            "started": self.started.isoformat() if self.started else None,
+            "finished": self.finished.isoformat() if self.finished else None,
+        }
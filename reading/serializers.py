@@ -0,0 +1,62 @@
+# reading.serializers
+# Serializers for the reading API
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 23:31:40 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: serializers.py [] benjamin@bengfort.com $
+
+"""
+Serializers for the reading API
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from reading.models import Article
+from rest_framework import serializers
+from memoro.api import DynamicFieldsModelSerializer
+
+
+##########################################################################
+## Serializers
+##########################################################################
+
+class ArticleSerializer(DynamicFieldsModelSerializer):
+    """
+    An article of the requesting user's Instapaper account, which may be associated
+    with one of the user's memos.
+    """
+
+    class Meta:
+        model = Article
+        fields = (
+            "id", "url", "title", "description", "progress", "progress_timestamp",
+            "bookmark_id", "private_source", "time", "starred", "folder", "memo",
+            "deleted", "created", "modified",
+        )
+        read_only_fields = ("deleted",)
+
+    def validate_memo(self, memo):
+        if memo is not None and memo.author_id != self.context["request"].user.id:
+            raise serializers.ValidationError("memo does not exist")
+        return memo
+
+    def validate(self, data):
+        # The account is not a serializer field so DRF does not check the constraint
+        bookmark_id = data.get("bookmark_id", None)
+        if bookmark_id is not None:
+            articles = Article.objects.filter(
+                account__user=self.context["request"].user, bookmark_id=bookmark_id
+            )
+            if self.instance is not None:
+                articles = articles.exclude(pk=self.instance.pk)
+            if articles.exists():
+                raise serializers.ValidationError(
+                    {"bookmark_id": "an article with this bookmark id already exists"}
+                )
+        return data
@@ -0,0 +1,309 @@
+# reading.sync
+# Synchronizes the local reading list with Instapaper
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 14:12:03 2026 -0400
+#
+# Copyright (C) 2020 Bengfort.com
+# For license information, see LICENSE
+#
+# ID: sync.py [] benjamin@bengfort.com $
+
+"""
+Synchronizes the local reading list with Instapaper
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import httplib2
+
+from datetime import date
+from django.db import transaction
+from django.utils import timezone
+from diary.models import Memo, DailySummary
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from reading.instapaper import Instapaper, InstapaperException
+from reading.models import Article, ArticleCounts, SyncJob
+
+
+# NOTE: ignoring the "starred" folder since this duplicates other folders
+FOLDERS = ("unread", "archive")
+
+# Errors that fail a folder rather than the synchronization: API errors and transport
+# errors (e.g. timeouts) that persist after the retries of the client
+SYNC_ERRORS = (InstapaperException, OSError, httplib2.HttpLib2Error)
+
+
+##########################################################################
+## Synchronizer
+##########################################################################
+
+class Synchronizer(object):
+    """
+    Fetches the bookmarks in the built-in and user-created folders of an Instapaper
+    account and writes them to the database. Each folder is walked to completion in
+    pages of at most limit bookmarks. In serial mode each page is written as soon as it
+    is fetched; in parallel mode all folders are fetched at once using a thread per
+    folder (bounded by the client's session pool) and are then written in a single
+    transaction in folder order.
+
+    Because delete_ids are applied only to the folder they were returned for, the
+    have parameter of a folder can be computed before the other folders are written
+    and both modes produce the same results. If a folder cannot be fetched the error
+    is recorded in errors and synchronization continues with the remaining folders.
+
+    A checkpoint is saved on the account after each page is written. If the sync is
+    interrupted (e.g. the worker is stopped), the next sync resumes that run: it skips
+    the folders that were completed and, because the have parameter includes the
+    bookmarks already written, continues the incomplete folders from where they
+    stopped. The checkpoint is cleared whenever a sync runs to the end, even if some
+    folders failed, so that the next sync starts a new run over all of the folders.
+
+    If heartbeat is given, it is called without arguments each time a page is written
+    or a folder is fetched so that callers can tell a long sync from a stopped one.
+    """
+
+    def __init__(self, client, account, user_folders=True, limit=500, heartbeat=None):
+        self.client = client
+        self.account = account
+        self.user_folders = user_folders
+        self.limit = limit
+        self.heartbeat = heartbeat
+        self.results = {}
+        self.errors = {}
+
+    def synchronize(self, parallel=False):
+        """
+        Synchronizes all folders and returns the total (created, updated, deleted,
+        skipped) counts, where skipped bookmarks were returned by the API unchanged.
+        Per-folder counts are stored in results and failures in errors. The
+        account is only marked as synchronized if all folders succeeded.
+        """
+        self.results, self.errors = {}, {}
+        folders = [
+            folder for folder in self.folders()
+            if not self.checkpoint(folder).get("complete", False)
+        ]
+
+        if parallel:
+            # The have of a folder is queried on this thread when a worker is free to
+            # fetch it, so only the haves of the folders being fetched are in memory
+            workers = max(1, min(len(folders), self.client.pool_size))
+            futures, pending = {}, set()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for folder in folders:
+                    while len(pending) >= workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for _ in done:
+                            self.beat()
+
+                    have = ",".join(self.have(folder))
+                    futures[folder] = executor.submit(self.fetch, folder, have)
+                    pending.add(futures[folder])
+
+                for _ in wait(pending).done:
+                    self.beat()
+
+            with transaction.atomic():
+                for folder, future in futures.items():
+                    try:
+                        pages = future.result()
+                    except SYNC_ERRORS as e:
+                        self.errors[folder] = e
+                        continue
+                    self.results[folder] = self.apply(pages, folder)
+
+        else:
+            for folder in folders:
+                pages = self.client.iter_bookmarks(
+                    limit=self.limit, folder_id=folder, have=self.have(folder)
+                )
+
+                try:
+                    self.results[folder] = self.apply(pages, folder)
+                except SYNC_ERRORS as e:
+                    self.errors[folder] = e
+
+        if not self.errors:
+            self.account.last_synchronized = timezone.now()
+
+        # The run is over, failed folders are retried with all others by the next run
+        self.account.sync_checkpoint = {}
+        self.account.save()
+
+        return tuple(
+            sum(counts[idx] for counts in self.results.values()) for idx in range(4)
+        )
+
+    def folders(self):
+        """
+        Returns the ids of the folders to synchronize: the built-in unread and archive
+        folders followed by the user-created folders of the account.
+        """
+        folders = list(FOLDERS)
+        if self.user_folders:
+            try:
+                for record in self.client.folders():
+                    if record.get("type", None) == "folder":
+                        folders.append(str(record["folder_id"]))
+            except SYNC_ERRORS as e:
+                self.errors["folders"] = e
+        return folders
+
+    def have(self, folder):
+        """
+        Returns a generator of the have segments for the bookmarks already stored for
+        the folder, aligned with the page size of the requests.
+        """
+        return Article.instapaper.iter_have(self.account, folder, size=self.limit)
+
+    def fetch(self, folder, have=""):
+        """
+        Fetches all pages of the bookmarks list for the folder (no database access).
+        """
+        return list(self.client.iter_bookmarks(
+            limit=self.limit, folder_id=folder, have=have
+        ))
+
+    def apply(self, pages, folder):
+        """
+        Writes the pages of bookmarks list responses for the folder to the database,
+        saving a checkpoint after each page. Once the folder is complete, the
+        delete_ids of the pages with fewer than limit bookmarks are applied, excluding
+        any bookmarks returned by the pages. The delete_ids of a full page are ignored
+        since they include the bookmarks in have beyond its limit, which may still be
+        in the folder. Returns the number of (created, updated, deleted, skipped)
+        articles.
+        """
+        created, updated, skipped = 0, 0, 0
+        seen, deleted_ids = set(), set()
+        checkpoint = self.checkpoint(folder)
+
+        for page in pages:
+            records, delete_ids = [], set()
+            for record in page:
+                rtype = record.pop("type").lower().strip()
+                if rtype == "bookmark":
+                    seen.add(str(record["bookmark_id"]))
+                    records.append(record)
+
+                elif rtype == "user":
+                    self.account.refresh_from_api(record)
+
+                elif rtype == "meta":
+                    delete_ids.update(
+                        str(record.get("delete_ids", None) or "").split(",")
+                    )
+
+                else:
+                    raise ValueError(f"unhandled record type '{rtype}'")
+
+            # Write all of the bookmarks in the page at once
+            crt, upd, skp = Article.instapaper.from_bookmarks(
+                self.account, records, folder
+            )
+            created += crt
+            updated += upd
+            skipped += skp
+
+            # Only a page that is not full covers all of the bookmarks in the folder
+            if len(records) < self.limit:
+                deleted_ids.update(delete_ids)
+
+            checkpoint["pages"] = checkpoint.get("pages", 0) + 1
+            checkpoint["bookmarks"] = checkpoint.get("bookmarks", 0) + len(records)
+            self.account.save()
+            self.beat()
+
+        deleted = Article.instapaper.delete_bookmarks(
+            ",".join(sorted(deleted_ids - seen - {""})),
+            account=self.account, folder=folder,
+        )
+
+        checkpoint["complete"] = True
+        self.account.save()
+        return created, updated, deleted, skipped
+
+    def beat(self):
+        if self.heartbeat is not None:
+            self.heartbeat()
+
+    def checkpoint(self, folder):
+        """
+        Returns the checkpoint of the folder stored on the account, creating it if
+        required. Changes to the checkpoint are saved with the account.
+        """
+        checkpoints = self.account.sync_checkpoint
+        if not isinstance(checkpoints, dict):
+            checkpoints = self.account.sync_checkpoint = {}
+        return checkpoints.setdefault(folder, {})
+
+
+def summarize(account):
+    """
+    Creates the daily counts for today's Memo and refreshes the daily summaries of the
+    year after a synchronization of the account, whether run by a job or the CLI.
+    """
+    ArticleCounts.objects.daily_counts(account)
+
+    # Articles may have been associated with any memo of the year
+    DailySummary.objects.refresh(Memo.objects.filter(
+        author=account.user_id, date__year=date.today().year
+    ))
+
+
+##########################################################################
+## Background Jobs
+##########################################################################
+
+def run_job(job):
+    """
+    Runs a claimed synchronization job using the cached access token of the account,
+    then summarizes the account. The results or the error of the synchronization are
+    saved on the job.
+    """
+    account = job.account
+    try:
+        if not account.has_cached_oauth():
+            raise InstapaperException(1039, "account does not have an access token")
+
+        # Verify the credentials and update the account
+        client = Instapaper.cached_access_token(
+            account.oauth_token, account.oauth_token_secret
+        )
+        for item in client.verify_credentials():
+            if item["type"] == "user":
+                account.refresh_from_api(item)
+                account.save()
+
+        sync = Synchronizer(
+            client, account, heartbeat=lambda: SyncJob.objects.heartbeat(job)
+        )
+        counts = sync.synchronize(parallel=job.parallel)
+        for e in sync.errors.values():
+            raise e
+
+        summarize(account)
+    except SYNC_ERRORS as e:
+        job.status = SyncJob.STATUS.failed
+        job.message = f"synchronization failed ({e})"
+    except Exception as e:
+        # Do not leave the job running, otherwise it would be requeued indefinitely
+        job.status = SyncJob.STATUS.failed
+        job.message = f"unhandled synchronization error ({e})"
+    else:
+        job.status = SyncJob.STATUS.succeeded
+        (
+            job.created_articles, job.updated_articles,
+            job.deleted_articles, job.skipped_articles,
+        ) = counts
+        job.message = (
+            "Instapaper synchronized: {} articles created, {} updated, {} deleted, "
+            "{} unchanged"
+        ).format(*counts)
+
+    job.finished = timezone.now()
+    job.save()
+    return job
@@ -17,6 +17,1525 @@ Test cases for the reading app
 ## Imports
 ##########################################################################
 
+import io
+import os
+import json
+import time
+import socket
+import asyncio
+import httplib2
+import threading
+import oauth2 as oauth
+
+from unittest import mock
+from datetime import date, datetime, timedelta, timezone
+
+from tempfile import TemporaryDirectory
 from django.test import TestCase
+from django.urls import reverse
+from django.core.management import CommandError, call_command
+from django.utils import timezone as tz
+from diary.models import Memo
+from reading.sync import FOLDERS, Synchronizer, run_job
+from reading.fakeinstapaper import FakeInstapaper, Library
+from reading.benchmark import STAGES, SyncBenchmark, compare
+from reading.models import Article, ArticleCounts, InstapaperAccount, SyncJob
+from reading.instapaper import Instapaper, HTTPException, InstapaperException
+from reading.instapaper import AsyncInstapaper, SessionPool, close_pools
+from reading.instapaper import RetryPolicy, TokenBucket, is_rate_limited
+from memoro.testing import PerformanceTestMixin, create_dataset
+from django.contrib.auth import get_user_model
+
+
+##########################################################################
+## Helpers
+##########################################################################
+
+def bookmark(bookmark_id, progress=0.0, read_on=None, **kwargs):
+    """
+    Returns a bookmark record as returned by the Instapaper bookmarks/list method
+    (without the type). If read_on is specified, progress is timestamped at noon.
+    """
+    timestamp = 0
+    if read_on is not None:
+        timestamp = int(datetime(
+            read_on.year, read_on.month, read_on.day, 12, tzinfo=timezone.utc
+        ).timestamp())
+
+    record = {
+        "bookmark_id": bookmark_id,
+        "url": f"https://example.com/{bookmark_id}",
+        "title": f"Article {bookmark_id}",
+        "description": "",
+        "hash": f"hash{bookmark_id}",
+        "progress": progress,
+        "progress_timestamp": timestamp,
+        "private_source": "",
+        "time": 1577880000,
+        "starred": "0",
+    }
+    record.update(kwargs)
+    return record
+
+
+class ReadingTestCase(TestCase):
+    """
+    Creates a user with an Instapaper account to add bookmarks to.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user("reader", "reader@example.com", "secret")
+        cls.account = InstapaperAccount.objects.create(user=cls.user)
+
+
+##########################################################################
+## Manager Tests
+##########################################################################
+
+class FromBookmarksTests(ReadingTestCase):
+    """
+    Test the bulk ingestion of pages of bookmark records
+    """
+
+    def test_create_and_update(self):
+        """
+        Ensure a page of bookmarks is created then updated in a fixed number of queries
+        """
+        records = [bookmark(idx) for idx in range(1, 21)]
+        with self.assertNumQueries(4):
+            counts = Article.instapaper.from_bookmarks(self.account, records, "unread")
+        self.assertEqual(counts, (20, 0, 0))
+        self.assertEqual(Article.objects.filter(account=self.account).count(), 20)
+
+        records = [bookmark(idx, title="Changed") for idx in range(11, 31)]
+        with self.assertNumQueries(5):
+            counts = Article.instapaper.from_bookmarks(self.account, records, "archive")
+        self.assertEqual(counts, (10, 10, 0))
+        self.assertEqual(Article.objects.filter(folder="archive").count(), 20)
+        self.assertEqual(Article.objects.filter(title="Changed").count(), 20)
+
+    def test_duplicate_bookmarks(self):
+        """
+        Ensure a bookmark duplicated in a page is only written once, the last wins
+        """
+        records = [bookmark(1), bookmark(2), bookmark(1, title="Last")]
+        self.assertEqual(
+            Article.instapaper.from_bookmarks(self.account, records), (2, 0, 0)
+        )
+        self.assertEqual(Article.objects.get(bookmark_id=1).title, "Last")
+
+    def test_no_bookmarks(self):
+        """
+        Ensure an empty page does not query the database
+        """
+        with self.assertNumQueries(0):
+            created = Article.instapaper.from_bookmarks(self.account, [])
+        self.assertEqual(created, (0, 0, 0))
+
+    def test_skip_unchanged(self):
+        """
+        Ensure bookmarks with an unchanged hash, folder and memo are not written
+        """
+        Article.instapaper.from_bookmarks(
+            self.account, [bookmark(idx) for idx in range(1, 11)]
+        )
+        modified = dict(Article.objects.values_list("bookmark_id", "modified"))
+
+        records = [bookmark(idx) for idx in range(1, 11)]
+        records[0]["hash"] = "changed"
+        with self.assertNumQueries(4):
+            counts = Article.instapaper.from_bookmarks(self.account, records)
+        self.assertEqual(counts, (0, 1, 9))
+        self.assertEqual(Article.objects.get(bookmark_id=2).modified, modified[2])
+        self.assertGreater(Article.objects.get(bookmark_id=1).modified, modified[1])
+
+        # Moving a bookmark to another folder is a change even if the hash is not
+        counts = Article.instapaper.from_bookmarks(
+            self.account, [bookmark(2)], folder="archive"
+        )
+        self.assertEqual(counts, (0, 1, 0))
+
+    def test_skip_unchanged_new_memo(self):
+        """
+        Ensure an unchanged read bookmark is updated if the memo was added since
+        """
+        records = [bookmark(1, progress=1.0, read_on=date(2020, 6, 1))]
+        Article.instapaper.from_bookmarks(self.account, records)
+        self.assertIsNone(Article.objects.get(bookmark_id=1).memo)
+
+        memo = Memo.objects.create(date=date(2020, 6, 1), author=self.user)
+        records = [bookmark(1, progress=1.0, read_on=date(2020, 6, 1))]
+        self.assertEqual(
+            Article.instapaper.from_bookmarks(self.account, records), (0, 1, 0)
+        )
+        self.assertEqual(Article.objects.get(bookmark_id=1).memo, memo)
+
+        records = [bookmark(1, progress=1.0, read_on=date(2020, 6, 1))]
+        self.assertEqual(
+            Article.instapaper.from_bookmarks(self.account, records), (0, 0, 1)
+        )
+
+    def test_associate_read(self):
+        """
+        Ensure read articles are associated with the memo of the day they were read
+        """
+        memo = Memo.objects.create(date=date(2020, 6, 1), author=self.user)
+        User = get_user_model()
+        other = User.objects.create_user("other", "other@example.com", "secret")
+        Memo.objects.create(date=date(2020, 6, 2), author=other)
+        records = [
+            bookmark(1, progress=0.5, read_on=memo.date),
+            bookmark(2, progress=0.5, read_on=date(2020, 6, 2)),
+            bookmark(3),
+        ]
+        Article.instapaper.from_bookmarks(self.account, records)
+
+        # Articles are never associated with the memos of other users
+        self.assertEqual(Article.objects.get(bookmark_id=1).memo, memo)
+        self.assertIsNone(Article.objects.get(bookmark_id=2).memo)
+        self.assertIsNone(Article.objects.get(bookmark_id=3).memo)
+
+
+class DeleteBookmarksTests(ReadingTestCase):
+    """
+    Test the soft delete of the delete_ids returned by the bookmarks API
+    """
+
+    def setUp(self):
+        Article.instapaper.from_bookmarks(
+            self.account, [bookmark(idx) for idx in range(1, 11)]
+        )
+
+    def test_delete_bookmarks(self):
+        """
+        Ensure the delete_ids of the account are soft deleted in a single query
+        """
+        with self.assertNumQueries(1):
+            deleted = Article.instapaper.delete_bookmarks("1,2, 3,,42", self.account)
+
+        self.assertEqual(deleted, 3)
+        deleted = Article.objects.filter(deleted=True)
+        self.assertEqual(
+            set(deleted.values_list("bookmark_id", flat=True)), {1, 2, 3}
+        )
+
+        # Articles that are already deleted are not counted again
+        self.assertEqual(Article.instapaper.delete_bookmarks("3,4", self.account), 1)
+
+    def test_empty_delete_ids(self):
+        """
+        Ensure empty delete_ids do not query the database
+        """
+        with self.assertNumQueries(0):
+            self.assertEqual(Article.instapaper.delete_bookmarks("", self.account), 0)
+            deleted = Article.instapaper.delete_bookmarks(" , ", self.account)
+        self.assertEqual(deleted, 0)
+
+    def test_other_accounts(self):
+        """
+        Ensure the articles of other accounts with the same bookmark_id are not deleted
+        """
+        User = get_user_model()
+        other = InstapaperAccount.objects.create(
+            user=User.objects.create_user("other", "other@example.com", "secret")
+        )
+        Article.instapaper.from_bookmarks(
+            other, [bookmark(1, url="https://example.com/other")]
+        )
+
+        self.assertEqual(Article.instapaper.delete_bookmarks("1", self.account), 1)
+        self.assertFalse(Article.objects.get(account=other, bookmark_id=1).deleted)
+
+    def test_undelete(self):
+        """
+        Ensure a deleted bookmark that is returned by the API again is restored
+        """
+        Article.instapaper.delete_bookmarks("1", self.account)
+        Article.instapaper.from_bookmarks(self.account, [bookmark(1)])
+        self.assertFalse(Article.objects.get(bookmark_id=1).deleted)
+
+
+class AssociateTests(ReadingTestCase):
+    """
+    Test the association of the articles of an account with memos
+    """
+
+    def test_associate(self):
+        """
+        Ensure articles are associated with the memo of the day read in batches
+        """
+        days = [date(2020, 6, day) for day in range(1, 6)]
+        Article.instapaper.from_bookmarks(self.account, [
+            bookmark(idx, progress=0.5, read_on=days[idx % 5]) for idx in range(1, 21)
+        ] + [bookmark(idx) for idx in range(21, 26)])
+        self.assertFalse(Article.objects.filter(memo__isnull=False).exists())
+
+        memos = [Memo.objects.create(date=day, author=self.user) for day in days[:4]]
+        self.assertEqual(Article.instapaper.associate(self.account), (16, 16))
+        for memo in memos:
+            self.assertEqual(memo.articles.count(), 4)
+
+        # A second pass only reads the memos and articles (in a savepoint)
+        with self.assertNumQueries(4):
+            self.assertEqual(Article.instapaper.associate(self.account), (16, 0))
+
+    def test_unread(self):
+        """
+        Ensure the memo of articles that are no longer read is cleared
+        """
+        memo = Memo.objects.create(date=date(2020, 6, 1), author=self.user)
+        Article.instapaper.from_bookmarks(
+            self.account, [bookmark(1, progress=0.5, read_on=memo.date)]
+        )
+        self.assertEqual(memo.articles.count(), 1)
+
+        Article.objects.filter(bookmark_id=1).update(progress=0.0)
+        self.assertEqual(Article.instapaper.associate(self.account), (0, 1))
+        self.assertEqual(memo.articles.count(), 0)
+
+
+class CountsTests(ReadingTestCase):
+    """
+    Test the reading counters computed with conditional aggregation
+    """
+
+    def setUp(self):
+        self.today = date.today()
+        self.memo = Memo.objects.create(date=self.today, author=self.user)
+
+        # Three read today and one read last year (two archived), two unread of which
+        # one is starred, three archived this year (one starred) and one deleted.
+        this_year = datetime(self.today.year, 1, 2, 12, tzinfo=timezone.utc)
+        this_year = int(this_year.timestamp())
+        last_year = this_year - 3 * 86400
+        records = {
+            "archive": [
+                bookmark(1, progress=1.0, read_on=self.today, time=this_year),
+                bookmark(2, progress=1.0, read_on=self.today, time=last_year),
+                bookmark(3, time=this_year, starred="1"),
+                bookmark(4, time=this_year),
+            ],
+            "unread": [
+                bookmark(5, progress=0.5, read_on=self.today),
+                bookmark(6, progress=0.5, read_on=date(2019, 1, 1)),
+                bookmark(7), bookmark(8, starred="1"), bookmark(9),
+            ],
+        }
+        for folder, bookmarks in records.items():
+            Article.instapaper.from_bookmarks(self.account, bookmarks, folder)
+
+        Memo.objects.create(date=date(2019, 1, 1), author=self.user)
+        Article.instapaper.associate(self.account)
+        Article.instapaper.delete_bookmarks("9", self.account)
+
+    def test_counts(self):
+        """
+        Ensure all reading counters are computed in a single query
+        """
+        with self.assertNumQueries(1):
+            counts = Article.instapaper.counts(self.account)
+        self.assertEqual(
+            counts, {"read": 4, "unread": 2, "archived": 4, "starred": 2}
+        )
+
+        counts = Article.instapaper.counts(self.account, year=self.today.year)
+        self.assertEqual(counts["archived"], 3)
+        self.assertEqual(counts["starred"], 1)
+
+        counts = Article.instapaper.counts(self.account, memo=self.memo)
+        self.assertEqual(counts["read"], 3)
+
+    def test_daily_counts(self):
+        """
+        Ensure the daily counts of today's memo are created then updated
+        """
+        counts = ArticleCounts.objects.daily_counts(self.account)
+        self.assertEqual(counts.memo, self.memo)
+        self.assertEqual(
+            (counts.read, counts.unread, counts.archived, counts.starred),
+            (3, 2, 3, 1),
+        )
+
+        Article.instapaper.delete_bookmarks("8", self.account)
+        with self.assertNumQueries(3):
+            counts = ArticleCounts.objects.daily_counts(self.account)
+        self.assertEqual(counts.unread, 1)
+        self.assertEqual(ArticleCounts.objects.count(), 1)
+
+    def test_daily_counts_no_memo(self):
+        """
+        Ensure daily counts are not created without a memo for today
+        """
+        self.memo.delete()
+        self.assertIsNone(ArticleCounts.objects.daily_counts(self.account))
+        self.assertFalse(ArticleCounts.objects.exists())
+
+
+##########################################################################
+## Client Tests
+##########################################################################
+
+class SessionPoolTests(TestCase):
+    """
+    Test the keep-alive OAuth session pool of the Instapaper client
+    """
+
+    def setUp(self):
+        self.consumer = oauth.Consumer("key", "secret")
+
+    def tearDown(self):
+        close_pools()
+
+    def test_checkout(self):
+        """
+        Ensure idle sessions are reused and sessions checked out at once are distinct
+        """
+        pool = SessionPool(self.consumer, size=2)
+        with pool.checkout() as session:
+            pass
+
+        with pool.checkout() as first:
+            with pool.checkout() as second:
+                self.assertIs(first, session)
+                self.assertIsNot(first, second)
+
+    def test_bounded(self):
+        """
+        Ensure checkouts block while all of the sessions in the pool are in use
+        """
+        pool = SessionPool(self.consumer, size=1)
+        checked_out = threading.Event()
+
+        def checkout():
+            with pool.checkout():
+                checked_out.set()
+
+        with pool.checkout():
+            thread = threading.Thread(target=checkout)
+            thread.start()
+            self.assertFalse(checked_out.wait(0.1))
+
+        self.assertTrue(checked_out.wait(1))
+        thread.join()
+
+    def test_discard_on_error(self):
+        """
+        Ensure a session is not returned to the pool if its request raised an error
+        """
+        pool = SessionPool(self.consumer, size=1)
+        with self.assertRaises(OSError):
+            with pool.checkout() as session:
+                raise OSError("connection reset")
+
+        with pool.checkout() as other:
+            self.assertIsNot(session, other)
+
+    def test_request(self):
+        """
+        Ensure the pool sends requests with a pooled session
+        """
+        pool = SessionPool(self.consumer)
+        response = ("response", b"content")
+        with mock.patch.object(oauth.Client, "request", return_value=response) as req:
+            self.assertEqual(pool.request("https://example.com", "POST"), response)
+        req.assert_called_once_with(
+            "https://example.com", method="POST", body=b"", headers=None
+        )
+
+    def test_shared_pools(self):
+        """
+        Ensure clients with the same consumer and access token share a pool
+        """
+        clients = [
+            Instapaper.cached_access_token(token, "secret", "key", "secret")
+            for token in ("a", "a", "b")
+        ]
+        self.assertIs(clients[0].session, clients[1].session)
+        self.assertIsNot(clients[0].session, clients[2].session)
+
+        close_pools()
+        client = Instapaper.cached_access_token("a", "secret", "key", "secret")
+        self.assertIsNot(client.session, clients[0].session)
+
+
+def response(status=200, content=b"[]", **headers):
+    """
+    Returns a (response, content) pair as returned by an httplib2 request.
+    """
+    headers["status"] = str(status)
+    return httplib2.Response(headers), content
+
+
+class RetryTests(TestCase):
+    """
+    Test the retries, backoff and pacing of Instapaper API requests
+    """
+
+    def setUp(self):
+        self.client = Instapaper.cached_access_token(
+            "token", "secret", "key", "secret",
+            retry=RetryPolicy(max_retries=3, backoff=0.5, jitter=False),
+        )
+
+        patcher = mock.patch("reading.instapaper.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        close_pools()
+
+    def test_backoff(self):
+        """
+        Ensure the backoff is exponential, capped and honors Retry-After headers
+        """
+        policy = RetryPolicy(max_retries=10, backoff=0.5, max_backoff=3, jitter=False)
+        self.assertEqual([policy.delay(idx) for idx in range(4)], [0.5, 1, 2, 3])
+        self.assertEqual(policy.delay(0, response(429, **{"retry-after": "2"})[0]), 2)
+        self.assertIsNone(policy.delay(0, response(429, **{"retry-after": "60"})[0]))
+
+        self.assertTrue(policy.should_retry(0))
+        self.assertTrue(policy.should_retry(9, 503))
+        self.assertFalse(policy.should_retry(0, 404))
+        self.assertFalse(policy.should_retry(10, 503))
+
+        policy = RetryPolicy(backoff=0.5, jitter=True)
+        self.assertTrue(all(0 <= policy.delay(2) <= 2 for _ in range(100)))
+
+    def test_rate_limited(self):
+        """
+        Ensure throttling statuses and the rate-limit API error are detected
+        """
+        content = json.dumps([{"type": "error", "error_code": 1040, "message": ""}])
+        self.assertTrue(is_rate_limited(*response(429)))
+        self.assertTrue(is_rate_limited(*response(400, content.encode())))
+        self.assertFalse(is_rate_limited(*response(400, b"not json")))
+        self.assertFalse(is_rate_limited(*response(200)))
+
+    def test_retry(self):
+        """
+        Ensure retryable responses and connection errors are retried
+        """
+        responses = [
+            response(503), OSError("connection reset"),
+            response(429, **{"retry-after": "5"}), response(200, b'[{"type": "meta"}]'),
+        ]
+        with mock.patch.object(SessionPool, "request", side_effect=responses):
+            self.assertEqual(self.client.folders(), [{"type": "meta"}])
+
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [0.5, 1, 5])
+        self.assertEqual(self.client.stats["requests"], 4)
+        self.assertEqual(self.client.stats["retries"], 3)
+        self.assertEqual(self.client.stats["throttled"], 2)
+
+    def test_retries_exhausted(self):
+        """
+        Ensure the last response is handled once the retries are exhausted
+        """
+        with mock.patch.object(SessionPool, "request", return_value=response(500)):
+            with self.assertRaises(HTTPException) as ctx:
+                self.client.folders()
+
+        self.assertEqual(ctx.exception.code, 500)
+        self.assertEqual(self.client.stats["requests"], 4)
+        self.assertEqual(self.client.stats["failures"], 1)
+
+        with mock.patch.object(SessionPool, "request", side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.client.folders()
+
+    def test_not_retried(self):
+        """
+        Ensure client errors are not retried
+        """
+        with mock.patch.object(SessionPool, "request", return_value=response(403)):
+            with self.assertRaises(HTTPException):
+                self.client.folders()
+
+        self.sleep.assert_not_called()
+        self.assertEqual(self.client.stats["requests"], 1)
+
+    def test_not_idempotent(self):
+        """
+        Ensure requests that are not idempotent are only retried when throttled
+        """
+        for error in (response(500), response(502), OSError("connection reset")):
+            with mock.patch.object(SessionPool, "request", side_effect=[error]):
+                with self.assertRaises((HTTPException, OSError)):
+                    self.client.add_folder("Reading")
+
+        self.sleep.assert_not_called()
+        self.assertEqual(self.client.stats["requests"], 3)
+
+        responses = [
+            response(429), response(503),
+            response(200, b'[{"type": "folder", "folder_id": 1}]'),
+        ]
+        with mock.patch.object(SessionPool, "request", side_effect=responses):
+            folders = self.client.add_folder("Reading")
+        self.assertEqual(folders, [{"type": "folder", "folder_id": 1}])
+        self.assertEqual(self.client.stats["retries"], 2)
+
+        with mock.patch.object(SessionPool, "request", side_effect=responses[1:]):
+            self.client.add_bookmark("https://example.com/")
+        with mock.patch.object(SessionPool, "request", side_effect=responses[1:]):
+            self.client.add_highlight(1, "text")
+        self.assertEqual(self.client.stats["retries"], 4)
+
+    def test_token_bucket(self):
+        """
+        Ensure the token bucket allows a burst then paces requests to the rate
+        """
+        bucket = TokenBucket(10, capacity=2)
+        with mock.patch("reading.instapaper.time.monotonic", return_value=100.0):
+            bucket.updated = 100.0
+            waits = [bucket.acquire() for _ in range(4)]
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1)
+        self.assertAlmostEqual(waits[3], 0.2)
+
+
+##########################################################################
+## Synchronization Tests
+##########################################################################
+
+class LibraryClient(Instapaper):
+    """
+    An Instapaper client that serves the bookmarks list from an in-memory library of
+    {folder: {bookmark_id: record}}, newest (highest id) first, omitting the bookmarks
+    in have with the same hash. Like the API, the have bookmarks that would not have
+    appeared within the limit are returned as delete_ids: those no longer in the folder
+    and, if the page is full, those older than its last bookmark. Requests for the
+    folders in failures raise the error (by default an InstapaperException).
+    """
+
+    def __init__(self, library, failures=(), error=None):
+        super(LibraryClient, self).__init__("key", "secret")
+        self.library = library
+        self.failures = set(failures)
+        self.error = error
+        self.requests = []
+
+    def fail(self):
+        raise self.error or InstapaperException(1500, "Unexpected service error")
+
+    def verify_credentials(self):
+        return [{"type": "user", "user_id": 42, "username": "reader@example.com"}]
+
+    def folders(self):
+        if "folders" in self.failures:
+            self.fail()
+        return [
+            {"type": "folder", "folder_id": int(folder)}
+            for folder in self.library if folder not in FOLDERS
+        ]
+
+    def bookmarks(self, limit=25, folder_id="unread", have="", highlights=""):
+        self.requests.append((folder_id, have))
+        if folder_id in self.failures:
+            self.fail()
+
+        have = dict(item.split(":")[:2] for item in have.split(",") if item)
+        records = self.library.get(folder_id, {})
+
+        # The window is the bookmarks up to the last bookmark of a full page
+        bookmarks, window = [], set()
+        for bid, record in sorted(records.items(), reverse=True):
+            if len(bookmarks) == limit:
+                break
+            window.add(str(bid))
+            if have.get(str(bid), None) != record["hash"]:
+                bookmarks.append(dict(record, type="bookmark"))
+
+        delete_ids = [bid for bid in have if bid not in window]
+        return [
+            {"type": "meta", "delete_ids": ",".join(delete_ids)},
+            {"type": "user", "user_id": 42, "username": "reader@example.com"},
+        ] + bookmarks
+
+
+class SynchronizerTests(ReadingTestCase):
+    """
+    Test the synchronization of the folders of an Instapaper account
+    """
+
+    def setUp(self):
+        self.account.refresh_from_db()
+        self.library = {
+            "unread": {idx: bookmark(idx) for idx in range(1, 4)},
+            "archive": {idx: bookmark(idx) for idx in range(4, 6)},
+            "100": {6: bookmark(6)},
+        }
+
+    def synchronize(self, parallel=False, failures=(), error=None):
+        client = LibraryClient(self.library, failures, error)
+        sync = Synchronizer(client, self.account)
+        return sync, sync.synchronize(parallel=parallel)
+
+    def test_synchronize(self):
+        """
+        Ensure all folders are synchronized and later changes are applied
+        """
+        sync, counts = self.synchronize()
+        self.assertEqual(counts, (6, 0, 0, 0))
+        self.assertEqual(sync.results, {
+            "unread": (3, 0, 0, 0), "archive": (2, 0, 0, 0), "100": (1, 0, 0, 0),
+        })
+        self.assertEqual(sync.errors, {})
+        self.assertEqual(Article.objects.filter(folder="100").count(), 1)
+        self.assertEqual(self.account.account_id, 42)
+        self.assertIsNotNone(self.account.last_synchronized)
+
+        # Archive a bookmark, read another and delete one from Instapaper
+        self.library["archive"][3] = self.library["unread"].pop(3)
+        self.library["unread"][2] = bookmark(2, progress=0.5, hash="read")
+        del self.library["100"][6]
+
+        sync, counts = self.synchronize()
+        self.assertEqual(counts, (0, 2, 2, 0))
+        self.assertEqual(Article.objects.get(bookmark_id=3).folder, "archive")
+        self.assertEqual(Article.objects.get(bookmark_id=2).progress, 0.5)
+        self.assertTrue(Article.objects.get(bookmark_id=6).deleted)
+
+        # The archived bookmark is deleted from unread before it is moved to archive
+        self.assertFalse(Article.objects.get(bookmark_id=3).deleted)
+
+    def test_parallel(self):
+        """
+        Ensure parallel synchronization produces the same results as serial
+        """
+        _, counts = self.synchronize(parallel=True)
+        self.assertEqual(counts, (6, 0, 0, 0))
+
+        self.library["archive"][3] = self.library["unread"].pop(3)
+        del self.library["100"][6]
+
+        _, counts = self.synchronize(parallel=True)
+        self.assertEqual(counts, (0, 1, 2, 0))
+        self.assertEqual(Article.objects.get(bookmark_id=3).folder, "archive")
+        self.assertFalse(Article.objects.get(bookmark_id=3).deleted)
+        self.assertTrue(Article.objects.get(bookmark_id=6).deleted)
+
+    def test_parallel_have(self):
+        """
+        Ensure the have of a folder is only queried once a worker is free to fetch it
+        """
+        client = LibraryClient(self.library)
+        client.pool_size = 2
+        sync = Synchronizer(client, self.account)
+        events = []
+
+        def have(folder):
+            events.append(("have", folder))
+            return Article.instapaper.iter_have(self.account, folder)
+
+        def bookmarks(**kwargs):
+            # Holds the first fetch until the have of the second folder is queried
+            if kwargs["folder_id"] == "unread":
+                time.sleep(0.1)
+            events.append(("fetch", kwargs["folder_id"]))
+            return LibraryClient.bookmarks(client, **kwargs)
+
+        with mock.patch.object(sync, "have", side_effect=have):
+            with mock.patch.object(client, "bookmarks", side_effect=bookmarks):
+                self.assertEqual(sync.synchronize(parallel=True), (6, 0, 0, 0))
+
+        # The third have waits for the archive fetch to complete and free its worker
+        self.assertEqual(events, [
+            ("have", "unread"), ("have", "archive"), ("fetch", "archive"),
+            ("have", "100"), ("fetch", "100"), ("fetch", "unread"),
+        ])
+
+    def test_errors(self):
+        """
+        Ensure a failed folder does not stop the synchronization of other folders
+        """
+        for parallel in (False, True):
+            sync, counts = self.synchronize(parallel, failures={"archive"})
+            self.assertEqual(set(sync.errors), {"archive"})
+            self.assertEqual(set(sync.results), {"unread", "100"})
+            self.assertIsNone(self.account.last_synchronized)
+
+        sync, _ = self.synchronize(failures={"folders"})
+        self.assertEqual(set(sync.errors), {"folders"})
+        self.assertEqual(set(sync.results), {"unread", "archive"})
+
+    def test_transport_errors(self):
+        """
+        Ensure transport errors that outlast the retries only fail their folder
+        """
+        errors = (
+            socket.timeout("timed out"), ConnectionResetError("connection reset"),
+            httplib2.ServerNotFoundError("unable to find the server"),
+        )
+        for parallel in (False, True):
+            for error in errors:
+                sync, counts = self.synchronize(parallel, {"archive", "folders"}, error)
+                self.assertEqual(sync.errors, {"archive": error, "folders": error})
+                self.assertEqual(set(sync.results), {"unread"})
+                self.assertIsNone(self.account.last_synchronized)
+
+        self.assertEqual(Article.objects.filter(folder="unread").count(), 3)
+
+
+##########################################################################
+## Background Job Tests
+##########################################################################
+
+class SyncJobTests(ReadingTestCase):
+    """
+    Test the queue and processing of background synchronization jobs
+    """
+
+    def setUp(self):
+        self.account.oauth_token = "token"
+        self.account.oauth_token_secret = "secret"
+        self.account.save()
+
+        self.library = {"unread": {idx: bookmark(idx) for idx in range(1, 4)}}
+        patcher = mock.patch(
+            "reading.sync.Instapaper.cached_access_token",
+            return_value=LibraryClient(self.library),
+        )
+        self.cached_access_token = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enqueue(self):
+        """
+        Ensure an account only has a single queued or running job
+        """
+        job = SyncJob.objects.enqueue(self.account)
+        self.assertEqual(job.status, SyncJob.STATUS.queued)
+        self.assertEqual(SyncJob.objects.enqueue(self.account), job)
+
+        self.assertEqual(SyncJob.objects.claim(), job)
+        self.assertEqual(SyncJob.objects.enqueue(self.account), job)
+
+        run_job(job)
+        self.assertNotEqual(SyncJob.objects.enqueue(self.account), job)
+
+    def test_claim(self):
+        """
+        Ensure workers claim the oldest queued job once
+        """
+        User = get_user_model()
+        other = InstapaperAccount.objects.create(
+            user=User.objects.create_user("other", "other@example.com", "secret")
+        )
+        first = SyncJob.objects.enqueue(self.account)
+        second = SyncJob.objects.enqueue(other)
+
+        job = SyncJob.objects.claim()
+        self.assertEqual(job, first)
+        self.assertEqual(job.status, SyncJob.STATUS.running)
+        self.assertIsNotNone(job.started)
+
+        self.assertEqual(SyncJob.objects.claim(), second)
+        self.assertIsNone(SyncJob.objects.claim())
+
+    def test_requeue_stale(self):
+        """
+        Ensure running jobs without a heartbeat for longer than the timeout are requeued
+        """
+        job = SyncJob.objects.enqueue(self.account)
+        SyncJob.objects.claim()
+        self.assertEqual(SyncJob.objects.requeue_stale(minutes=30), 0)
+
+        # A long running job that is still making progress is not requeued
+        SyncJob.objects.filter(pk=job.pk).update(
+            started=tz.now() - timedelta(minutes=60),
+            modified=tz.now() - timedelta(minutes=31),
+        )
+        SyncJob.objects.heartbeat(job)
+        self.assertEqual(SyncJob.objects.requeue_stale(minutes=30), 0)
+
+        SyncJob.objects.filter(pk=job.pk).update(
+            modified=tz.now() - timedelta(minutes=31)
+        )
+        self.assertEqual(SyncJob.objects.requeue_stale(minutes=30), 1)
+        self.assertEqual(SyncJob.objects.claim(), job)
+
+        # The timeout defaults to the stale minutes setting
+        SyncJob.objects.filter(pk=job.pk).update(
+            modified=tz.now() - timedelta(minutes=10)
+        )
+        with self.settings(INSTAPAPER_SYNC_STALE_MINUTES=15):
+            self.assertEqual(SyncJob.objects.requeue_stale(), 0)
+        with self.settings(INSTAPAPER_SYNC_STALE_MINUTES=5):
+            self.assertEqual(SyncJob.objects.requeue_stale(), 1)
+
+    def test_heartbeat(self):
+        """
+        Ensure a running job's heartbeat is updated as each page is written
+        """
+        self.library["archive"] = {idx: bookmark(idx) for idx in range(4, 6)}
+        for parallel in (False, True):
+            heartbeat = mock.Mock()
+            sync = Synchronizer(
+                LibraryClient(self.library), self.account, heartbeat=heartbeat
+            )
+            sync.synchronize(parallel=parallel)
+
+            # Serial writes two pages, parallel fetches two folders then writes them
+            self.assertEqual(heartbeat.call_count, 4 if parallel else 2)
+
+    def test_run_job(self):
+        """
+        Ensure a job synchronizes the account and creates today's counts
+        """
+        Memo.objects.create(date=date.today(), author=self.user)
+        SyncJob.objects.enqueue(self.account)
+
+        job = run_job(SyncJob.objects.claim())
+        self.assertEqual(job.status, SyncJob.STATUS.succeeded, job.message)
+        self.assertEqual(
+            (
+                job.created_articles, job.updated_articles,
+                job.deleted_articles, job.skipped_articles,
+            ),
+            (3, 0, 0, 0),
+        )
+        self.assertIsNotNone(job.finished)
+        self.assertEqual(ArticleCounts.objects.get().unread, 3)
+        self.cached_access_token.assert_called_once_with("token", "secret")
+
+    def test_run_job_failed(self):
+        """
+        Ensure jobs that cannot be synchronized are marked failed
+        """
+        self.cached_access_token.return_value.failures.add("unread")
+        job = run_job(SyncJob.objects.enqueue(self.account))
+        self.assertEqual(job.status, SyncJob.STATUS.failed)
+        self.assertIn("Unexpected service error", job.message)
+
+        self.cached_access_token.return_value.error = socket.timeout("timed out")
+        job = run_job(SyncJob.objects.enqueue(self.account))
+        self.assertEqual(job.status, SyncJob.STATUS.failed)
+        self.assertEqual(job.message, "synchronization failed (timed out)")
+
+        self.account.oauth_token = None
+        self.account.save()
+        job = run_job(SyncJob.objects.enqueue(self.account))
+        self.assertEqual(job.status, SyncJob.STATUS.failed)
+        self.assertIn("access token", job.message)
+
+    def test_syncworker(self):
+        """
+        Ensure the worker processes the queued jobs and closes the session pools
+        """
+        job = SyncJob.objects.enqueue(self.account)
+        command = "reading.management.commands.syncworker"
+
+        # Closing old connections would close the connection of the test transaction
+        with mock.patch(f"{command}.close_old_connections") as close_old_connections:
+            with mock.patch(f"{command}.close_pools") as close_pools:
+                call_command("syncworker", once=True, stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.STATUS.succeeded, job.message)
+        close_pools.assert_called_once_with()
+        close_old_connections.assert_called_with()
+
+    def test_command(self):
+        """
+        Ensure the CLI sync summarizes the account like the sync jobs
+        """
+        memo = Memo.objects.create(date=date.today(), author=self.user)
+        self.library["unread"][4] = bookmark(4, progress=0.5, read_on=date.today())
+        self.assertEqual(memo.summary.articles, 0)
+
+        stdout = io.StringIO()
+        with mock.patch("builtins.print", lambda *args: stdout.write(" ".join(args))):
+            call_command("instapaper", user="reader", stdout=stdout)
+
+        self.assertIn("4 created", stdout.getvalue())
+        self.assertEqual(ArticleCounts.objects.get(memo=memo).unread, 3)
+        memo.summary.refresh_from_db()
+        self.assertEqual(memo.summary.articles, 1)
+
+    def test_views(self):
+        """
+        Ensure the Instapaper page queues a job whose status can be polled
+        """
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("instapaper"), {"oauth_cached": True})
+        self.assertRedirects(response, reverse("instapaper"))
+        job = SyncJob.objects.get()
+
+        response = self.client.get(reverse("sync-job", args=(job.pk,)))
+        self.assertEqual(response.json()["status"], SyncJob.STATUS.queued)
+
+        User = get_user_model()
+        self.client.force_login(User.objects.create_user("other"))
+        response = self.client.get(reverse("sync-job", args=(job.pk,)))
+        self.assertEqual(response.status_code, 404)
+
+
+class PagingTests(ReadingTestCase):
+    """
+    Test walking folders past the page limit with resumable checkpoints
+    """
+
+    def setUp(self):
+        self.account.refresh_from_db()
+        self.library = {
+            "unread": {idx: bookmark(idx) for idx in range(1, 5)},
+            "archive": {idx: bookmark(idx) for idx in range(5, 12)},
+        }
+
+    def test_iter_bookmarks(self):
+        """
+        Ensure folders are walked in pages until a page is not full
+        """
+        client = LibraryClient(self.library)
+        pages = list(client.iter_bookmarks("archive", limit=3))
+        self.assertEqual([len(page) - 2 for page in pages], [3, 3, 1])
+
+        # Each request has the bookmarks returned by the previous pages
+        haves = [have for _, have in client.requests]
+        self.assertEqual(haves[0], "")
+        self.assertEqual(haves[1], "11:hash11,10:hash10,9:hash9")
+        self.assertTrue(haves[2].startswith(haves[1] + ",8:hash8"))
+
+        # A final request is made if the last page is full
+        del self.library["archive"][5]
+        pages = list(client.iter_bookmarks("archive", limit=3))
+        self.assertEqual([len(page) - 2 for page in pages], [3, 3, 0])
+
+    def test_resume(self):
+        """
+        Ensure an interrupted synchronization resumes from its checkpoint
+        """
+        client = LibraryClient(self.library)
+        bookmarks = client.bookmarks
+
+        def interrupt(**kwargs):
+            if kwargs["folder_id"] == "archive" and kwargs["have"]:
+                raise RuntimeError("worker stopped")
+            return bookmarks(**kwargs)
+
+        sync = Synchronizer(client, self.account, user_folders=False, limit=3)
+        with mock.patch.object(client, "bookmarks", side_effect=interrupt):
+            with self.assertRaises(RuntimeError):
+                sync.synchronize()
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.sync_checkpoint, {
+            "unread": {"pages": 2, "bookmarks": 4, "complete": True},
+            "archive": {"pages": 1, "bookmarks": 3},
+        })
+
+        # The complete folder is skipped and the archive continues where it stopped
+        client = LibraryClient(self.library)
+        sync = Synchronizer(client, self.account, user_folders=False, limit=3)
+        self.assertEqual(sync.synchronize(), (4, 0, 0, 0))
+        self.assertEqual([folder for folder, _ in client.requests], ["archive"] * 2)
+        self.assertEqual(Article.objects.filter(folder="archive").count(), 7)
+
+        self.assertEqual(self.account.sync_checkpoint, {})
+        self.assertIsNotNone(self.account.last_synchronized)
+
+    def test_failed_folder(self):
+        """
+        Ensure all folders are synchronized again after a run with a failed folder
+        """
+        client = LibraryClient(self.library, failures={"archive"})
+        sync = Synchronizer(client, self.account, user_folders=False, limit=3)
+        self.assertEqual(sync.synchronize(), (4, 0, 0, 0))
+        self.assertEqual(set(sync.errors), {"archive"})
+        self.assertEqual(self.account.sync_checkpoint, {})
+        self.assertIsNone(self.account.last_synchronized)
+
+        self.library["unread"][1] = bookmark(1, progress=0.5, hash="read")
+        client = LibraryClient(self.library)
+        sync = Synchronizer(client, self.account, user_folders=False, limit=3)
+        self.assertEqual(sync.synchronize(), (7, 1, 0, 0))
+        self.assertEqual(set(sync.results), {"unread", "archive"})
+
+    def test_unchanged_beyond_limit(self):
+        """
+        Ensure unchanged bookmarks beyond the limit of a full page are not deleted
+        """
+        client = LibraryClient(self.library)
+        sync = Synchronizer(client, self.account, user_folders=False, limit=3)
+        self.assertEqual(sync.synchronize(), (11, 0, 0, 0))
+
+        # Archive three new bookmarks and delete one of the oldest
+        for bookmark_id in (12, 13, 14):
+            self.library["archive"][bookmark_id] = bookmark(bookmark_id)
+        del self.library["archive"][6]
+
+        # The full first page returns the unchanged bookmarks past it as delete_ids
+        have = Article.instapaper.have(self.account, "archive")
+        meta = client.bookmarks(limit=3, folder_id="archive", have=have)[0]
+        self.assertEqual(meta["delete_ids"], "11,10,9,8,7,6,5")
+
+        sync = Synchronizer(client, self.account, user_folders=False, limit=3)
+        self.assertEqual(sync.synchronize(), (3, 0, 1, 0))
+        self.assertEqual(
+            set(Article.objects.filter(deleted=True).values_list("bookmark_id")),
+            {(6,)},
+        )
+
+    def test_iter_have(self):
+        """
+        Ensure the have parameter is streamed in segments, most recent first
+        """
+        records = [dict(record) for record in self.library["archive"].values()]
+        Article.instapaper.from_bookmarks(self.account, records, folder="archive")
+        Article.objects.filter(bookmark_id=9).update(deleted=True)
+
+        segments = list(Article.instapaper.iter_have(self.account, "archive", size=3))
+        self.assertEqual(segments, [
+            "11:hash11,10:hash10,8:hash8", "7:hash7,6:hash6,5:hash5",
+        ])
+        have = Article.instapaper.have(self.account, "archive")
+        self.assertEqual(have, ",".join(segments))
+        self.assertEqual(list(Article.instapaper.iter_have(self.account, "unread")), [])
+
+    def test_have_segments(self):
+        """
+        Ensure all have segments are sent with the first request so that unchanged
+        bookmarks are not returned and deletions in later segments are found
+        """
+        records = [dict(record) for record in self.library["archive"].values()]
+        Article.instapaper.from_bookmarks(self.account, records, folder="archive")
+        for bookmark_id in (10, 5):
+            del self.library["archive"][bookmark_id]
+
+        client = LibraryClient(self.library)
+        have = Article.instapaper.iter_have(self.account, "archive", size=3)
+        pages = list(client.iter_bookmarks("archive", have=have, limit=3))
+        self.assertEqual([len(page) - 2 for page in pages], [0])
+        self.assertEqual(len(client.requests[0][1].split(",")), 7)
+        self.assertEqual(pages[0][0]["delete_ids"], "10,5")
+
+        # The next have has the bookmarks returned by a full page with their new hash
+        for bookmark_id in (11, 9, 8):
+            self.library["archive"][bookmark_id] = bookmark(
+                bookmark_id, progress=0.5, hash=f"read{bookmark_id}"
+            )
+
+        client = LibraryClient(self.library)
+        have = Article.instapaper.iter_have(self.account, "archive", size=3)
+        pages = list(client.iter_bookmarks("archive", have=have, limit=3))
+        self.assertEqual([len(page) - 2 for page in pages], [3, 0])
+        have = [item.split(":") for item in client.requests[1][1].split(",")]
+        self.assertEqual(len(have), len(dict(have)))
+        self.assertEqual(dict(have)["11"], "read11")
+        self.assertEqual(pages[-1][0]["delete_ids"], "10,5")
+
+        sync = Synchronizer(client, self.account, user_folders=False, limit=3)
+        self.assertEqual(sync.synchronize(), (4, 3, 2, 0))
+        self.assertEqual(Article.instapaper.filter(deleted=True).count(), 2)
+
+
+##########################################################################
+## Fake Instapaper Tests
+##########################################################################
+
+class FakeInstapaperTests(ReadingTestCase):
+    """
+    Test synchronizing against the local fake Instapaper API server
+    """
+
+    def setUp(self):
+        self.account.refresh_from_db()
+        self.library = Library.generate(1200, folders=1, seed=7)
+
+    def tearDown(self):
+        close_pools()
+
+    def serve(self, **kwargs):
+        server = FakeInstapaper(self.library, seed=11, **kwargs)
+        server.start()
+        self.addCleanup(server.stop)
+
+        client = Instapaper(
+            "key", "secret", endpoint=server.endpoint,
+            retry=RetryPolicy(max_retries=10, backoff=0, jitter=False),
+        )
+        client.authenticate("reader@example.com", "secret")
+        return server, client
+
+    def assertLibrary(self):
+        """
+        Assert the active articles and hashes of every folder match the fake library
+        """
+        for folder in FOLDERS + tuple(self.library.folders):
+            articles = Article.instapaper.filter(
+                account=self.account, folder=folder, deleted=False
+            )
+            self.assertEqual(
+                dict(articles.values_list("bookmark_id", "hash")),
+                {
+                    bookmark_id: self.library.bookmarks[bookmark_id][1]["hash"]
+                    for bookmark_id in self.library.in_folder(folder)
+                },
+                folder,
+            )
+
+    def test_synchronize(self):
+        """
+        Ensure folders past 500 bookmarks are synchronized, then only the changes
+        """
+        self.assertGreater(len(self.library.in_folder("archive")), 500)
+        server, client = self.serve()
+
+        sync = Synchronizer(client, self.account)
+        self.assertEqual(sync.synchronize(), (1200, 0, 0, 0))
+        self.assertEqual(sync.errors, {})
+        self.assertLibrary()
+
+        sync = Synchronizer(client, self.account)
+        self.assertEqual(sync.synchronize(), (0, 0, 0, 0))
+
+        changes = self.library.churn(0.05, seed=3)
+        sync = Synchronizer(client, self.account, limit=100)
+        created, updated, deleted, _ = sync.synchronize()
+        self.assertEqual(created, changes["added"])
+        self.assertLessEqual(updated, changes["progressed"] + changes["archived"])
+        self.assertGreaterEqual(deleted, changes["deleted"])
+        self.assertEqual(sync.errors, {})
+        self.assertLibrary()
+
+    def test_limit_window(self):
+        """
+        Ensure unchanged bookmarks beyond the limit of a full page are not deleted
+        """
+        server, client = self.serve()
+        self.assertEqual(Synchronizer(client, self.account).synchronize()[0], 1200)
+
+        # Archive new bookmarks ahead of the unchanged ones and delete old bookmarks
+        for _ in range(10):
+            self.library.add_bookmark(folder="archive")
+        for bookmark_id in self.library.in_folder("archive")[:3]:
+            self.library.delete(bookmark_id)
+
+        # The delete_ids of a full page include the live bookmarks past its limit
+        have = Article.instapaper.have(self.account, "archive")
+        meta = self.library.listing("archive", 10, have)[0]
+        delete_ids = {int(bookmark_id) for bookmark_id in meta["delete_ids"].split(",")}
+        live = delete_ids & set(self.library.in_folder("archive"))
+        self.assertGreater(len(live), 500)
+
+        sync = Synchronizer(client, self.account, limit=10)
+        self.assertEqual(sync.synchronize(), (10, 0, 3, 0))
+        self.assertEqual(sync.errors, {})
+        self.assertLibrary()
+
+    def test_errors(self):
+        """
+        Ensure throttled and failed requests are retried until the sync completes
+        """
+        server, client = self.serve(error_rate=0.3, retry_after=0)
+
+        with mock.patch("reading.instapaper.time.sleep"):
+            sync = Synchronizer(client, self.account, limit=200)
+            self.assertEqual(sync.synchronize(parallel=True)[0], 1200)
+
+        self.assertEqual(sync.errors, {})
+        self.assertGreater(server.stats["errors"], 0)
+        self.assertEqual(client.stats["retries"], server.stats["errors"])
+        self.assertLibrary()
+
+
+class AsyncInstapaperTests(TestCase):
+    """
+    Test the asyncio Instapaper client against the local fake Instapaper API server
+    """
+
+    def setUp(self):
+        self.library = Library.generate(40, folders=1, seed=7)
+        server = FakeInstapaper(self.library)
+        server.start()
+        self.addCleanup(server.stop)
+
+        self.client = Instapaper("key", "secret", endpoint=server.endpoint)
+        self.client.authenticate("reader@example.com", "secret")
+        self.aclient = AsyncInstapaper(self.client)
+        self.addCleanup(self.aclient.close)
+        self.ids = sorted(self.library.bookmarks)[:12]
+
+    def tearDown(self):
+        close_pools()
+
+    def test_methods(self):
+        """
+        Ensure the coroutines return the same results as the blocking client
+        """
+        async def call():
+            return await asyncio.gather(
+                self.aclient.verify_credentials(), self.aclient.folders(),
+                self.aclient.bookmarks(limit=10, folder_id="archive"),
+                self.aclient.get_text(self.ids[0]),
+                self.aclient.highlights(self.ids[0]),
+            )
+
+        self.assertEqual(asyncio.run(call()), [
+            self.client.verify_credentials(), self.client.folders(),
+            self.client.bookmarks(limit=10, folder_id="archive"),
+            self.client.get_text(self.ids[0]), self.client.highlights(self.ids[0]),
+        ])
+
+    def test_fan_out(self):
+        """
+        Ensure a batch of bookmarks is fetched with at most concurrency requests
+        """
+        aclient = AsyncInstapaper(self.client, concurrency=3)
+        self.addCleanup(aclient.close)
+        active, peak, lock = [0], [0], threading.Lock()
+        get_text = self.client.get_text
+
+        def tracked(bookmark_id):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            try:
+                time.sleep(0.01)
+                return get_text(bookmark_id)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        with mock.patch.object(self.client, "get_text", side_effect=tracked):
+            texts = asyncio.run(aclient.get_texts(self.ids))
+
+        self.assertEqual(peak[0], 3)
+        self.assertEqual(list(texts), self.ids)
+        self.assertEqual(
+            texts, {bookmark_id: get_text(bookmark_id) for bookmark_id in self.ids}
+        )
+
+        highlights = asyncio.run(aclient.get_highlights(self.ids))
+        self.assertEqual(highlights, {
+            bookmark_id: self.client.highlights(bookmark_id)
+            for bookmark_id in self.ids
+        })
+
+    def test_fan_out_errors(self):
+        """
+        Ensure errors of single bookmarks are raised or returned like the client
+        """
+        with self.assertRaises(InstapaperException):
+            asyncio.run(self.aclient.get_texts([self.ids[0], 1]))
+
+        texts = asyncio.run(
+            self.aclient.get_texts([self.ids[0], 1], return_exceptions=True)
+        )
+        self.assertEqual(texts[self.ids[0]], self.client.get_text(self.ids[0]))
+        self.assertIsInstance(texts[1], InstapaperException)
+        self.assertEqual(texts[1].code, 1241)
+
+
+##########################################################################
+## Benchmark Tests
+##########################################################################
+
+def measurement(wall=1.0, queries=10):
+    return {"wall": wall, "queries": queries, "peak_memory": None}
+
+
+class BenchmarkTests(TestCase):
+    """
+    Test the synchronization benchmark with a small synthetic library
+    """
+
+    def tearDown(self):
+        close_pools()
+
+    def test_run(self):
+        """
+        Ensure every stage is measured and the benchmark data is rolled back
+        """
+        stdout = io.StringIO()
+        results = SyncBenchmark(sizes=(40,), stdout=stdout).run()
+
+        self.assertEqual(results["options"]["seed"], 42)
+        self.assertEqual([result["size"] for result in results["results"]], [40])
+        stages = results["results"][0]["stages"]
+        self.assertEqual(tuple(stages), STAGES)
+        for stage, measured in stages.items():
+            self.assertGreater(measured["wall"], 0, stage)
+            self.assertGreater(measured["peak_memory"], 0, stage)
+
+        self.assertGreater(stages["sync"]["queries"], 0)
+        self.assertEqual(len(stdout.getvalue().splitlines()), len(STAGES))
+        self.assertFalse(Article.objects.exists())
+        self.assertFalse(InstapaperAccount.objects.exists())
+        json.dumps(results)
+
+    def test_compare(self):
+        """
+        Ensure stages with more queries or much slower than the baseline are flagged
+        """
+        baseline = {"results": [{"size": 100, "stages": {
+            "sync": measurement(), "resync": measurement(), "associate": measurement(),
+            "daily_counts": measurement(0.001),
+        }}]}
+        results = {"results": [{"size": 100, "stages": {
+            "sync": measurement(queries=11), "resync": measurement(1.2, 8),
+            "associate": measurement(1.3), "daily_counts": measurement(0.005),
+            "delete_bookmarks": measurement(9.0),
+        }}, {"size": 1000, "stages": {"sync": measurement(9.0)}}]}
+
+        lines = list(compare(results, baseline))
+        self.assertEqual(
+            [regressed for _, regressed in lines], [True, False, True, False]
+        )
+        self.assertIn("+1 queries   REGRESSION", lines[0][0])
+        self.assertIn("1.20x time -2 queries", lines[1][0])
+        self.assertNotIn("REGRESSION", lines[1][0])
+
+        lines = list(compare(results, baseline, threshold=1.5))
+        self.assertEqual(
+            [regressed for _, regressed in lines], [True, False, False, False]
+        )
+
+    def test_command(self):
+        """
+        Ensure the command writes the results and reports regressions from a baseline
+        """
+        with TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "results.json")
+            baseline = os.path.join(tmpdir, "baseline.json")
+
+            stdout = io.StringIO()
+            call_command(
+                "benchmark", sizes="20", memory=False, output=output, stdout=stdout
+            )
+            with open(output) as f:
+                results = json.load(f)
+            self.assertEqual(tuple(results["results"][0]["stages"]), STAGES)
+            self.assertIsNone(results["results"][0]["stages"]["sync"]["peak_memory"])
+
+            # A baseline that made no queries flags every stage that queried
+            for stage in results["results"][0]["stages"].values():
+                stage.update(wall=1000.0, queries=0)
+            with open(baseline, "w") as f:
+                json.dump(results, f)
+
+            stdout, stderr = io.StringIO(), io.StringIO()
+            call_command(
+                "benchmark", sizes="20", memory=False, compare=baseline,
+                stdout=stdout, stderr=stderr,
+            )
+            self.assertIn("REGRESSION", stdout.getvalue())
+            self.assertIn("stages regressed", stderr.getvalue())
+
+            with self.assertRaises(CommandError):
+                call_command(
+                    "benchmark", sizes="20", memory=False, compare=baseline,
+                    fail=True, stdout=io.StringIO(), stderr=io.StringIO(),
+                )
+
+
+##########################################################################
+## View Tests
+##########################################################################
+
+class InstapaperViewPerformanceTests(PerformanceTestMixin, TestCase):
+    """
+    Query count and render time budgets for the Instapaper page.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=90, articles=4)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_instapaper_view(self):
+        """
+        Check the Instapaper page render budget
+        """
+        SyncJob.objects.enqueue(self.user.instapaper_account)
+        response = self.assertRenderBudget(
+            reverse("instapaper"), queries=5, seconds=0.25
+        )
+        self.assertEqual(response.context["article_counts"]["archived"], 360)
+        self.assertIsNotNone(response.context["sync_job"])
+
+    def test_instapaper_view_articles(self):
+        """
+        Ensure Instapaper page queries do not grow with the number of articles
+        """
+        account = self.user.instapaper_account
+        Article.objects.bulk_create([
+            Article(
+                bookmark_id=5000+idx, account=account, folder="unread",
+                url=f"https://example.com/unread/{idx}", title=f"Unread {idx}",
+            )
+            for idx in range(200)
+        ])
+
+        response = self.assertRenderBudget(
+            reverse("instapaper"), queries=5, seconds=0.25
+        )
+        self.assertEqual(response.context["article_counts"]["unread"], 200)
+
+
+class ArticleAPITests(PerformanceTestMixin, TestCase):
+    """
+    Query count budgets of the pages of the articles API endpoint
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_dataset(days=90, articles=4)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_articles(self):
+        """
+        Ensure the articles are paginated by progress in a fixed number of queries
+        """
+        url = reverse("api:article-list") + "?per_page=100"
+        articles = self.assertPaginationBudget(url, queries=3, seconds=0.25)
+        self.assertEqual(len(articles), 360)
+        self.assertEqual(len({article["id"] for article in articles}), 360)
+
+        progress = [article["progress_timestamp"] for article in articles]
+        self.assertEqual(progress, sorted(progress, reverse=True))
+
+        url = reverse("api:article-list") + "?fields=id,title"
+        articles = self.assertPaginationBudget(url, queries=3)
+        self.assertEqual(set(articles[0]), {"id", "title"})
+
+    def test_create_article(self):
+        """
+        Ensure articles are added to the user's Instapaper account
+        """
+        url = reverse("api:article-list")
+        article = {
+            "url": "https://example.com/new", "title": "New", "bookmark_id": 1,
+            "progress": 1.0, "progress_timestamp": "2020-01-01T12:00:00Z",
+        }
+        response = self.client.post(url, article, content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            Article.objects.get(bookmark_id=1).account, self.user.instapaper_account
+        )
+
+        article["url"] = "https://example.com/duplicate"
+        response = self.client.post(url, article, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("bookmark_id", response.json())
+
+        # Articles without a progress timestamp are not listed but can be retrieved
+        article = {
+            "url": "https://example.com/unread", "title": "Unread", "bookmark_id": 2,
+        }
+        response = self.client.post(url, article, content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
 
-# Create your tests here.
+        detail = reverse("api:article-detail", kwargs={"pk": response.json()["id"]})
+        response = self.client.get(detail)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Unread")
+        listed = self.client.get(url).json()["results"]
+        self.assertNotIn(2, [item["bookmark_id"] for item in listed])
@@ -17,14 +17,21 @@ Views and request handlers for the reading app
 ## Imports
 ##########################################################################
 
+from django.views import View
 from django.contrib import messages
-from django.http import HttpResponseRedirect
 from reading.forms import InstapaperLoginForm
+from django.shortcuts import get_object_or_404
 from django.views.generic.edit import FormView
 from django.urls import reverse_lazy as reverse
 from reading.instapaper import InstapaperException
-from reading.models import InstapaperAccount, Article
+from django.http import HttpResponseRedirect, JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
+from reading.models import InstapaperAccount, Article, SyncJob
+from reading.serializers import ArticleSerializer
+
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from memoro.api import SparseFieldsetsMixin, ProgressCursorPagination
 
 
 class InstapaperManager(LoginRequiredMixin, FormView):
@@ -36,19 +43,18 @@ class InstapaperManager(LoginRequiredMixin, FormView):
     template_name = "site/instapaper.html"
 
     def form_valid(self, form):
-        try:
-            form.authenticate()
-        except InstapaperException as e:
-            form.add_error(None, f"authentication failed ({e})")
-            return self.form_invalid(form)
-
-        try:
-            msg = "Instapaper sychronized: {} articles created, {} updated, {} deleted"
-            msg = msg.format(*form.synchronize())
-            messages.success(self.request, msg)
-        except InstapaperException as e:
-            form.add_error(None, f"synchronization failed ({e})")
-            return self.form_invalid(form)
+        # The password is not stored so the access token must be fetched in the request,
+        # otherwise the background job verifies and uses the cached access token.
+        if not form.cleaned_data["oauth_cached"]:
+            try:
+                form.authenticate()
+            except InstapaperException as e:
+                form.add_error(None, f"authentication failed ({e})")
+                return self.form_invalid(form)
+
+        # Queue the synchronization to be processed by the syncworker
+        SyncJob.objects.enqueue(form.account)
+        messages.info(self.request, "Instapaper synchronization queued")
 
         redirect_to = form.cleaned_data["redirect_to"]
         return HttpResponseRedirect(self.get_success_url(redirect_to))
@@ -78,12 +84,49 @@ class InstapaperManager(LoginRequiredMixin, FormView):
         context['page'] = 'instapaper'
 
         # Add article context
-        articles = Article.instapaper.account(self.request.user.instapaper_account)
-        context['article_counts'] = {
-            "read": articles.read().count(),
-            "unread": articles.unread().count(),
-            "archived": articles.archived().count(),
-            "starred": articles.starred().count(),
-        }
+        account = self.request.user.instapaper_account
+        context['article_counts'] = Article.instapaper.counts(account)
+        context['sync_job'] = account.sync_jobs.first()
 
         return context
+
+
+class SyncJobStatus(LoginRequiredMixin, View):
+    """
+    Returns the status of a background synchronization job as JSON for polling.
+    """
+
+    def get(self, request, pk):
+        job = get_object_or_404(SyncJob, pk=pk, account__user=request.user)
+        return JsonResponse(job.to_json())
+
+
+##########################################################################
+## API Views
+##########################################################################
+
+class ArticleViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
+    """
+    The articles of the requesting user's Instapaper account that have not been deleted,
+    most recently read first, paginated by the progress timestamp. Articles without a
+    progress timestamp (never synchronized from Instapaper) cannot be paginated by it
+    and are not listed, but can be retrieved, updated and deleted.
+    """
+
+    serializer_class = ArticleSerializer
+    pagination_class = ProgressCursorPagination
+
+    def get_queryset(self):
+        queryset = Article.objects.filter(
+            account__user=self.request.user, deleted=False
+        )
+        if self.action == "list":
+            queryset = queryset.filter(progress_timestamp__isnull=False)
+        return self.select_fields(queryset)
+
+    def perform_create(self, serializer):
+        try:
+            account = self.request.user.instapaper_account
+        except InstapaperAccount.DoesNotExist:
+            raise ValidationError("an Instapaper account is required to add articles")
+        serializer.save(account=account)
@@ -24,6 +24,28 @@ $(document).ready(function () {
     $("input#id_password").prop("disabled", cached);
   });
 
+  // Poll the status of a queued or running synchronization job
+  var syncJobStatus = $("#syncJobStatus");
+  if (syncJobStatus.length && syncJobStatus.data("done") === false) {
+    var pollSyncJob = function() {
+      $.getJSON(syncJobStatus.data("url"), function(job) {
+        if (job.done) {
+          // Reload to display the updated article counts
+          window.location.reload();
+          return;
+        }
+
+        var text = "Synchronization " + job.status;
+        if (job.message) {
+          text += ": " + job.message;
+        }
+        syncJobStatus.text(text);
+        setTimeout(pollSyncJob, 2000);
+      });
+    };
+    setTimeout(pollSyncJob, 2000);
+  }
+
   $("#clearInstapaperLoginForm").click(function(e) {
     e.preventDefault();
 